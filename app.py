@@ -1,17 +1,15 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import re
-import streamlit as st
-
-
 from datetime import datetime
 
-from youtube_api import get_video_data, get_trending_shorts
-from data_processor import process_video_data, extract_features
-from model import predict_engagement
-from utils import is_shorts_url, extract_video_id, format_number
+from data_processor import summarize_trending
+from model import get_engagement_scorer
+from pipeline import StageFailedError, VideoNotFoundError, build_analysis_pipeline
+from similarity import index_videos as index_similar
+from thumbnails import HISTORY_WIDTH, VIDEO_INFO_WIDTH, thumbnail
+from tag_index import index_videos, video_tags
+from trend_stats import add_to_trend_corpus
+from utils import extract_video_id, format_number
+import tracing
 
 
 st.title("YouTube Shorts Analyzer")
@@ -43,6 +41,17 @@ url_input = st.text_input(
 # Analysis trigger
 analyze_button = st.button("Analyze Video", type="primary")
 
+# Debug panel with a per-stage timing waterfall of the current run
+show_timings = st.checkbox("Show stage timings", value=tracing.is_enabled())
+
+# Heavy dependencies (pandas, plotly, scikit-learn) are imported inside the
+# functions that use them, so Streamlit reruns and cold starts stay cheap
+
+# Build the configured scorer (and load any trained model) once per process
+@st.cache_resource
+def load_engagement_scorer():
+    return get_engagement_scorer()
+
 # Function to display error messages
 def show_error(message):
     st.error(message)
@@ -52,9 +61,9 @@ def display_video_info(video_data):
     col1, col2 = st.columns([1, 2])
     
     with col1:
-        # Display thumbnail
-        if 'thumbnail_url' in video_data:
-            st.image(video_data['thumbnail_url'], use_column_width=True)
+        # Display thumbnail, from the local cache the pipeline fills
+        if video_data.get('thumbnail_url'):
+            st.image(thumbnail(video_data['thumbnail_url'], VIDEO_INFO_WIDTH), width=VIDEO_INFO_WIDTH)
     
     with col2:
         # Display basic video info
@@ -70,8 +79,7 @@ def display_video_info(video_data):
         with metric_col3:
             st.metric("Comments", format_number(video_data['comment_count']))
         with metric_col4:
-            published_date = datetime.strptime(video_data['published_at'], "%Y-%m-%dT%H:%M:%SZ")
-            days_ago = (datetime.now() - published_date).days
+            days_ago = (datetime.now() - video_data['published']).days
             st.metric("Published", f"{days_ago} days ago")
         
         # Display tags if available
@@ -82,13 +90,15 @@ def display_video_info(video_data):
 
 # Function to display engagement metrics
 def display_engagement_metrics(video_data, prediction_result):
+    import plotly.graph_objects as go
+    
     st.subheader("Engagement Analysis")
     
     # Create columns for metrics
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        views_per_day = int(video_data['view_count'] / max(1, (datetime.now() - datetime.strptime(video_data['published_at'], "%Y-%m-%dT%H:%M:%SZ")).days))
+        views_per_day = int(video_data['views_per_day'])
         st.metric("Views/Day", format_number(views_per_day))
         
     with col2:
@@ -136,20 +146,20 @@ def display_engagement_metrics(video_data, prediction_result):
 
 # Function to display comparison with trending videos
 def display_trending_comparison(video_data, trending_data):
+    import plotly.graph_objects as go
+    
     st.subheader("Comparison with Trending Shorts")
     
     if not trending_data:
         st.info("Could not retrieve trending data for comparison at this time.")
         return
     
-    # Create a dataframe for trending videos
-    df_trending = pd.DataFrame(trending_data)
-    
-    # Calculate average metrics
-    avg_views = df_trending['view_count'].mean()
-    avg_likes = df_trending['like_count'].mean()
-    avg_comments = df_trending['comment_count'].mean()
-    avg_like_ratio = (df_trending['like_count'] / df_trending['view_count'].clip(lower=1)).mean() * 100
+    # Medians, since a few viral outliers dominate the averages of a short list
+    trending_summary = summarize_trending(trending_data)
+    median_views = trending_summary['median_views']
+    median_likes = trending_summary['median_likes']
+    median_comments = trending_summary['median_comments']
+    median_like_ratio = trending_summary['median_like_ratio']
     
     # Compare with current video
     current_like_ratio = (video_data['like_count'] / max(1, video_data['view_count'])) * 100
@@ -157,19 +167,19 @@ def display_trending_comparison(video_data, trending_data):
     # Create comparison chart
     metrics = ['Views', 'Likes', 'Comments', 'Like/View %']
     current_values = [
-        video_data['view_count'] / max(1, avg_views) * 100,
-        video_data['like_count'] / max(1, avg_likes) * 100,
-        video_data['comment_count'] / max(1, avg_comments) * 100,
-        current_like_ratio / max(0.01, avg_like_ratio) * 100
+        video_data['view_count'] / max(1, median_views) * 100,
+        video_data['like_count'] / max(1, median_likes) * 100,
+        video_data['comment_count'] / max(1, median_comments) * 100,
+        current_like_ratio / max(0.01, median_like_ratio) * 100
     ]
     
     fig = go.Figure()
     
-    # Add bar for current video (as percentage of trending average)
+    # Add bar for current video (as percentage of trending median)
     fig.add_trace(go.Bar(
         x=metrics,
         y=current_values,
-        name='Your Video vs Trending Average (%)',
+        name='Your Video vs Trending Median (%)',
         marker_color='rgba(75, 192, 192, 0.8)',
         text=[f"{val:.1f}%" for val in current_values],
         textposition='auto',
@@ -190,9 +200,9 @@ def display_trending_comparison(video_data, trending_data):
     )
     
     fig.update_layout(
-        title="Your Video Compared to Trending Average (100% = Equal to Average)",
+        title="Your Video Compared to Trending Median (100% = Equal to Median)",
         xaxis_title="Metrics",
-        yaxis_title="Percentage of Trending Average",
+        yaxis_title="Percentage of Trending Median",
         height=400,
         yaxis=dict(
             range=[0, max(max(current_values) * 1.1, 110)]
@@ -203,11 +213,136 @@ def display_trending_comparison(video_data, trending_data):
     
     # Add explanatory text
     if sum(val > 100 for val in current_values) >= 2:
-        st.success("Your video is performing above average in multiple metrics compared to trending videos!")
+        st.success("Your video is performing above the median in multiple metrics compared to trending videos!")
     elif sum(val > 100 for val in current_values) == 1:
-        st.info("Your video is performing above average in one metric, with room for improvement in others.")
+        st.info("Your video is performing above the median in one metric, with room for improvement in others.")
     else:
-        st.warning("Your video is currently performing below trending averages. See recommendations below.")
+        st.warning("Your video is currently performing below trending medians. See recommendations below.")
+    
+    # Place the video among every trending Short seen so far
+    corpus = add_to_trend_corpus(trending_data)
+    overall = corpus.get()
+    if overall:
+        percentile_ranks = corpus.percentile_ranks(video_data)
+        st.markdown(f"**Percentile among {overall['views'].stats.count:,} trending Shorts seen**")
+        rank_cols = st.columns(len(metrics))
+        for col, label, metric in zip(rank_cols, metrics, ['views', 'likes', 'comments', 'like_ratio']):
+            col.metric(label, f"{percentile_ranks[metric]:.0f}th")
+
+# Function to compare the video with trending Shorts on the same topic
+def display_similar_shorts(video_data, trending_data):
+    import pandas as pd
+    import plotly.graph_objects as go
+    
+    st.subheader("Compare with Similar Shorts")
+    
+    # Every trending list grows the shared index
+    neighbors = index_similar(trending_data).query(video_data, k=10)
+    if not neighbors:
+        st.info("No indexed trending Shorts share this video's title words or tags yet.")
+        return
+    
+    similar = [video for _, video in neighbors]
+    st.dataframe(pd.DataFrame([
+        {
+            'similarity': round(similarity, 2),
+            'title': video['title'],
+            'channel': video['channel_title'],
+            'views': video['view_count'],
+            'likes': video['like_count'],
+            'comments': video['comment_count'],
+        }
+        for similarity, video in neighbors
+    ]), use_container_width=True, hide_index=True)
+    
+    # Same chart as the trend comparison, against the similar Shorts' medians
+    similar_summary = summarize_trending(similar)
+    current_like_ratio = (video_data['like_count'] / max(1, video_data['view_count'])) * 100
+    metrics = ['Views', 'Likes', 'Comments', 'Like/View %']
+    current_values = [
+        video_data['view_count'] / max(1, similar_summary['median_views']) * 100,
+        video_data['like_count'] / max(1, similar_summary['median_likes']) * 100,
+        video_data['comment_count'] / max(1, similar_summary['median_comments']) * 100,
+        current_like_ratio / max(0.01, similar_summary['median_like_ratio']) * 100
+    ]
+    
+    fig = go.Figure(go.Bar(
+        x=metrics,
+        y=current_values,
+        name='Your Video vs Similar Shorts Median (%)',
+        marker_color='rgba(153, 102, 255, 0.8)',
+        text=[f"{val:.1f}%" for val in current_values],
+        textposition='auto',
+    ))
+    fig.add_shape(type="line", x0=-0.5, y0=100, x1=3.5, y1=100, line=dict(color="red", width=2, dash="dash"))
+    fig.update_layout(
+        title=f"Your Video Compared to {len(similar)} Similar Trending Shorts (100% = Equal to Median)",
+        xaxis_title="Metrics",
+        yaxis_title="Percentage of Similar Shorts Median",
+        height=400,
+        yaxis=dict(range=[0, max(max(current_values) * 1.1, 110)])
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+# Function to display which tags go with trending Shorts
+def display_tag_insights(video_data, trending_data):
+    import pandas as pd
+    
+    st.subheader("Tag Insights")
+    
+    # Every trending list and analyzed video grows the shared index
+    index = index_videos(trending_data, trending=True)
+    index.add(video_data)
+    if not index.trending_count:
+        st.info("No trending Shorts have been indexed yet.")
+        return
+    st.caption(f"Based on {len(index):,} indexed Shorts, {index.trending_count:,} of them trending")
+    # With (almost) only trending Shorts indexed every tag's lift is ~1
+    show_lift = index.has_baseline()
+    if not show_lift:
+        st.info("Trending lift needs non-trending Shorts to compare against. Build an index with "
+                "`python tag_index.py crawl` and point TAG_INDEX_PATH at it.")
+    
+    # How the video's own tags do among trending Shorts
+    own_tags = video_tags(video_data)
+    # Tags the index has not seen (e.g. description hashtags of a video it
+    # first got from a trending list) have no statistics yet
+    rows = index.known_tag_stats(own_tags)
+    if rows:
+        st.markdown("**Your tags**")
+        table = pd.DataFrame([
+            {
+                'tag': row['tag'],
+                'videos': row['videos'],
+                'trending videos': row['trending_videos'],
+                'trending lift': round(row['lift'], 2),
+                'trending rank': row['trending_rank'],
+            }
+            for row in rows
+        ])
+        if not show_lift:
+            table = table.drop(columns='trending lift')
+        st.dataframe(table, use_container_width=True, hide_index=True)
+    elif own_tags:
+        st.info("None of this video's tags have been indexed yet.")
+    else:
+        st.info("This video has no tags or hashtags.")
+    
+    # Tags over-represented among trending Shorts that the video lacks
+    suggestions = [row for row in index.trending_tags(top=30) if row['tag'] not in own_tags][:10] if show_lift else []
+    if suggestions:
+        st.markdown("**Tags that go with trending Shorts**")
+        st.dataframe(pd.DataFrame(suggestions).rename(columns={
+            'trending_videos': 'trending videos', 'lift': 'trending lift'
+        }).round(2), use_container_width=True, hide_index=True)
+    
+    # What creators pair with the video's most used tag
+    if rows:
+        main_tag = max(rows, key=lambda row: row['videos'])['tag']
+        pairs = index.co_occurring(main_tag, top=10)
+        if pairs:
+            st.markdown(f"**Often used together with \"{main_tag}\"**")
+            st.dataframe(pd.DataFrame(pairs).round(2), use_container_width=True, hide_index=True)
 
 # Function to display recommendations
 def display_recommendations(video_data, prediction_result):
@@ -250,62 +385,132 @@ def display_recommendations(video_data, prediction_result):
     else:
         st.success("Your video is well optimized! Continue with your current strategy.")
 
+# Function to display the stage timing waterfall of one run
+def display_trace(run_trace):
+    import pandas as pd
+    import plotly.graph_objects as go
+    
+    spans = run_trace.waterfall()
+    
+    with st.expander(f"Stage timings: {run_trace.duration * 1000:.0f} ms total", expanded=True):
+        # One bar per span, starting at its offset from the start of the run
+        labels = [f"{'  ' * span['depth']}{span['name']}" for span in spans]
+        fig = go.Figure(go.Bar(
+            y=labels,
+            x=[span['duration_ms'] for span in spans],
+            base=[span['offset_ms'] for span in spans],
+            orientation='h',
+            marker_color=['rgba(255, 99, 132, 0.8)' if span['errors'] else 'rgba(75, 192, 192, 0.8)' for span in spans],
+            text=[f"{span['duration_ms']:.1f} ms" for span in spans],
+            textposition='auto',
+        ))
+        fig.update_layout(
+            xaxis_title="Milliseconds since start of analysis",
+            yaxis=dict(autorange="reversed"),
+            height=max(200, 40 * len(spans)),
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Counters include everything recorded in nested stages
+        st.dataframe(pd.DataFrame([
+            {
+                'stage': span['name'],
+                'ms': round(span['duration_ms'], 1),
+                **span['counters'],
+                'errors': '; '.join(span['errors']),
+            }
+            for span in spans
+        ]).fillna(0), use_container_width=True)
+
+# Functions to fill each results tab from the pipeline results
+def render_video_analysis(results):
+    display_video_info(results['processed_data'])
+    st.markdown("---")
+    display_engagement_metrics(results['processed_data'], results['prediction'])
+
+def render_trend_comparison(results):
+    display_trending_comparison(results['processed_data'], results['trending_videos'])
+
+def render_similar_shorts(results):
+    display_similar_shorts(results['processed_data'], results['trending_videos'])
+
+def render_tag_insights(results):
+    display_tag_insights(results['processed_data'], results['trending_videos'])
+
+def render_recommendations(results):
+    display_recommendations(results['processed_data'], results['prediction'])
+
+# Function to add an analyzed video to the history
+def add_to_history(video_id, video_data, prediction_result):
+    if video_id not in [item['video_id'] for item in st.session_state.history]:
+        st.session_state.history.insert(0, {
+            'video_id': video_id,
+            'title': video_data['title'],
+            'thumbnail': video_data.get('thumbnail_url', ''),
+            'score': prediction_result['score']
+        })
+        # Keep only the last 5 videos
+        if len(st.session_state.history) > 5:
+            st.session_state.history = st.session_state.history[:5]
+
 # Main logic flow
 if analyze_button and url_input:
-    if not is_shorts_url(url_input):
+    # Validates the URL and extracts the video ID in one pass
+    video_id = extract_video_id(url_input)
+    if video_id is None:
         show_error("Invalid URL. Please enter a valid YouTube Shorts URL.")
     else:
-        with st.spinner("Analyzing video..."):
-            try:
-                # Extract video ID
-                video_id = extract_video_id(url_input)
-                
-                # Fetch video data
-                video_data = get_video_data(video_id)
-                
-                if not video_data:
-                    show_error("Could not retrieve video data. Please check the URL and try again.")
-                else:
-                    # Process video data
-                    processed_data = process_video_data(video_data)
+        # Spans are only recorded when the debug panel or TRACING_ENABLED is on
+        with tracing.trace("analyze_video", enabled=show_timings or None, video_id=video_id) as run_trace:
+            with st.spinner("Analyzing video..."):
+                try:
+                    # Get prediction from the configured scorer (ENGAGEMENT_SCORER=rules|model)
+                    analysis = build_analysis_pipeline(load_engagement_scorer())
                     
-                    # Extract features for prediction
-                    features = extract_features(processed_data)
+                    # Each tab is filled in as soon as the stages it needs are done,
+                    # so the video analysis shows before the trending fetch finishes
+                    views = [
+                        (("processed_data", "prediction"), render_video_analysis),
+                        (("processed_data", "trending_videos"), render_trend_comparison),
+                        (("processed_data", "trending_videos"), render_similar_shorts),
+                        (("processed_data", "trending_videos"), render_tag_insights),
+                        (("processed_data", "prediction"), render_recommendations),
+                    ]
+                    placeholders = None
+                    rendered = set()
+                    results = {}
                     
-                    # Get prediction
-                    prediction_result = predict_engagement(features)
+                    for stage_name, result in analysis.run({'video_id': video_id}):
+                        results[stage_name] = result
+                        
+                        if stage_name == 'prediction':
+                            add_to_history(video_id, results['video_data'], result)
+                        
+                        if placeholders is None and 'processed_data' in results:
+                            # Display results in tabs
+                            tabs = st.tabs(["Video Analysis", "Trend Comparison", "Similar Shorts", "Tag Insights", "Recommendations"])
+                            placeholders = [tab.empty() for tab in tabs]
+                            for placeholder in placeholders:
+                                placeholder.info("Loading...")
+                        
+                        for i, (requires, render) in enumerate(views):
+                            if i not in rendered and placeholders is not None and all(name in results for name in requires):
+                                rendered.add(i)
+                                with placeholders[i].container(), tracing.span(render.__name__):
+                                    render(results)
                     
-                    # Get trending videos for comparison
-                    trending_videos = get_trending_shorts()
-                    
-                    # Add to history if not already there
-                    if video_id not in [item['video_id'] for item in st.session_state.history]:
-                        st.session_state.history.insert(0, {
-                            'video_id': video_id,
-                            'title': video_data['title'],
-                            'thumbnail': video_data.get('thumbnail_url', ''),
-                            'score': prediction_result['score']
-                        })
-                        # Keep only the last 5 videos
-                        if len(st.session_state.history) > 5:
-                            st.session_state.history = st.session_state.history[:5]
-                    
-                    # Display results in tabs
-                    tabs = st.tabs(["Video Analysis", "Trend Comparison", "Recommendations"])
-                    
-                    with tabs[0]:
-                        display_video_info(processed_data)
-                        st.markdown("---")
-                        display_engagement_metrics(processed_data, prediction_result)
-                    
-                    with tabs[1]:
-                        display_trending_comparison(processed_data, trending_videos)
-                    
-                    with tabs[2]:
-                        display_recommendations(processed_data, prediction_result)
-                    
-            except Exception as e:
-                show_error(f"An error occurred during analysis: {str(e)}")
+                except StageFailedError as e:
+                    tracing.record_error(str(e))
+                    if isinstance(e.error, VideoNotFoundError):
+                        show_error("Could not retrieve video data. Please check the URL and try again.")
+                    else:
+                        show_error(f"An error occurred during analysis: {str(e.error)}")
+                except Exception as e:
+                    tracing.record_error(str(e))
+                    show_error(f"An error occurred during analysis: {str(e)}")
+        
+        if run_trace is not None and show_timings:
+            display_trace(run_trace)
 
 # Display history
 if st.session_state.history:
@@ -318,7 +523,7 @@ if st.session_state.history:
         if i < len(history_cols):
             with history_cols[i]:
                 if item.get('thumbnail'):
-                    st.image(item['thumbnail'], use_column_width=True)
+                    st.image(thumbnail(item['thumbnail'], HISTORY_WIDTH), width=HISTORY_WIDTH)
                 st.write(f"**{item['title'][:50]}**{'...' if len(item['title']) > 50 else ''}")
                 st.write(f"Score: {item['score']*100:.1f}%")
 
@@ -0,0 +1,261 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+
+import aiohttp
+
+import tracing
+from quota import INTERACTIVE, get_quota_scheduler
+from youtube_api import (
+    MAX_IDS_PER_REQUEST,
+    SEARCH_FIELDS,
+    VIDEO_FIELDS,
+    build_trending_entry,
+    build_video_data,
+    is_shorts,
+)
+
+DEFAULT_BASE_URL = "https://www.googleapis.com/youtube/v3"
+
+class YouTubeAPIError(Exception):
+    """Error response from the YouTube Data API."""
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+class AsyncYouTubeClient:
+    """
+    Async YouTube Data API v3 client built on aiohttp
+
+    All requests share one ClientSession, so connections are kept alive and
+    reused, and at most max_concurrency requests are in flight at a time.
+    Use it as an async context manager:
+
+        async with AsyncYouTubeClient() as youtube:
+            response = await youtube.videos.list(part="snippet", id="...")
+
+    Cancelling a task that awaits a request aborts the request and releases
+    its concurrency slot. Every request goes through a quota.QuotaScheduler,
+    the shared one unless another is passed in.
+    """
+    def __init__(self, api_key=None, base_url=None, max_concurrency=10, timeout=30, session=None, scheduler=None):
+        self.api_key = api_key if api_key is not None else os.getenv("YOUTUBE_API_KEY", "")
+        if not self.api_key:
+            raise ValueError("YouTube API key not found. Please set the YOUTUBE_API_KEY environment variable.")
+        self.base_url = (base_url or os.getenv("YOUTUBE_API_BASE_URL", DEFAULT_BASE_URL)).rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.scheduler = scheduler or get_quota_scheduler()
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session = session
+        self._owns_session = session is None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        self.videos = _Endpoint(self, "videos")
+        self.search = _Endpoint(self, "search")
+        self.playlist_items = _Endpoint(self, "playlistItems")
+        self.comment_threads = _Endpoint(self, "commentThreads")
+
+    async def __aenter__(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                timeout=self.timeout,
+                headers={"Accept-Encoding": "gzip"},
+            )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Close the underlying session if this client created it."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def request(self, resource, params, priority=INTERACTIVE):
+        """
+        GET a YouTube Data API resource
+
+        Args:
+            resource (str): Resource path, e.g. "videos"
+            params (dict): Query parameters; None values are dropped
+            priority (int): quota.INTERACTIVE or quota.BACKGROUND
+
+        Returns:
+            dict: Decoded JSON response
+        """
+        if self._session is None:
+            raise RuntimeError("AsyncYouTubeClient must be used inside 'async with'")
+
+        query = {key: str(value) for key, value in params.items() if value is not None}
+        query["key"] = self.api_key
+
+        async def call():
+            async with self._semaphore:
+                async with self._session.get(f"{self.base_url}/{resource}", params=query) as response:
+                    if response.status >= 400:
+                        raise YouTubeAPIError(response.status, await _error_message(response))
+                    body = await response.read()
+                    tracing.record('payload_bytes', len(body))
+                    return json.loads(body)
+
+        return await self.scheduler.execute_async(f"{resource}.list", call, priority)
+
+    async def fetch_videos(self, video_ids, priority=INTERACTIVE):
+        """
+        Fetch raw video resources for many IDs, 50 per request, concurrently
+
+        Args:
+            video_ids (list): YouTube video IDs
+            priority (int): quota.INTERACTIVE or quota.BACKGROUND
+
+        Returns:
+            dict: Video resources keyed by video ID, for videos that exist
+        """
+        unique_ids = list(dict.fromkeys(video_ids))
+        chunks = [
+            unique_ids[i:i + MAX_IDS_PER_REQUEST]
+            for i in range(0, len(unique_ids), MAX_IDS_PER_REQUEST)
+        ]
+        responses = await asyncio.gather(*[
+            self.videos.list(
+                part="snippet,statistics,contentDetails",
+                id=",".join(chunk),
+                maxResults=MAX_IDS_PER_REQUEST,
+                fields=VIDEO_FIELDS,
+                priority=priority,
+            )
+            for chunk in chunks
+        ])
+        return {
+            item['id']: item
+            for response in responses
+            for item in response.get('items', [])
+        }
+
+class _Endpoint:
+    """One API resource, exposing list() like googleapiclient does."""
+    def __init__(self, client, resource):
+        self._client = client
+        self._resource = resource
+
+    async def list(self, priority=INTERACTIVE, **params):
+        return await self._client.request(self._resource, params, priority)
+
+async def _error_message(response):
+    try:
+        body = await response.json(content_type=None)
+        return body['error']['message']
+    except Exception:
+        return response.reason or "Unknown error"
+
+async def async_get_video_data(video_id, client=None):
+    """
+    Async counterpart of youtube_api.get_video_data
+
+    Args:
+        video_id (str): The YouTube video ID
+        client (AsyncYouTubeClient): Open client to reuse; a temporary one is
+            created if omitted
+
+    Returns:
+        dict: Video metadata, or None if the video does not exist
+    """
+    if client is None:
+        async with AsyncYouTubeClient() as client:
+            return await async_get_video_data(video_id, client)
+
+    items = await client.fetch_videos([video_id])
+    return build_video_data(items[video_id]) if video_id in items else None
+
+async def async_get_trending_shorts(max_results=20, region_code=None, language="en", window_days=14, client=None):
+    """
+    Async counterpart of youtube_api.get_trending_shorts, without the cache
+
+    Args:
+        max_results (int): Maximum number of results to return
+        region_code (str): ISO 3166-1 alpha-2 region to search in, or None
+        language (str): Relevance language for the search
+        window_days (int): Only consider videos published in the last N days
+        client (AsyncYouTubeClient): Open client to reuse; a temporary one is
+            created if omitted
+
+    Returns:
+        list: List of video metadata
+    """
+    if client is None:
+        async with AsyncYouTubeClient() as client:
+            return await async_get_trending_shorts(max_results, region_code, language, window_days, client)
+
+    search_response = await client.search.list(
+        part="id",
+        fields=SEARCH_FIELDS,
+        maxResults=max_results * 2,  # Fetch more to filter down to actual shorts
+        type="video",
+        videoDuration="short",
+        order="viewCount",
+        publishedAfter=(datetime.now() - timedelta(days=window_days)).isoformat() + "Z",
+        relevanceLanguage=language,
+        regionCode=region_code,
+    )
+    video_ids = [item['id']['videoId'] for item in search_response.get('items', [])]
+    if not video_ids:
+        return []
+
+    items = await client.fetch_videos(video_ids)
+
+    shorts_data = []
+    for video in (items[video_id] for video_id in video_ids if video_id in items):
+        if is_shorts(video) and len(shorts_data) < max_results:
+            shorts_data.append(build_trending_entry(video))
+
+    return shorts_data
+
+def get_video_data(video_id):
+    """
+    Fetch metadata for a specific YouTube video through the async client
+
+    Same signature and error handling as youtube_api.get_video_data.
+
+    Args:
+        video_id (str): The YouTube video ID
+
+    Returns:
+        dict: Video metadata
+    """
+    try:
+        return asyncio.run(async_get_video_data(video_id))
+    except YouTubeAPIError as e:
+        print(f"HTTP Error: {e}")
+        return None
+    except Exception as e:
+        print(f"Error fetching video data: {e}")
+        return None
+
+def get_trending_shorts(max_results=20, region_code=None, language="en", window_days=14):
+    """
+    Fetch metadata for trending YouTube Shorts through the async client
+
+    Same signature and error handling as youtube_api.get_trending_shorts,
+    minus the shared cache.
+
+    Args:
+        max_results (int): Maximum number of results to return
+        region_code (str): ISO 3166-1 alpha-2 region to search in, or None
+        language (str): Relevance language for the search
+        window_days (int): Only consider videos published in the last N days
+
+    Returns:
+        list: List of video metadata
+    """
+    try:
+        return asyncio.run(async_get_trending_shorts(max_results, region_code, language, window_days))
+    except YouTubeAPIError as e:
+        print(f"HTTP Error when fetching trending shorts: {e}")
+        return []
+    except Exception as e:
+        print(f"Error fetching trending shorts: {e}")
+        return []
@@ -0,0 +1,55 @@
+"""
+Throughput benchmark for the async YouTube client
+
+Starts the local fake API (fake_api.py) with a fixed response latency and
+measures requests/sec of AsyncYouTubeClient at several concurrency levels.
+
+    python benchmarks/async_throughput.py --latency-ms 50 --requests 500
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from async_youtube_api import AsyncYouTubeClient
+from fake_api import FakeYouTubeAPI, start_fake_api, synthetic_items
+from quota import QuotaScheduler
+
+CORPUS_SIZE = 1000
+
+async def measure(base_url, concurrency, n_requests):
+    # Unlimited quota and rate so only the client itself is measured
+    scheduler = QuotaScheduler(daily_budget=float('inf'), rate=float('inf'), burst=float('inf'))
+    async with AsyncYouTubeClient(api_key="benchmark", base_url=base_url, max_concurrency=concurrency,
+                                  scheduler=scheduler) as youtube:
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            youtube.videos.list(part="snippet", id=f"{i % CORPUS_SIZE:011d}")
+            for i in range(n_requests)
+        ])
+        return n_requests / (time.perf_counter() - start)
+
+async def run(latency, n_requests, levels):
+    runner, base_url = await start_fake_api(FakeYouTubeAPI(synthetic_items(CORPUS_SIZE), latency=latency))
+    try:
+        for concurrency in levels:
+            rate = await measure(base_url, concurrency, n_requests)
+            print(f"concurrency {concurrency:4d}: {rate:9.1f} requests/sec")
+    finally:
+        await runner.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure AsyncYouTubeClient throughput against a local fake API")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Simulated server latency per request")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+    
+    asyncio.run(run(args.latency_ms / 1000, args.requests, args.concurrency))
+
+if __name__ == "__main__":
+    main()
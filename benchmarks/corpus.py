@@ -0,0 +1,92 @@
+"""
+Synthetic YouTube Shorts corpus for benchmarks
+
+Generates videos().list items with realistic titles (emoji, questions,
+numbers, hashtags), tags, durations, publish times and heavy-tailed counts.
+Generation is seeded, so every run sees the same corpus.
+"""
+import random
+from datetime import datetime, timedelta
+
+WORDS = [
+    "how", "to", "make", "the", "best", "easy", "recipe", "life", "hack", "you",
+    "need", "try", "this", "insane", "trick", "wait", "for", "it", "funny", "cat",
+    "dog", "prank", "challenge", "workout", "morning", "routine", "tips", "day",
+    "in", "my", "vlog", "asmr", "satisfying", "gaming", "minecraft", "football",
+    "goal", "skills", "dance", "trend", "makeup", "tutorial", "diy", "hacks",
+]
+EMOJI = ["🔥", "😂", "😱", "💯", "🤯", "❤️", "✨", "👀", "🎉", "😍", "🙌", "⚽"]
+HASHTAGS = ["#shorts", "#viral", "#fyp", "#trending", "#funny", "#tutorial"]
+DURATIONS = ["PT7S", "PT15S", "PT22S", "PT30S", "PT45S", "PT58S", "PT59S", "PT1M", "PT1M15S", "PT3M2S"]
+EPOCH = datetime(2026, 1, 1)
+
+def make_title(rng):
+    words = rng.choices(WORDS, k=rng.randint(2, 10))
+    if rng.random() < 0.3:
+        words.insert(rng.randrange(len(words) + 1), str(rng.randint(1, 100)))
+    title = " ".join(words).capitalize()
+    if rng.random() < 0.25:
+        title += "?"
+    elif rng.random() < 0.35:
+        title += "!"
+    for _ in range(rng.choice([0, 0, 1, 1, 2, 3])):
+        title += " " + rng.choice(EMOJI)
+    if rng.random() < 0.5:
+        title += " " + rng.choice(HASHTAGS)
+    return title
+
+def make_api_item(i, rng):
+    """
+    Build one videos().list item
+    
+    Args:
+        i (int): Index, used to derive a unique 11-character video ID
+        rng (random.Random): Random source
+        
+    Returns:
+        dict: Video resource as returned by the YouTube API
+    """
+    views = int(rng.lognormvariate(9, 2.5))
+    published = EPOCH + timedelta(seconds=rng.randint(0, 280 * 86400))
+    tags = rng.sample(WORDS, rng.choice([0, 0, 2, 5, 8, 12]))
+    description = " ".join(rng.choices(WORDS, k=rng.randint(0, 30)))
+    if rng.random() < 0.4:
+        description += " " + rng.choice(HASHTAGS)
+    return {
+        'id': f"{i:011d}"[-11:],
+        'etag': f"etag{i}",
+        'snippet': {
+            'title': make_title(rng),
+            'description': description,
+            'publishedAt': published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            'channelId': f"UC{rng.randint(0, 5000):022d}",
+            'channelTitle': f"Channel {rng.randint(0, 5000)}",
+            'tags': tags,
+            'categoryId': str(rng.choice([1, 10, 17, 20, 22, 23, 24, 26])),
+            'thumbnails': {
+                'default': {'url': f"https://i.ytimg.com/vi/{i:011d}/default.jpg"},
+                'high': {'url': f"https://i.ytimg.com/vi/{i:011d}/hqdefault.jpg"},
+            },
+        },
+        'contentDetails': {'duration': rng.choice(DURATIONS)},
+        'statistics': {
+            'viewCount': str(views),
+            'likeCount': str(int(views * rng.uniform(0.005, 0.15))),
+            'commentCount': str(int(views * rng.uniform(0, 0.02))),
+        },
+    }
+
+def iter_api_items(n, seed=0):
+    """
+    Yield n synthetic videos().list items
+    
+    Args:
+        n (int): Number of items
+        seed (int): Random seed
+        
+    Yields:
+        dict: Video resource
+    """
+    rng = random.Random(seed)
+    for i in range(n):
+        yield make_api_item(i, rng)
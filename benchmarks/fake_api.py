@@ -0,0 +1,322 @@
+"""
+Local stand-in for the YouTube Data API v3
+
+Serves videos, search, playlistItems and commentThreads from a synthetic
+corpus (see corpus.py) or from recorded videos().list items, with
+configurable latency, 5xx/429 error rates and a daily quota after which
+every call gets the API's 403 quotaExceeded error. Search, playlist and
+comment responses are paginated with nextPageToken like the real API, and
+single-video requests honour If-None-Match. Quota units charged and
+requests per endpoint are served as JSON from /_stats.
+
+Point the app at it with YOUTUBE_API_BASE_URL:
+
+    python benchmarks/fake_api.py --port 8080 --latency-ms 80 --error-rate 0.01
+    YOUTUBE_API_BASE_URL=http://127.0.0.1:8080/youtube/v3 YOUTUBE_API_KEY=fake streamlit run app.py
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+from datetime import datetime
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import iter_api_items
+from quota import DEFAULT_COST, ENDPOINT_COSTS
+
+API_PREFIX = "/youtube/v3"
+PUBLISHED_AT_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+COMMENTS_PER_VIDEO_CAP = 500
+
+class FakeYouTubeAPI:
+    """
+    In-memory YouTube Data API with failure injection
+
+    Args:
+        items (list): videos().list items to serve
+        latency (float): Seconds added to every response
+        jitter (float): Extra uniform random latency, in seconds
+        error_rate (float): Fraction of calls answered with a 503
+        throttle_rate (float): Fraction of calls answered with a 429
+        daily_quota (int): Units after which calls get 403 quotaExceeded;
+            None for no limit
+        seed (int): Random seed for latency jitter and failures
+    """
+    def __init__(self, items, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0,
+                 daily_quota=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.daily_quota = daily_quota
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.videos = {item['id']: item for item in items}
+        # Search results ordered like order=viewCount
+        self._by_views = sorted(
+            self.videos.values(), key=lambda item: -int(item['statistics'].get('viewCount', 0))
+        )
+        self._uploads = {}
+        for item in self.videos.values():
+            self._uploads.setdefault("UU" + item['snippet']['channelId'][2:], []).append(item)
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {'requests': {}, 'units': 0, 'errors': {}}
+
+    def application(self):
+        """Return the aiohttp application serving the API."""
+        app = web.Application()
+        for resource, handler in [
+            ('videos', self.handle_videos),
+            ('search', self.handle_search),
+            ('playlistItems', self.handle_playlist_items),
+            ('commentThreads', self.handle_comment_threads),
+        ]:
+            app.router.add_get(f"{API_PREFIX}/{resource}", self._wrap(resource, handler))
+        app.router.add_get("/_stats", self.handle_stats)
+        app.router.add_post("/_reset", self.handle_reset)
+        return app
+
+    def _wrap(self, resource, handler):
+        endpoint = f"{resource}.list"
+        cost = ENDPOINT_COSTS.get(endpoint, DEFAULT_COST)
+
+        async def wrapped(request):
+            with self._lock:
+                self.stats['requests'][endpoint] = self.stats['requests'].get(endpoint, 0) + 1
+                over_quota = self.daily_quota is not None and self.stats['units'] + cost > self.daily_quota
+                if not over_quota:
+                    # The real API charges failed calls too
+                    self.stats['units'] += cost
+                roll = self._rng.random()
+                delay = self.latency + self._rng.random() * self.jitter
+
+            if delay:
+                await asyncio.sleep(delay)
+            if over_quota:
+                return self._error(403, "quotaExceeded", "The request cannot be completed because you have exceeded your quota.")
+            if roll < self.error_rate:
+                return self._error(503, "backendError", "Backend Error")
+            if roll < self.error_rate + self.throttle_rate:
+                return self._error(429, "rateLimitExceeded", "Too many requests")
+            return handler(request)
+        return wrapped
+
+    def _error(self, status, reason, message):
+        with self._lock:
+            self.stats['errors'][reason] = self.stats['errors'].get(reason, 0) + 1
+        return web.json_response(
+            {'error': {'code': status, 'message': message, 'errors': [{'reason': reason, 'domain': 'youtube.quota' if status == 403 else 'global'}]}},
+            status=status,
+        )
+
+    def handle_videos(self, request):
+        parts = set(request.query.get('part', 'snippet').split(','))
+        ids = [video_id for video_id in request.query.get('id', '').split(',') if video_id]
+        items = [_select_parts(self.videos[video_id], parts) for video_id in ids if video_id in self.videos]
+
+        etag = items[0].get('etag') if len(ids) == 1 and items else None
+        etag = etag or f"list-{hash(tuple(ids)) & 0xffffffff:08x}"
+        if len(ids) == 1 and request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304)
+        return _json({'kind': 'youtube#videoListResponse', 'etag': etag, 'items': items})
+
+    def handle_search(self, request):
+        query = request.query
+        published_after = _parse_time(query.get('publishedAfter'))
+        published_before = _parse_time(query.get('publishedBefore'))
+        matches = [
+            item for item in self._by_views
+            if (published_after is None or item['_published'] >= published_after)
+            and (published_before is None or item['_published'] < published_before)
+        ]
+        page, next_token = _paginate(matches, query)
+        return _json({
+            'kind': 'youtube#searchListResponse',
+            'items': [{'id': {'kind': 'youtube#video', 'videoId': item['id']}} for item in page],
+            'pageInfo': {'totalResults': len(matches), 'resultsPerPage': len(page)},
+            **({'nextPageToken': next_token} if next_token else {}),
+        })
+
+    def handle_playlist_items(self, request):
+        uploads = self._uploads.get(request.query.get('playlistId', ''), [])
+        page, next_token = _paginate(uploads, request.query)
+        return _json({
+            'kind': 'youtube#playlistItemListResponse',
+            'items': [
+                {
+                    'snippet': {'title': item['snippet']['title'], 'publishedAt': item['snippet']['publishedAt']},
+                    'contentDetails': {'videoId': item['id']},
+                }
+                for item in page
+            ],
+            **({'nextPageToken': next_token} if next_token else {}),
+        })
+
+    def handle_comment_threads(self, request):
+        video_id = request.query.get('videoId', '')
+        if video_id not in self.videos:
+            return self._error(404, "videoNotFound", "The video identified by the videoId parameter could not be found.")
+        count = min(COMMENTS_PER_VIDEO_CAP, int(self.videos[video_id]['statistics'].get('commentCount', 0)))
+        page, next_token = _paginate(range(count), request.query, default_page=20, max_page=100)
+        return _json({
+            'kind': 'youtube#commentThreadListResponse',
+            'items': [
+                {
+                    'id': f"{video_id}-c{i}",
+                    'snippet': {'videoId': video_id, 'topLevelComment': {'snippet': {'textDisplay': f"Comment {i}", 'likeCount': i % 7}}},
+                }
+                for i in page
+            ],
+            **({'nextPageToken': next_token} if next_token else {}),
+        })
+
+    async def handle_stats(self, request):
+        with self._lock:
+            stats = {
+                'requests': dict(self.stats['requests']),
+                'units': self.stats['units'],
+                'errors': dict(self.stats['errors']),
+            }
+        return web.json_response(stats)
+
+    async def handle_reset(self, request):
+        self.reset_stats()
+        return web.json_response({})
+
+def _select_parts(item, parts):
+    return {key: value for key, value in item.items() if key in ('id', 'etag') or key in parts}
+
+def _paginate(sequence, query, default_page=5, max_page=50):
+    size = max(1, min(max_page, int(query.get('maxResults', default_page))))
+    start = int(query.get('pageToken') or 0)
+    page = sequence[start:start + size]
+    return page, str(start + size) if start + size < len(sequence) else None
+
+def _parse_time(value):
+    if not value:
+        return None
+    return datetime.fromisoformat(value.rstrip("Z"))
+
+def _json(body):
+    return web.Response(text=json.dumps(body), content_type="application/json")
+
+def synthetic_items(n, seed=0, now=None):
+    """
+    Synthetic corpus with publish times shifted to end at now
+
+    Args:
+        n (int): Number of videos
+        seed (int): Random seed
+        now (datetime): Latest publish time; defaults to the current time
+
+    Returns:
+        list: videos().list items
+    """
+    items = list(iter_api_items(n, seed))
+    return shift_to_now(items, now)
+
+def shift_to_now(items, now=None):
+    """Move publish times so the newest item was published at now, keeping gaps."""
+    published = [datetime.strptime(item['snippet']['publishedAt'], PUBLISHED_AT_FORMAT) for item in items]
+    shift = (now or datetime.utcnow()) - max(published, default=datetime.utcnow())
+    for item, when in zip(items, published):
+        item['_published'] = when + shift
+        item['snippet']['publishedAt'] = item['_published'].strftime(PUBLISHED_AT_FORMAT)
+    return items
+
+def load_recorded_items(path):
+    """
+    Load recorded videos().list items, one JSON object per line
+
+    Args:
+        path (str): JSONL file
+
+    Returns:
+        list: videos().list items
+    """
+    with open(path, encoding="utf-8") as f:
+        return shift_to_now([json.loads(line) for line in f if line.strip()])
+
+async def start_fake_api(api, host="127.0.0.1", port=0):
+    """
+    Serve api on the running event loop
+
+    Returns:
+        tuple: (runner, base_url); base_url is what YOUTUBE_API_BASE_URL
+            expects. Call runner.cleanup() to stop.
+    """
+    runner = web.AppRunner(api.application())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}{API_PREFIX}"
+
+def start_fake_api_thread(api, host="127.0.0.1", port=0):
+    """
+    Serve api from a background thread with its own event loop
+
+    For driving the synchronous client from the same process.
+
+    Returns:
+        str: Base URL for YOUTUBE_API_BASE_URL
+    """
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    result = {}
+
+    def serve():
+        asyncio.set_event_loop(loop)
+        result['runner'], result['base_url'] = loop.run_until_complete(start_fake_api(api, host, port))
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    started.wait()
+    return result['base_url']
+
+def build_api(args):
+    items = load_recorded_items(args.recorded) if args.recorded else synthetic_items(args.videos, args.seed)
+    return FakeYouTubeAPI(
+        items,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        daily_quota=args.daily_quota,
+        seed=args.seed,
+    )
+
+def add_api_arguments(parser):
+    parser.add_argument("--videos", type=int, default=10000, help="Synthetic corpus size")
+    parser.add_argument("--recorded", default=None, help="JSONL of recorded videos().list items to serve instead")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls failing with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of calls failing with 429")
+    parser.add_argument("--daily-quota", type=int, default=None, help="Units before 403 quotaExceeded")
+    parser.add_argument("--seed", type=int, default=0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake YouTube Data API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    add_api_arguments(parser)
+    args = parser.parse_args()
+
+    api = build_api(args)
+    print(f"Serving {len(api.videos)} videos at http://{args.host}:{args.port}{API_PREFIX}")
+    web.run_app(api.application(), host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+End-to-end load test of the fetch path against the local fake API
+
+Runs N concurrent sessions, each repeatedly analyzing a video through the
+app's analysis pipeline and/or fetching a batch of videos the way
+bulk_analyze.py does, against benchmarks/fake_api.py. Reports p50/p95/p99
+latency, throughput and the quota units the fake API charged per
+operation. No real quota is used.
+
+    python benchmarks/load_test.py --sessions 16 --iterations 25 --latency-ms 80
+    python benchmarks/load_test.py --scenario batch --batch-size 500 --error-rate 0.02
+    python benchmarks/load_test.py --url http://127.0.0.1:8080/youtube/v3   # external fake_api.py
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_api import add_api_arguments, build_api, start_fake_api_thread
+
+def fetch_stats(base_url):
+    root = base_url.rsplit("/youtube/v3", 1)[0]
+    with urllib.request.urlopen(f"{root}/_stats") as response:
+        return json.load(response)
+
+def run_session(session, args, video_ids, results):
+    # Imported after main() has pointed the client at the fake API
+    from model import get_engagement_scorer
+    from pipeline import build_analysis_pipeline
+    from youtube_api import get_videos_data
+
+    rng = random.Random(args.seed * 1000 + session)
+    analysis = build_analysis_pipeline(get_engagement_scorer())
+    for _ in range(args.iterations):
+        scenario = args.scenario if args.scenario != "mixed" else rng.choice(["analyze", "batch"])
+        start = time.perf_counter()
+        ok = True
+        try:
+            if scenario == "analyze":
+                for _ in analysis.run({'video_id': rng.choice(video_ids)}):
+                    pass
+            else:
+                _, missing = get_videos_data(rng.sample(video_ids, min(args.batch_size, len(video_ids))))
+                ok = not missing
+        except Exception:
+            ok = False
+        results.append((scenario, time.perf_counter() - start, ok))
+
+def report(results, elapsed, units):
+    print(f"{'scenario':10s} {'ops':>6s} {'errors':>6s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'ops/sec':>9s}")
+    summary = {}
+    for scenario in sorted({scenario for scenario, _, _ in results}):
+        latencies = np.array([seconds for name, seconds, _ in results if name == scenario]) * 1000
+        errors = sum(1 for name, _, ok in results if name == scenario and not ok)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary[scenario] = {
+            'operations': len(latencies),
+            'errors': errors,
+            'p50_ms': p50,
+            'p95_ms': p95,
+            'p99_ms': p99,
+            'ops_per_sec': len(latencies) / elapsed,
+        }
+        print(f"{scenario:10s} {len(latencies):6d} {errors:6d} {p50:9.1f} {p95:9.1f} {p99:9.1f} {len(latencies) / elapsed:9.1f}")
+
+    units_used = units['units']
+    print(f"\n{len(results)} operations in {elapsed:.1f}s, {units_used} quota units "
+          f"({units_used / max(1, len(results)):.2f} per operation)")
+    print(f"API calls: {units['requests']}  errors: {units['errors'] or 'none'}")
+    return {
+        'scenarios': summary,
+        'elapsed_seconds': elapsed,
+        'quota_units': units_used,
+        'quota_units_per_operation': units_used / max(1, len(results)),
+        'api_calls': units['requests'],
+        'api_errors': units['errors'],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the YouTube fetch path against a local fake API")
+    parser.add_argument("--url", default=None, help="Base URL of an already running fake_api.py")
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent simulated sessions")
+    parser.add_argument("--iterations", type=int, default=20, help="Operations per session")
+    parser.add_argument("--scenario", choices=["analyze", "batch", "mixed"], default="analyze")
+    parser.add_argument("--batch-size", type=int, default=200, help="Videos per batch operation")
+    parser.add_argument("--store", action="store_true", help="Use a fresh metadata store instead of none")
+    parser.add_argument("--no-trending-cache", action="store_true", help="Fetch trending Shorts on every analysis")
+    parser.add_argument("--json", default=None, help="Also write the summary to this JSON file")
+    add_api_arguments(parser)
+    args = parser.parse_args()
+
+    api = build_api(args)
+    base_url = args.url or start_fake_api_thread(api)
+
+    # Configure the client before youtube_api is first imported
+    os.environ["YOUTUBE_API_KEY"] = "load-test"
+    os.environ["YOUTUBE_API_BASE_URL"] = base_url
+    os.environ["YOUTUBE_DAILY_QUOTA"] = str(10 ** 12)
+    os.environ["YOUTUBE_API_RATE"] = "inf"
+    os.environ["METADATA_STORE_PATH"] = os.path.join(tempfile.mkdtemp(), "metadata.sqlite3") if args.store else ""
+    # Thumbnail URLs point at the real i.ytimg.com; keep the run offline
+    # and out of the repository's cache
+    os.environ["THUMBNAIL_CACHE_PATH"] = ""
+    if args.no_trending_cache:
+        os.environ["TRENDING_CACHE_TTL"] = "0"
+        os.environ["TRENDING_CACHE_STALE_TTL"] = "0"
+
+    video_ids = list(api.videos)
+    before = fetch_stats(base_url)
+    results = []
+    threads = [
+        threading.Thread(target=run_session, args=(session, args, video_ids, results))
+        for session in range(args.sessions)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    after = fetch_stats(base_url)
+    units = {
+        'units': after['units'] - before['units'],
+        'requests': {endpoint: count - before['requests'].get(endpoint, 0) for endpoint, count in after['requests'].items()},
+        'errors': {reason: count - before['errors'].get(reason, 0) for reason, count in after['errors'].items()},
+    }
+    summary = report(results, elapsed, units)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Memory benchmark for video metadata containers
+
+Compares the resident size of N videos held as the original metadata
+dicts, as VideoRecords and as a column-wise VideoRecordColumns.
+
+    python benchmarks/memory.py --videos 100000
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import iter_api_items
+from video_record import VideoRecordColumns
+from youtube_api import build_video_data
+
+def as_dict(video_info):
+    """The pre-VideoRecord metadata dict: everything kept as API strings."""
+    record = build_video_data(video_info)
+    data = record.to_dict()
+    del data['published'], data['duration_seconds']
+    data['tags'] = list(data['tags'])
+    return data
+
+def measure(build, n):
+    """Bytes still allocated once build's container is all that is left of n items."""
+    gc.collect()
+    tracemalloc.start()
+    items = list(iter_api_items(n))
+    container = build(items)
+    # Whatever the container does not reference is freed with the items
+    del items
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del container
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory use of video metadata containers")
+    parser.add_argument("--videos", type=int, default=100000)
+    args = parser.parse_args()
+    
+    results = {
+        'dicts': measure(lambda items: [as_dict(item) for item in items], args.videos),
+        'VideoRecord': measure(lambda items: [build_video_data(item) for item in items], args.videos),
+        'VideoRecordColumns': measure(lambda items: VideoRecordColumns(build_video_data(item) for item in items), args.videos),
+    }
+    
+    baseline = results['dicts']
+    for name, size in results.items():
+        print(f"{name:20s} {size / 2**20:8.1f} MiB  {size / args.videos:7.0f} B/video  {size / baseline:5.0%} of dicts")
+
+if __name__ == "__main__":
+    main()
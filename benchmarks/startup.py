@@ -0,0 +1,88 @@
+"""
+Startup benchmark: how long does importing app.py take?
+
+Runs `python -X importtime -c "import app"` in a fresh interpreter, reports
+the slowest imports it makes and exits non-zero when the total exceeds the
+budget, so it can gate CI.
+
+    python benchmarks/startup.py --budget-ms 1000
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Import time app.py must stay under, in milliseconds
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1000"))
+
+def measure_import(module="app", runs=3):
+    """
+    Import module in fresh interpreters and collect -X importtime data
+    
+    Args:
+        module (str): Module to import
+        runs (int): Number of interpreters to start; the fastest run is kept
+            to filter out disk-cache noise
+        
+    Returns:
+        tuple: (total_ms, children) where children maps each import made
+            directly by module in the fastest run to its cumulative time in ms
+    """
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            env=dict(os.environ, STREAMLIT_LOG_LEVEL="error"),
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+        
+        total = None
+        children = {}
+        pending = {}
+        for line in result.stderr.splitlines():
+            # "import time:  self [us] | cumulative | imported package"
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            # Nested imports are listed before, and indented under, their parent
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            if depth == 1:
+                pending[name.strip()] = int(cumulative) / 1000
+            elif depth == 0:
+                if name.strip() == module:
+                    total = int(cumulative) / 1000
+                    children = pending
+                pending = {}
+        
+        if total is None:
+            raise RuntimeError(f"No import time reported for {module}")
+        if best is None or total < best[0]:
+            best = (total, children)
+    
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of app.py against a budget")
+    parser.add_argument("--module", default="app", help="Module to import")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list")
+    args = parser.parse_args()
+    
+    total, children = measure_import(args.module, args.runs)
+    
+    print(f"import {args.module}: {total:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for name, ms in sorted(children.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+    
+    if total > args.budget_ms:
+        print("Import time is over budget")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
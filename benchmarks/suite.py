@@ -0,0 +1,333 @@
+"""
+Benchmark suite for the analysis hot paths, with JSON baselines
+
+Every benchmark runs one function over a synthetic corpus (corpus.py) of
+1k, 100k or 1M videos and reports the best-of-N time per item. Results
+are written as JSON; compare checks a run against a saved baseline and
+exits non-zero if any benchmark got slower by more than the threshold.
+
+    python benchmarks/suite.py run --scale 100k --output benchmarks/baselines/100k.json
+    python benchmarks/suite.py run --scale 100k --compare benchmarks/baselines/100k.json --threshold 20
+    python benchmarks/suite.py compare old.json new.json --threshold 20
+    python benchmarks/suite.py list
+
+Baselines are machine-specific: compare runs from the same machine.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timezone
+from functools import cached_property
+from itertools import cycle, islice
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import iter_api_items
+
+SCALES = {'1k': 1000, '100k': 100000, '1m': 1000000}
+# Larger workloads cycle over this many distinct videos to bound memory
+MAX_UNIQUE_VIDEOS = 100000
+URL_TEMPLATES = [
+    "https://www.youtube.com/shorts/{id}",
+    "https://youtube.com/shorts/{id}?feature=share",
+    "https://www.youtube.com/watch?v={id}&t=3s",
+    "https://youtu.be/{id}?si=Xb3kP0qLm2Zr8YtW",
+    "https://m.youtube.com/shorts/{id}",
+]
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    """
+    Register a benchmark
+
+    The decorated function receives a Workload and returns the zero-argument
+    callable to time; everything it does before returning is untimed setup.
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+class Workload:
+    """Inputs for every benchmark at one scale, built on first use."""
+    def __init__(self, size, seed=0):
+        self.size = size
+        self.seed = seed
+
+    def repeat(self, values):
+        """Cycle values up to the workload size."""
+        return list(islice(cycle(values), self.size))
+
+    @cached_property
+    def api_items(self):
+        return list(iter_api_items(min(self.size, MAX_UNIQUE_VIDEOS), self.seed))
+
+    @cached_property
+    def urls(self):
+        return self.repeat([
+            URL_TEMPLATES[i % len(URL_TEMPLATES)].format(id=item['id'])
+            for i, item in enumerate(self.api_items)
+        ])
+
+    @cached_property
+    def records(self):
+        from youtube_api import build_video_data
+        return [build_video_data(item) for item in self.api_items]
+
+    @cached_property
+    def raw_videos(self):
+        # Metadata dicts as the API layer used to return them, without the
+        # parsed fields VideoRecords carry, so both feature paths parse
+        parsed = ('published', 'duration_seconds')
+        return [{k: v for k, v in record.to_dict().items() if k not in parsed} for record in self.records]
+
+    @cached_property
+    def video_frame(self):
+        import pandas as pd
+        return pd.DataFrame(self.repeat(self.raw_videos))
+
+    @cached_property
+    def processed(self):
+        from data_processor import process_video_data
+        return [process_video_data(record) for record in self.records]
+
+    @cached_property
+    def features(self):
+        from data_processor import extract_features
+        return [extract_features(processed) for processed in self.processed]
+
+    @cached_property
+    def feature_matrix(self):
+        from data_processor import FEATURE_COLUMNS
+        unique = np.array([[features[column] for column in FEATURE_COLUMNS] for features in self.features])
+        return np.resize(unique, (self.size, unique.shape[1]))
+
+    @cached_property
+    def trending(self):
+        return self.repeat([
+            {
+                'video_id': record.video_id,
+                'view_count': record.view_count,
+                'like_count': record.like_count,
+                'comment_count': record.comment_count,
+            }
+            for record in self.records
+        ])
+
+@benchmark("utils.extract_video_id")
+def bench_extract_video_id(workload):
+    from utils import extract_video_id
+    urls = workload.urls
+    return lambda: [extract_video_id(url) for url in urls]
+
+@benchmark("youtube_api.is_shorts")
+def bench_is_shorts(workload):
+    from youtube_api import is_shorts
+    items = workload.repeat(workload.api_items)
+    return lambda: [is_shorts(item) for item in items]
+
+@benchmark("youtube_api.build_video_data")
+def bench_build_video_data(workload):
+    from youtube_api import build_video_data
+    items = workload.repeat(workload.api_items)
+    return lambda: [build_video_data(item) for item in items]
+
+@benchmark("data_processor.process_video_data")
+def bench_process_video_data(workload):
+    from data_processor import process_video_data
+    from text_features import title_features
+    records = workload.repeat(workload.records)
+
+    def run():
+        # Measure title processing, not the title cache left by setup
+        title_features.cache_clear()
+        return [process_video_data(record) for record in records]
+    return run
+
+@benchmark("data_processor.extract_features")
+def bench_extract_features(workload):
+    from data_processor import extract_features
+    processed = workload.repeat(workload.processed)
+    return lambda: [extract_features(data) for data in processed]
+
+@benchmark("data_processor.features_row_loop")
+def bench_features_row_loop(workload):
+    from data_processor import extract_features, process_video_data
+    videos = workload.repeat(workload.raw_videos)
+    return lambda: [extract_features(process_video_data(video)) for video in videos]
+
+@benchmark("data_processor.features_frame")
+def bench_features_frame(workload):
+    from data_processor import extract_feature_matrix, process_video_frame
+    frame = workload.video_frame
+    return lambda: extract_feature_matrix(process_video_frame(frame))
+
+@benchmark("model.predict_engagement")
+def bench_predict_engagement(workload):
+    from model import predict_engagement
+    features = workload.repeat(workload.features)
+    return lambda: [predict_engagement(data) for data in features]
+
+@benchmark("model.predict_engagement_batch")
+def bench_predict_engagement_batch(workload):
+    from model import predict_engagement_batch
+    X = workload.feature_matrix
+    return lambda: predict_engagement_batch(X)
+
+@benchmark("model.EngagementModel.predict")
+def bench_engagement_model_predict(workload):
+    from model import EngagementModel, predict_engagement_batch
+    X = workload.feature_matrix
+    # Train on the rule scores so the trees have realistic depth
+    train = X[:20000]
+    model = EngagementModel().fit(train, predict_engagement_batch(train)[0])
+    return lambda: model.predict(X)
+
+@benchmark("data_processor.summarize_trending")
+def bench_summarize_trending(workload):
+    from data_processor import summarize_trending
+    trending = workload.trending
+    return lambda: summarize_trending(trending)
+
+def parse_scale(value):
+    value = value.lower()
+    return SCALES[value] if value in SCALES else int(value)
+
+def run_suite(size, repeat=5, pattern=None, seed=0, progress=sys.stderr):
+    """
+    Run the registered benchmarks
+
+    Args:
+        size (int): Items per benchmark
+        repeat (int): Timed runs per benchmark; the fastest is kept
+        pattern (str): Only run benchmarks whose name contains this
+        seed (int): Corpus seed
+        progress (file): Where to report each result, or None
+
+    Returns:
+        dict: JSON-serializable results with machine metadata
+    """
+    workload = Workload(size, seed)
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        timer = timeit.Timer(setup(workload))
+        # Small workloads are looped until a run takes at least 0.2 s
+        number, _ = timer.autorange()
+        seconds = min(timer.repeat(number=number, repeat=repeat)) / number
+        results[name] = {'items': size, 'seconds': seconds, 'ns_per_item': seconds / size * 1e9}
+        if progress:
+            print(f"{name:36s} {results[name]['ns_per_item']:12.1f} ns/item  {size / seconds:12.0f} items/sec", file=progress)
+
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'node': platform.node(),
+            'size': size,
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+def compare(baseline, current, threshold, out=sys.stdout):
+    """
+    Compare two result sets per item
+
+    Args:
+        baseline (dict): Results from run_suite
+        current (dict): Results from run_suite
+        threshold (float): Allowed slowdown in percent
+        out (file): Where to print the comparison table
+
+    Returns:
+        list: Names of benchmarks that regressed past the threshold
+    """
+    if baseline['meta']['size'] != current['meta']['size']:
+        print(f"Warning: comparing size {current['meta']['size']} against a baseline of size {baseline['meta']['size']}", file=out)
+
+    regressions = []
+    print(f"{'benchmark':36s} {'baseline':>12s} {'current':>12s} {'change':>8s}", file=out)
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            print(f"{name:36s} {'-':>12s} {result['ns_per_item']:12.1f} {'new':>8s}", file=out)
+            continue
+        before = baseline['results'][name]['ns_per_item']
+        change = (result['ns_per_item'] / before - 1) * 100
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:36s} {before:12.1f} {result['ns_per_item']:12.1f} {change:+7.1f}%{flag}", file=out)
+    return regressions
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis hot paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite")
+    run_parser.add_argument("--scale", default="100k", help="1k, 100k, 1m or an item count")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--filter", default=None, help="Only run benchmarks whose name contains this")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", default=None, help="Write results (e.g. a new baseline) to this JSON file")
+    run_parser.add_argument("--compare", default=None, help="Baseline JSON to check the results against")
+    run_parser.add_argument("--threshold", type=float, default=20, help="Allowed slowdown in percent")
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=20, help="Allowed slowdown in percent")
+
+    commands.add_parser("list", help="List benchmarks")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        print("\n".join(BENCHMARKS))
+        return
+
+    if args.command == "compare":
+        baseline, current = load_results(args.baseline), load_results(args.current)
+    else:
+        current = run_suite(parse_scale(args.scale), args.repeat, args.filter, args.seed)
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, "w") as f:
+                json.dump(current, f, indent=2)
+        if not args.compare:
+            return
+        baseline = load_results(args.compare)
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:g}%: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold:g}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark the text-feature engine against the original per-call functions
+
+Uses emoji-heavy titles from the synthetic corpus. The legacy functions
+below are the pre-engine implementations, kept here as the baseline.
+
+    python benchmarks/text_engine.py --titles 100000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import iter_api_items
+from text_features import TITLE_CACHE_SIZE, digit_pattern, title_features, title_features_batch
+
+def legacy_emoji_pattern():
+    return re.compile(
+        "["
+        "\U0001F600-\U0001F64F"
+        "\U0001F300-\U0001F5FF"
+        "\U0001F680-\U0001F6FF"
+        "\U0001F700-\U0001F77F"
+        "\U0001F780-\U0001F7FF"
+        "\U0001F800-\U0001F8FF"
+        "\U0001F900-\U0001F9FF"
+        "\U0001FA00-\U0001FA6F"
+        "\U0001FA70-\U0001FAFF"
+        "\U00002702-\U000027B0"
+        "\U000024C2-\U0001F251"
+        "]+", flags=re.UNICODE
+    )
+
+def legacy_title_features(title, description):
+    # What process_video_data and is_shorts did before the engine
+    clean_title = re.sub(r'\s+', ' ', legacy_emoji_pattern().sub(r'', title)).strip()
+    return (
+        clean_title,
+        len(title),
+        len(title.split()),
+        '?' in title,
+        '!' in title,
+        any(char.isdigit() for char in title),
+        bool(legacy_emoji_pattern().search(title)),
+        '#shorts' in description.lower() or '#shorts' in title.lower(),
+    )
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare text-feature extraction speed")
+    parser.add_argument("--titles", type=int, default=100000)
+    args = parser.parse_args()
+
+    items = list(iter_api_items(args.titles))
+    titles = [item['snippet']['title'] for item in items]
+    descriptions = [item['snippet']['description'] for item in items]
+    unique_titles = len(set(titles))
+
+    # Exclude the one-off Unicode scan from the engine timings
+    digit_pattern()
+
+    def legacy():
+        for title, description in zip(titles, descriptions):
+            legacy_title_features(title, description)
+
+    def engine_cold():
+        title_features.cache_clear()
+        for title in titles:
+            title_features(title)
+
+    # Repeated titles, as when the same trending set is analyzed again;
+    # limited to what fits in the cache
+    repeated = titles[:TITLE_CACHE_SIZE // 2] * 2
+
+    def legacy_repeated():
+        for title in repeated:
+            legacy_title_features(title, '')
+
+    def engine_warm():
+        title_features.cache_clear()
+        for title in repeated:
+            title_features(title)
+
+    def engine_batch():
+        title_features.cache_clear()
+        title_features_batch(titles)
+
+    results = [
+        ("legacy functions", timed(legacy)),
+        ("engine, cold cache", timed(engine_cold)),
+        ("engine batch, cold", timed(engine_batch)),
+    ]
+    repeated_results = [
+        ("legacy functions", timed(legacy_repeated)),
+        ("engine, repeats cached", timed(engine_warm)),
+    ]
+
+    print(f"{args.titles} titles ({unique_titles} unique)")
+    report(results, args.titles)
+    print(f"{len(repeated)} titles, each seen twice")
+    report(repeated_results, len(repeated))
+
+def report(results, count):
+    baseline = results[0][1]
+    for name, seconds in results:
+        print(f"{name:22s} {count / seconds:12.0f} titles/sec  {baseline / seconds:6.1f}x")
+
+if __name__ == "__main__":
+    main()
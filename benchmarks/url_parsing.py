@@ -0,0 +1,115 @@
+"""
+Benchmark bulk link-dump parsing: utils.iter_video_ids against the original
+per-line URL functions
+
+Writes a synthetic dump (URLs in every supported form, tracking parameters,
+bare IDs, links inside chat messages, junk lines and ~30% repeats) once,
+then streams it through each parser. The legacy functions below are the
+pre-normalizer implementations, kept here as the baseline; they do not
+understand m., music., /embed/, /live/ or links in free text, so they
+also find fewer IDs.
+
+    python benchmarks/url_parsing.py --lines 10000000
+"""
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import iter_video_ids
+
+ID_ALPHABET = string.ascii_letters + string.digits + "-_"
+URL_TEMPLATES = [
+    "https://www.youtube.com/shorts/{id}",
+    "https://youtube.com/shorts/{id}?feature=share",
+    "https://www.youtube.com/watch?v={id}",
+    "https://www.youtube.com/watch?v={id}&t=12s&pp=ygUGc2hvcnRz",
+    "https://youtu.be/{id}?si=Xb3kP0qLm2Zr8YtW",
+    "https://m.youtube.com/shorts/{id}",
+    "https://music.youtube.com/watch?v={id}&list=RDAMVM{id}",
+    "https://www.youtube.com/embed/{id}",
+    "https://www.youtube.com/live/{id}?si=aB9x",
+    "{id}",
+    "omg watch this https://youtu.be/{id} 😂😂",
+    "source: youtube.com/shorts/{id}, found it on reddit",
+]
+JUNK_LINES = [
+    "",
+    "thanks!",
+    "https://www.tiktok.com/@someone/video/7301234567890123456",
+    "see the spreadsheet tab 2 for the rest of the links",
+]
+
+def legacy_extract_video_id(url):
+    shorts_match = re.match(r'https?://(www\.)?youtube\.com/shorts/([a-zA-Z0-9_-]{11})(\?.*)?$', url)
+    if shorts_match:
+        return shorts_match.group(2)
+    watch_match = re.match(r'https?://(www\.)?youtube\.com/watch\?v=([a-zA-Z0-9_-]{11})(&.*)?$', url)
+    if watch_match:
+        return watch_match.group(2)
+    short_link_match = re.match(r'https?://(www\.)?youtu\.be/([a-zA-Z0-9_-]{11})(\?.*)?$', url)
+    if short_link_match:
+        return short_link_match.group(2)
+    return None
+
+def legacy_iter_video_ids(lines):
+    # What bulk_analyze.parse_video_id plus a seen-set did before
+    seen = set()
+    for line in lines:
+        line = line.strip()
+        video_id = line if re.match(r'^[a-zA-Z0-9_-]{11}$', line) else legacy_extract_video_id(line)
+        if video_id and video_id not in seen:
+            seen.add(video_id)
+            yield video_id
+
+def write_dump(path, lines, seed=0):
+    rng = random.Random(seed)
+    ids = []
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(lines):
+            if rng.random() < 0.05:
+                f.write(rng.choice(JUNK_LINES) + "\n")
+                continue
+            if ids and rng.random() < 0.3:
+                video_id = rng.choice(ids)
+            else:
+                video_id = "".join(rng.choices(ID_ALPHABET, k=11))
+                if len(ids) < 100000:
+                    ids.append(video_id)
+            f.write(rng.choice(URL_TEMPLATES).format(id=video_id) + "\n")
+
+def timed(parser, path):
+    start = time.perf_counter()
+    with open(path, encoding="utf-8") as f:
+        found = sum(1 for _ in parser(f))
+    return time.perf_counter() - start, found
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare link-dump parsing speed")
+    parser.add_argument("--lines", type=int, default=10000000)
+    parser.add_argument("--path", default=None, help="Dump file to write and reuse (default: a temp file)")
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(tempfile.gettempdir(), f"link_dump_{args.lines}.txt")
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        write_dump(path, args.lines)
+        print(f"Wrote {args.lines} lines to {path} in {time.perf_counter() - start:.1f}s")
+
+    results = [
+        ("legacy functions", *timed(legacy_iter_video_ids, path)),
+        ("iter_video_ids", *timed(iter_video_ids, path)),
+    ]
+
+    baseline = results[0][1]
+    for name, seconds, found in results:
+        print(f"{name:18s} {args.lines / seconds:12.0f} lines/sec  {baseline / seconds:5.1f}x  {found} unique IDs")
+
+if __name__ == "__main__":
+    main()
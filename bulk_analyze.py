@@ -0,0 +1,294 @@
+"""
+Analyze many YouTube Shorts from the command line
+
+Reads one URL or video ID per line from a file or stdin, fetches metadata in
+batches, scores videos on a process pool and streams results out as JSONL or
+Parquet. Memory stays bounded by the batch size whatever the input size.
+Progress is checkpointed after every batch, so rerunning the same command
+after a crash resumes where it stopped. With --thumbnails each batch's
+thumbnails are fetched into the dashboard's cache while it is scored.
+
+    python bulk_analyze.py urls.txt -o results.jsonl
+    cat urls.txt | python bulk_analyze.py - -o results_parquet --format parquet
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from itertools import islice
+
+from data_processor import process_video_data, extract_features
+from model import predict_engagement
+from thumbnails import get_thumbnail_cache
+from utils import parse_video_id
+from youtube_api import get_videos_data
+
+# Output columns, in order; also the Parquet schema
+RESULT_FIELDS = [
+    ('input', 'string'),
+    ('video_id', 'string'),
+    ('status', 'string'),
+    ('error', 'string'),
+    ('title', 'string'),
+    ('channel_title', 'string'),
+    ('published_at', 'string'),
+    ('view_count', 'int64'),
+    ('like_count', 'int64'),
+    ('comment_count', 'int64'),
+    ('duration_seconds', 'int64'),
+    ('score', 'float64'),
+    ('key_factors', 'list<string>'),
+]
+
+def score_video(video_data):
+    """
+    Run the analysis pipeline for one video; executed in worker processes
+
+    Args:
+        video_data (dict): Video metadata from youtube_api
+
+    Returns:
+        dict: Result columns derived from the video
+    """
+    processed_data = process_video_data(video_data)
+    features = extract_features(processed_data)
+    prediction_result = predict_engagement(features)
+
+    return {
+        'title': video_data['title'],
+        'channel_title': video_data['channel_title'],
+        'published_at': video_data['published_at'],
+        'view_count': video_data['view_count'],
+        'like_count': video_data['like_count'],
+        'comment_count': video_data['comment_count'],
+        'duration_seconds': processed_data['duration_seconds'],
+        'score': prediction_result['score'],
+        'key_factors': prediction_result['key_factors'],
+    }
+
+def analyze_batch(lines, executor, workers=1, fetch_workers=4, thumbnails=None):
+    """
+    Analyze one batch of input lines
+
+    Args:
+        lines (list): Input lines
+        executor (Executor): Pool to score videos on
+        workers (int): Size of executor, used to split the batch into chunks
+        fetch_workers (int): Concurrent videos().list calls
+        thumbnails (ThumbnailCache): Cache to fetch the batch's thumbnails
+            into while it is scored, or None
+
+    Returns:
+        list: One result dict per non-empty input line, in input order
+    """
+    inputs = [line.strip() for line in lines if line.strip()]
+    video_ids = [parse_video_id(line) for line in inputs]
+
+    videos, missing = get_videos_data([video_id for video_id in video_ids if video_id], max_workers=fetch_workers)
+    pending_thumbnails = thumbnails.prefetch(video['thumbnail_url'] for video in videos) if thumbnails is not None else []
+    chunksize = max(1, len(videos) // (4 * max(1, workers)))
+    scored = dict(zip(
+        (video['video_id'] for video in videos),
+        executor.map(score_video, videos, chunksize=chunksize)
+    ))
+    # Failed thumbnails are simply fetched again when the app shows them
+    wait(pending_thumbnails)
+
+    results = []
+    for line, video_id in zip(inputs, video_ids):
+        result = dict.fromkeys(name for name, _ in RESULT_FIELDS)
+        result['input'] = line
+        result['video_id'] = video_id
+        if video_id is None:
+            result['status'] = 'invalid'
+            result['error'] = "Not a YouTube URL or video ID"
+        elif video_id in scored:
+            result['status'] = 'ok'
+            result.update(scored[video_id])
+        else:
+            result['status'] = 'missing'
+            result['error'] = missing.get(video_id, "Video not found")
+        results.append(result)
+
+    return results
+
+class JSONLWriter:
+    """Appends results to a JSONL file; resumes by truncating to the checkpointed size."""
+    @staticmethod
+    def can_resume(path, checkpoint):
+        """Whether path still holds everything checkpoint says was written."""
+        return os.path.isfile(path) and os.path.getsize(path) >= checkpoint.get('output_bytes', 0)
+
+    def __init__(self, path, checkpoint=None):
+        self.path = path
+        mode = 'r+b' if checkpoint and os.path.exists(path) else 'wb'
+        self._file = open(path, mode)
+        if checkpoint:
+            # Drop anything written after the last checkpoint
+            self._file.truncate(checkpoint.get('output_bytes', 0))
+            self._file.seek(0, os.SEEK_END)
+
+    def write(self, results):
+        self._file.write(''.join(json.dumps(result, ensure_ascii=False) + '\n' for result in results).encode('utf-8'))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def state(self):
+        return {'output_bytes': self._file.tell()}
+
+    def close(self):
+        self._file.close()
+
+class ParquetWriter:
+    """Writes each batch as a numbered part file in an output directory."""
+    @staticmethod
+    def can_resume(path, checkpoint):
+        """Whether path still holds every part checkpoint says was written."""
+        return all(
+            os.path.exists(os.path.join(path, f"part-{part:06d}.parquet"))
+            for part in range(checkpoint.get('parts', 0))
+        )
+
+    def __init__(self, path, checkpoint=None):
+        import pyarrow as pa
+
+        self._pa = pa
+        self.path = path
+        self.schema = pa.schema([
+            (name, pa.list_(pa.string()) if type_name == 'list<string>' else pa.type_for_alias(type_name))
+            for name, type_name in RESULT_FIELDS
+        ])
+        self.parts = checkpoint.get('parts', 0) if checkpoint else 0
+        os.makedirs(path, exist_ok=True)
+        # Remove parts written after the last checkpoint
+        for name in os.listdir(path):
+            match = re.match(r'part-(\d+)\.parquet$', name)
+            if match and int(match.group(1)) >= self.parts:
+                os.remove(os.path.join(path, name))
+
+    def write(self, results):
+        import pyarrow.parquet as pq
+
+        table = self._pa.Table.from_pylist(results, schema=self.schema)
+        part_path = os.path.join(self.path, f"part-{self.parts:06d}.parquet")
+        pq.write_table(table, part_path + ".tmp")
+        os.replace(part_path + ".tmp", part_path)
+        self.parts += 1
+
+    def state(self):
+        return {'parts': self.parts}
+
+    def close(self):
+        pass
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_checkpoint(path, checkpoint):
+    # Write-then-rename so a crash never leaves a torn checkpoint
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+def run(input_file, output_path, output_format="jsonl", batch_size=1000, workers=None,
+        fetch_workers=4, checkpoint_path=None, resume=True, progress=sys.stderr, warm_thumbnails=False):
+    """
+    Stream input lines through the analysis pipeline into output_path
+
+    Args:
+        input_file (file): Text file object with one URL or ID per line
+        output_path (str): JSONL file, or directory of Parquet part files
+        output_format (str): "jsonl" or "parquet"
+        batch_size (int): Lines fetched, scored and written together
+        workers (int): Scoring processes; defaults to the CPU count
+        fetch_workers (int): Concurrent videos().list calls per batch
+        checkpoint_path (str): Checkpoint file; defaults to output_path + ".checkpoint"
+        resume (bool): Continue from an existing checkpoint
+        progress (file): Where to report progress, or None
+        warm_thumbnails (bool): Also cache every video's thumbnail for the app
+
+    Returns:
+        dict: Final counters
+    """
+    checkpoint_path = checkpoint_path or output_path.rstrip("/") + ".checkpoint"
+    checkpoint = load_checkpoint(checkpoint_path) if resume else None
+    writer_class = ParquetWriter if output_format == "parquet" else JSONLWriter
+    if checkpoint and not writer_class.can_resume(output_path, checkpoint):
+        # Resuming would skip input whose results are no longer on disk
+        if progress:
+            print(f"{output_path} is missing results from the checkpoint; starting over", file=progress)
+        checkpoint = None
+    counters = dict(checkpoint['counters']) if checkpoint else {'lines': 0, 'ok': 0, 'invalid': 0, 'missing': 0}
+    writer = writer_class(output_path, checkpoint)
+
+    # Skip input already covered by the checkpoint
+    for _ in islice(input_file, counters['lines']):
+        pass
+    if checkpoint and progress:
+        print(f"Resuming after {counters['lines']} lines", file=progress)
+
+    thumbnails = get_thumbnail_cache() if warm_thumbnails else None
+    workers = workers or os.cpu_count() or 1
+    start = time.time()
+    processed_this_run = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                lines = list(islice(input_file, batch_size))
+                if not lines:
+                    break
+
+                results = analyze_batch(lines, executor, workers, fetch_workers, thumbnails)
+                writer.write(results)
+
+                counters['lines'] += len(lines)
+                for result in results:
+                    counters[result['status']] += 1
+                save_checkpoint(checkpoint_path, dict(writer.state(), counters=counters))
+
+                processed_this_run += len(lines)
+                if progress:
+                    rate = processed_this_run / max(time.time() - start, 1e-9)
+                    print(
+                        f"{counters['lines']} lines | {counters['ok']} ok, {counters['missing']} missing, "
+                        f"{counters['invalid']} invalid | {rate:.1f} lines/sec",
+                        file=progress
+                    )
+    finally:
+        writer.close()
+
+    return counters
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze YouTube Shorts URLs or IDs in bulk")
+    parser.add_argument("input", help="File with one URL or video ID per line, or - for stdin")
+    parser.add_argument("-o", "--output", required=True, help="Output JSONL file or Parquet directory")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="Scoring processes (default: CPU count)")
+    parser.add_argument("--fetch-workers", type=int, default=4, help="Concurrent API calls per batch")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: OUTPUT.checkpoint)")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore any existing checkpoint")
+    parser.add_argument("--thumbnails", action="store_true", help="Also warm the local thumbnail cache")
+    args = parser.parse_args()
+
+    input_file = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    try:
+        counters = run(
+            input_file, args.output, args.format, args.batch_size, args.workers,
+            args.fetch_workers, args.checkpoint, not args.no_resume, warm_thumbnails=args.thumbnails
+        )
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+
+    print(f"Done: {counters['ok']} analyzed, {counters['missing']} missing, {counters['invalid']} invalid", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import threading
+import time
+
+import tracing
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache with a TTL and stale-while-revalidate
+
+    An entry younger than ttl is served as is. An entry older than ttl but
+    within ttl + stale_ttl is still served, while a single background thread
+    refreshes it. Anything older is treated as a miss. Concurrent callers that
+    miss on the same key wait for one in-flight load instead of each starting
+    their own.
+    """
+    def __init__(self, ttl, stale_ttl=0, clock=time.monotonic):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}   # key -> (value, fetched_at)
+        self._inflight = {}  # key -> _Flight
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+        }
+
+    def get(self, key, loader, background_loader=None):
+        """
+        Return the cached value for key, loading it with loader() if needed
+
+        Args:
+            key (hashable): Cache key
+            loader (callable): Zero-argument function producing the value
+            background_loader (callable): Optional loader used instead of
+                loader for background refreshes of stale entries
+
+        Returns:
+            object: Cached or freshly loaded value. Exceptions raised by
+                loader on a miss propagate to every waiting caller.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fetched_at = entry
+                age = self._clock() - fetched_at
+                if age < self.ttl:
+                    self._stats['hits'] += 1
+                    tracing.record('cache_hits')
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self._stats['stale_hits'] += 1
+                    tracing.record('cache_stale_hits')
+                    if key not in self._inflight:
+                        flight = self._inflight[key] = _Flight()
+                        threading.Thread(
+                            target=self._load, args=(key, background_loader or loader, flight, True), daemon=True
+                        ).start()
+                    return value
+
+            self._stats['misses'] += 1
+            tracing.record('cache_misses')
+            flight = self._inflight.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._inflight[key] = _Flight()
+
+        if owner:
+            self._load(key, loader, flight, False)
+        else:
+            flight.done.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def invalidate(self, key=None):
+        """
+        Drop one entry, or every entry when key is None
+
+        Args:
+            key (hashable): Cache key to drop
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """
+        Return the cache counters
+
+        Returns:
+            dict: hits, stale_hits, misses, refreshes, refresh_errors and size
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        return stats
+
+    def _load(self, key, loader, flight, background):
+        try:
+            flight.value = loader()
+        except Exception as e:
+            flight.error = e
+            if background:
+                # Keep serving the stale entry; the next stale hit retries
+                print(f"Background refresh failed for {key!r}: {e}")
+        with self._lock:
+            if flight.error is None:
+                self._entries[key] = (flight.value, self._clock())
+            if background:
+                self._stats['refreshes'] += 1
+                if flight.error is not None:
+                    self._stats['refresh_errors'] += 1
+            del self._inflight[key]
+        flight.done.set()
+
+class _Flight:
+    """A load in progress that other callers can wait on."""
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
@@ -1,30 +1,55 @@
-import re
 from datetime import datetime
-import pandas as pd
 import numpy as np
+from text_features import EMOJI_PATTERN, HASHTAG_PATTERN, digit_pattern, title_features
+import tracing
+from video_record import DURATION_PATTERN, parse_duration, parse_published_at
 
+# Column order of the feature matrix, matching the keys of extract_features
+FEATURE_COLUMNS = [
+    'title_length',
+    'title_word_count',
+    'has_question_in_title',
+    'has_exclamation_in_title',
+    'has_number_in_title',
+    'has_emoji_in_title',
+    'tag_count',
+    'avg_tag_length',
+    'duration_seconds',
+    'like_view_ratio',
+    'comment_view_ratio',
+    'views_per_day',
+    'days_since_published',
+]
+
+# Upper bounds applied by extract_features to avoid extreme values
+FEATURE_CAPS = {
+    'views_per_day': 1000000,
+    'days_since_published': 30,
+}
+
+@tracing.traced()
 def process_video_data(video_data):
     """
     Process raw video data from YouTube API
     
     Args:
-        video_data (dict): Raw video data
+        video_data (VideoRecord or dict): Raw video data
         
     Returns:
         dict: Processed video data with additional metrics
     """
-    processed_data = video_data.copy()
-    
-    # Clean title (remove emoji, extra spaces, etc.)
-    processed_data['clean_title'] = clean_text(video_data['title'])
+    processed_data = dict(video_data)
     
-    # Extract title features
-    processed_data['title_length'] = len(video_data['title'])
-    processed_data['title_word_count'] = len(video_data['title'].split())
-    processed_data['has_question_in_title'] = '?' in video_data['title']
-    processed_data['has_exclamation_in_title'] = '!' in video_data['title']
-    processed_data['has_number_in_title'] = any(char.isdigit() for char in video_data['title'])
-    processed_data['has_emoji_in_title'] = contains_emoji(video_data['title'])
+    # Clean title and extract title features in one pass
+    title = title_features(video_data['title'])
+    processed_data['clean_title'] = title.clean_title
+    processed_data['title_length'] = title.length
+    processed_data['title_word_count'] = title.word_count
+    processed_data['has_question_in_title'] = title.has_question
+    processed_data['has_exclamation_in_title'] = title.has_exclamation
+    processed_data['has_number_in_title'] = title.has_number
+    processed_data['has_emoji_in_title'] = title.has_emoji
+    processed_data['hashtags'] = list(title.hashtags)
     
     # Extract tag features
     processed_data['tag_count'] = len(video_data['tags']) if video_data['tags'] else 0
@@ -36,7 +61,8 @@ def process_video_data(video_data):
     processed_data['comment_view_ratio'] = processed_data['comment_count'] / max(1, processed_data['view_count'])
     
     # Calculate time-based metrics
-    published_date = datetime.strptime(video_data['published_at'], "%Y-%m-%dT%H:%M:%SZ")
+    # VideoRecords carry the parsed publish time and duration already
+    published_date = video_data['published'] if 'published' in video_data else parse_published_at(video_data['published_at'])
     days_live = max(1, (datetime.now() - published_date).days)
     processed_data['days_since_published'] = days_live
     processed_data['views_per_day'] = processed_data['view_count'] / days_live
@@ -44,18 +70,12 @@ def process_video_data(video_data):
     processed_data['comments_per_day'] = processed_data['comment_count'] / days_live
     
     # Parse duration
-    duration_match = re.match(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', video_data['duration'])
-    if duration_match:
-        hours = int(duration_match.group(1) or 0)
-        minutes = int(duration_match.group(2) or 0)
-        seconds = int(duration_match.group(3) or 0)
-        total_seconds = hours * 3600 + minutes * 60 + seconds
-        processed_data['duration_seconds'] = total_seconds
-    else:
-        processed_data['duration_seconds'] = 0
+    if 'duration_seconds' not in video_data:
+        processed_data['duration_seconds'] = parse_duration(video_data['duration'])
     
     return processed_data
 
+@tracing.traced()
 def extract_features(processed_data):
     """
     Extract features for ML model
@@ -78,12 +98,124 @@ def extract_features(processed_data):
         'duration_seconds': processed_data['duration_seconds'],
         'like_view_ratio': processed_data['like_view_ratio'],
         'comment_view_ratio': processed_data['comment_view_ratio'],
-        'views_per_day': min(processed_data['views_per_day'], 1000000),  # Cap at 1M to avoid extreme values
-        'days_since_published': min(processed_data['days_since_published'], 30),  # Cap at 30 days
+        'views_per_day': min(processed_data['views_per_day'], FEATURE_CAPS['views_per_day']),  # Cap at 1M to avoid extreme values
+        'days_since_published': min(processed_data['days_since_published'], FEATURE_CAPS['days_since_published']),  # Cap at 30 days
     }
     
     return features
 
+def process_video_frame(df, now=None):
+    """
+    Vectorized process_video_data over a DataFrame of raw video data
+    
+    Args:
+        df (pd.DataFrame): One row per video, with the columns of the dict
+            returned by youtube_api.get_video_data
+        now (datetime): Reference time for day counts, defaults to now
+        
+    Returns:
+        pd.DataFrame: Copy of df with the same additional columns that
+            process_video_data adds
+    """
+    import pandas as pd
+    
+    now = datetime.now() if now is None else now
+    processed = df.copy()
+    
+    title = df['title'].fillna('').astype(str)
+    processed['clean_title'] = (
+        title.str.replace(EMOJI_PATTERN, '', regex=True)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+    )
+    
+    # Title features
+    processed['title_length'] = title.str.len()
+    processed['title_word_count'] = title.str.count(r'\S+')
+    processed['has_question_in_title'] = title.str.contains('?', regex=False)
+    processed['has_exclamation_in_title'] = title.str.contains('!', regex=False)
+    processed['has_number_in_title'] = title.str.contains(digit_pattern(), regex=True)
+    processed['has_emoji_in_title'] = title.str.contains(EMOJI_PATTERN, regex=True)
+    processed['hashtags'] = title.str.findall(HASHTAG_PATTERN)
+    
+    # Tag features
+    tags = df['tags'].reset_index(drop=True)
+    tag_lengths = tags.explode().dropna().astype(str).str.len()
+    processed['tag_count'] = tags.str.len().fillna(0).astype(np.int64).to_numpy()
+    processed['total_tag_length'] = (
+        tag_lengths.groupby(level=0).sum()
+        .reindex(tags.index, fill_value=0).astype(np.int64).to_numpy()
+    )
+    processed['avg_tag_length'] = processed['total_tag_length'] / processed['tag_count'].clip(lower=1)
+    
+    # Engagement metrics
+    views = processed['view_count'].clip(lower=1)
+    processed['like_view_ratio'] = processed['like_count'] / views
+    processed['comment_view_ratio'] = processed['comment_count'] / views
+    
+    # Time-based metrics
+    # Dropping the trailing "Z" lets pandas use its fast ISO 8601 parser
+    published_date = pd.to_datetime(df['published_at'].str.slice(0, 19), format="ISO8601")
+    days_live = (pd.Timestamp(now) - published_date).dt.days.clip(lower=1)
+    processed['days_since_published'] = days_live
+    processed['views_per_day'] = processed['view_count'] / days_live
+    processed['likes_per_day'] = processed['like_count'] / days_live
+    processed['comments_per_day'] = processed['comment_count'] / days_live
+    
+    # Duration; rows that do not start with "PT" get 0 like the scalar path
+    parts = df['duration'].fillna('').astype(str).str.extract('^' + DURATION_PATTERN.pattern)
+    parts = parts.fillna(0).astype(np.int64)
+    processed['duration_seconds'] = parts[0] * 3600 + parts[1] * 60 + parts[2]
+    
+    return processed
+
+def extract_feature_matrix(processed_df):
+    """
+    Vectorized extract_features over a DataFrame from process_video_frame
+    
+    Args:
+        processed_df (pd.DataFrame): Processed video data
+        
+    Returns:
+        np.ndarray: float32 matrix of shape (n_videos, len(FEATURE_COLUMNS))
+            with columns in FEATURE_COLUMNS order
+    """
+    matrix = np.empty((len(processed_df), len(FEATURE_COLUMNS)), dtype=np.float32)
+    for i, column in enumerate(FEATURE_COLUMNS):
+        values = processed_df[column].to_numpy(dtype=np.float64)
+        if column in FEATURE_CAPS:
+            values = np.minimum(values, FEATURE_CAPS[column])
+        matrix[:, i] = values
+    
+    return matrix
+
+def summarize_trending(trending_data):
+    """
+    Average and median metrics of trending videos, for the trend comparison
+    
+    A handful of viral outliers dominate the means of a short trending
+    list, so the medians are the better baseline to compare against.
+    
+    Args:
+        trending_data (list): Trending video metadata dicts
+        
+    Returns:
+        dict: count, then avg_* and median_* for views, likes, comments
+            and like_ratio (%)
+    """
+    from trend_stats import METRICS
+    
+    summary = {'count': len(trending_data)}
+    if not trending_data:
+        return summary
+    # A trending list is small, so exact medians are cheap; the sketches in
+    # trend_stats are for the long-lived corpus
+    for metric, value in METRICS.items():
+        values = np.fromiter((value(video) for video in trending_data), dtype=np.float64, count=len(trending_data))
+        summary[f'avg_{metric}'] = values.mean()
+        summary[f'median_{metric}'] = np.median(values)
+    return summary
+
 def clean_text(text):
     """
     Clean text by removing emojis, extra spaces, etc.
@@ -94,13 +226,8 @@ def clean_text(text):
     Returns:
         str: Cleaned text
     """
-    # Remove emojis
-    text = remove_emoji(text)
-    
-    # Remove extra spaces
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    return text
+    # Remove emojis, then collapse whitespace
+    return ' '.join(remove_emoji(text).split())
 
 def remove_emoji(text):
     """
@@ -112,22 +239,7 @@ def remove_emoji(text):
     Returns:
         str: Text without emojis
     """
-    emoji_pattern = re.compile(
-        "["
-        "\U0001F600-\U0001F64F"  # emoticons
-        "\U0001F300-\U0001F5FF"  # symbols & pictographs
-        "\U0001F680-\U0001F6FF"  # transport & map symbols
-        "\U0001F700-\U0001F77F"  # alchemical symbols
-        "\U0001F780-\U0001F7FF"  # Geometric Shapes
-        "\U0001F800-\U0001F8FF"  # Supplemental Arrows-C
-        "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
-        "\U0001FA00-\U0001FA6F"  # Chess Symbols
-        "\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
-        "\U00002702-\U000027B0"  # Dingbats
-        "\U000024C2-\U0001F251" 
-        "]+", flags=re.UNICODE
-    )
-    return emoji_pattern.sub(r'', text)
+    return EMOJI_PATTERN.sub(r'', text)
 
 def contains_emoji(text):
     """
@@ -139,19 +251,4 @@ def contains_emoji(text):
     Returns:
         bool: True if text contains emojis, False otherwise
     """
-    emoji_pattern = re.compile(
-        "["
-        "\U0001F600-\U0001F64F"  # emoticons
-        "\U0001F300-\U0001F5FF"  # symbols & pictographs
-        "\U0001F680-\U0001F6FF"  # transport & map symbols
-        "\U0001F700-\U0001F77F"  # alchemical symbols
-        "\U0001F780-\U0001F7FF"  # Geometric Shapes
-        "\U0001F800-\U0001F8FF"  # Supplemental Arrows-C
-        "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
-        "\U0001FA00-\U0001FA6F"  # Chess Symbols
-        "\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
-        "\U00002702-\U000027B0"  # Dingbats
-        "\U000024C2-\U0001F251" 
-        "]+", flags=re.UNICODE
-    )
-    return bool(emoji_pattern.search(text))
+    return bool(EMOJI_PATTERN.search(text))
@@ -0,0 +1,198 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+# Snippet data (title, tags, duration) rarely changes, statistics change constantly
+SNIPPET_TTL = int(os.getenv("METADATA_SNIPPET_TTL", str(7 * 24 * 3600)))
+STATISTICS_TTL = int(os.getenv("METADATA_STATISTICS_TTL", "600"))
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "metadata.sqlite3")
+
+StoredVideo = namedtuple(
+    'StoredVideo',
+    ['video_id', 'payload', 'etag', 'snippet_fetched_at', 'stats_fetched_at']
+)
+
+class SQLiteMetadataStore:
+    """
+    On-disk store of raw videos().list items with their ETag and fetch times
+
+    The database runs in WAL mode with a busy timeout, so several Streamlit
+    worker processes can read and write it at once. Each thread gets its own
+    connection.
+    """
+    def __init__(self, path=DEFAULT_STORE_PATH, snippet_ttl=SNIPPET_TTL, statistics_ttl=STATISTICS_TTL):
+        self.path = path
+        self.snippet_ttl = snippet_ttl
+        self.statistics_ttl = statistics_ttl
+        self._local = threading.local()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS videos (
+                    video_id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    etag TEXT,
+                    snippet_fetched_at REAL NOT NULL,
+                    stats_fetched_at REAL NOT NULL
+                )
+            """)
+
+    def get(self, video_id):
+        """
+        Look up one stored video
+
+        Args:
+            video_id (str): YouTube video ID
+
+        Returns:
+            StoredVideo: Stored record, or None if the video is not stored
+        """
+        return self.get_many([video_id]).get(video_id)
+
+    def get_many(self, video_ids):
+        """
+        Look up several stored videos at once
+
+        Args:
+            video_ids (list): YouTube video IDs
+
+        Returns:
+            dict: StoredVideo records keyed by video ID, for stored IDs only
+        """
+        records = {}
+        conn = self._connection()
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(video_ids), 500):
+            chunk = video_ids[i:i + 500]
+            rows = conn.execute(
+                "SELECT video_id, payload, etag, snippet_fetched_at, stats_fetched_at "
+                f"FROM videos WHERE video_id IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall()
+            for row in rows:
+                records[row[0]] = StoredVideo(row[0], json.loads(row[1]), row[2], row[3], row[4])
+        return records
+
+    def upsert_many(self, items, etags=None, fetched_at=None):
+        """
+        Store full videos().list items, replacing any previous version
+
+        Args:
+            items (list): Video resources from the YouTube API
+            etags (dict): Optional response ETags keyed by video ID, used
+                for If-None-Match revalidation
+            fetched_at (float): Fetch timestamp, defaults to now
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        etags = etags or {}
+        rows = [
+            (item['id'], json.dumps(item), etags.get(item['id']), fetched_at, fetched_at)
+            for item in items
+        ]
+        self._write(
+            "INSERT INTO videos (video_id, payload, etag, snippet_fetched_at, stats_fetched_at) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(video_id) DO UPDATE SET payload = excluded.payload, "
+            "etag = COALESCE(excluded.etag, videos.etag), "
+            "snippet_fetched_at = excluded.snippet_fetched_at, "
+            "stats_fetched_at = excluded.stats_fetched_at",
+            rows
+        )
+
+    def update_statistics_many(self, stats_items, fetched_at=None):
+        """
+        Merge statistics-only videos().list items into stored payloads
+
+        Args:
+            stats_items (list): Video resources fetched with part="statistics"
+            fetched_at (float): Fetch timestamp, defaults to now
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        stored = self.get_many([item['id'] for item in stats_items])
+        rows = []
+        for item in stats_items:
+            record = stored.get(item['id'])
+            if record is None:
+                continue
+            payload = dict(record.payload)
+            payload['statistics'] = item.get('statistics', {})
+            rows.append((json.dumps(payload), fetched_at, item['id']))
+        self._write(
+            "UPDATE videos SET payload = ?, stats_fetched_at = ? WHERE video_id = ?",
+            rows
+        )
+
+    def touch(self, video_id, fetched_at=None):
+        """
+        Mark a stored video as revalidated, e.g. after a 304 Not Modified
+
+        Args:
+            video_id (str): YouTube video ID
+            fetched_at (float): Revalidation timestamp, defaults to now
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        self._write(
+            "UPDATE videos SET snippet_fetched_at = ?, stats_fetched_at = ? WHERE video_id = ?",
+            [(fetched_at, fetched_at, video_id)]
+        )
+
+    def is_snippet_fresh(self, record, now=None):
+        """Return True if the record's snippet data is within its TTL."""
+        now = time.time() if now is None else now
+        return now - record.snippet_fetched_at < self.snippet_ttl
+
+    def is_statistics_fresh(self, record, now=None):
+        """Return True if the record's statistics are within their TTL."""
+        now = time.time() if now is None else now
+        return now - record.stats_fetched_at < self.statistics_ttl
+
+    def _write(self, sql, rows):
+        if not rows:
+            return
+        conn = self._connection()
+        # BEGIN IMMEDIATE takes the write lock up front so concurrent
+        # writers queue on busy_timeout instead of failing mid-transaction
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(sql, rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_metadata_store():
+    """
+    Return the process-wide metadata store, creating it on first use
+
+    The database path comes from METADATA_STORE_PATH; set it to an empty
+    string to disable the store.
+
+    Returns:
+        SQLiteMetadataStore: The shared store, or None if disabled
+    """
+    global _store
+    path = os.getenv("METADATA_STORE_PATH", DEFAULT_STORE_PATH)
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None or _store.path != path:
+            _store = SQLiteMetadataStore(path)
+        return _store
@@ -1,9 +1,58 @@
+import json
+import os
+import threading
+from datetime import datetime
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
+from data_processor import FEATURE_COLUMNS, process_video_frame, extract_feature_matrix
 
 # Since we don't have a pre-trained model, we'll create a rule-based scoring system
 # In a real-world scenario, this would be replaced with a trained ML model
 
+BASE_SCORE = 0.5
+MIN_SCORE = 0.1
+MAX_SCORE = 0.99
+
+# Scoring rules, applied in order. A rule fires when its feature lies between
+# low and high (each bound inclusive or exclusive); it then adds weight to the
+# score and, if it has a factor message, sets that factor's bit in the mask.
+# (feature, low, low_inclusive, high, high_inclusive, weight, factor)
+SCORING_RULES = [
+    # Title-related features
+    ('title_length', 30, True, 50, True, 0.05, "Optimal title length (30-50 characters)"),
+    ('title_length', -np.inf, True, 20, False, -0.05, None),
+    ('has_emoji_in_title', 0, False, np.inf, True, 0.03, "Title contains emoji which can increase engagement"),
+    ('has_question_in_title', 0, False, np.inf, True, 0.03, "Title contains a question which can drive curiosity"),
+    ('has_number_in_title', 0, False, np.inf, True, 0.02, "Title contains numbers which can increase click-through rate"),
+    # Tag-related features
+    ('tag_count', 8, True, np.inf, True, 0.05, "Good number of tags (8+) for discoverability"),
+    ('tag_count', -np.inf, True, 3, True, -0.05, None),
+    # Duration feature
+    ('duration_seconds', 15, True, 45, True, 0.1, "Optimal video length (15-45 seconds) for viewer retention"),
+    ('duration_seconds', 55, False, np.inf, True, -0.05, None),
+    # Engagement metrics
+    ('like_view_ratio', 0.1, False, np.inf, True, 0.15, "Excellent like-to-view ratio (>10%)"),
+    ('like_view_ratio', 0.05, False, 0.1, True, 0.08, "Good like-to-view ratio (>5%)"),
+    ('comment_view_ratio', 0.01, False, np.inf, True, 0.1, "High comment engagement"),
+    # Views per day (early traction is a good indicator)
+    ('views_per_day', 10000, False, np.inf, True, 0.15, "Strong daily view velocity"),
+    ('views_per_day', 1000, False, 10000, True, 0.05, "Good daily view velocity"),
+]
+
+# Factor messages by bit position in the factor masks
+FACTORS = [rule[6] for rule in SCORING_RULES if rule[6] is not None]
+# Bit of each rule's factor in the factor masks, None for rules without one
+FACTOR_BITS = [
+    sum(earlier[6] is not None for earlier in SCORING_RULES[:i]) if rule[6] is not None else None
+    for i, rule in enumerate(SCORING_RULES)
+]
+
+# (lower score bound, explanation), checked from the top
+EXPLANATIONS = [
+    (0.7, "This video shows high viral potential! It has strong engagement metrics and follows best practices."),
+    (0.5, "This video has moderate viral potential with decent engagement. Some aspects could be improved."),
+    (-np.inf, "This video has lower viral potential. Consider improving key factors to boost engagement."),
+]
+
 def predict_engagement(features):
     """
     Predict engagement potential for a YouTube Shorts video
@@ -14,125 +63,353 @@ def predict_engagement(features):
     Returns:
         dict: Prediction results including score and explanation
     """
-    # Base score
-    score = 0.5
+    score, factor_mask = score_rules(features)
     
-    # Factors that influence the score
-    factors = []
+    return {
+        'score': score,
+        'explanation': explain_score(score),
+        'key_factors': decode_factors(factor_mask)
+    }
+
+def score_rules(features):
+    """
+    Apply the scoring rules to one video
     
-    # Title-related features
-    if features['title_length'] >= 30 and features['title_length'] <= 50:
-        score += 0.05
-        factors.append("Optimal title length (30-50 characters)")
-    elif features['title_length'] < 20:
-        score -= 0.05
-        
-    if features['has_emoji_in_title']:
-        score += 0.03
-        factors.append("Title contains emoji which can increase engagement")
+    Gives exactly the same score and mask as predict_engagement_batch on a
+    one-row matrix, without the NumPy overhead that dominates for a single
+    video; both evaluate the rules with rule_fires.
+    
+    Args:
+        features (dict): Video features
         
-    if features['has_question_in_title']:
-        score += 0.03
-        factors.append("Title contains a question which can drive curiosity")
+    Returns:
+        tuple: (score, factor_mask)
+    """
+    score = BASE_SCORE
+    factor_mask = 0
+    for rule, factor_bit in zip(SCORING_RULES, FACTOR_BITS):
+        fired = rule_fires(rule, float(features[rule[0]]))
+        if fired:
+            score += rule[5]
+            if factor_bit is not None:
+                factor_mask |= 1 << factor_bit
+    
+    return min(max(score, MIN_SCORE), MAX_SCORE), factor_mask
+
+def rule_fires(rule, values):
+    """
+    Whether a scoring rule fires for one feature value or an array of them
+    
+    Args:
+        rule (tuple): Entry of SCORING_RULES
+        values (float or np.ndarray): Values of the rule's feature
         
-    if features['has_number_in_title']:
-        score += 0.02
-        factors.append("Title contains numbers which can increase click-through rate")
+    Returns:
+        bool or np.ndarray: True where the value lies within the rule's bounds
+    """
+    _, low, low_inclusive, high, high_inclusive, _, _ = rule
+    above = (values >= low) if low_inclusive else (values > low)
+    below = (values <= high) if high_inclusive else (values < high)
+    return above & below
+
+def predict_engagement_batch(X):
+    """
+    Score many videos at once with the rule-based model
     
-    # Tag-related features
-    if features['tag_count'] >= 8:
-        score += 0.05
-        factors.append("Good number of tags (8+) for discoverability")
-    elif features['tag_count'] <= 3:
-        score -= 0.05
+    Args:
+        X (np.ndarray): Feature matrix of shape (n_videos, len(FEATURE_COLUMNS)),
+            e.g. from data_processor.extract_feature_matrix
+        
+    Returns:
+        tuple: (scores, factor_masks) where scores is a float64 array of
+            engagement scores and factor_masks a uint16 array whose set bits
+            index into FACTORS
+    """
+    X = np.asarray(X)
+    scores = np.full(len(X), BASE_SCORE)
+    factor_masks = np.zeros(len(X), dtype=np.uint16)
     
-    # Duration feature
-    if 15 <= features['duration_seconds'] <= 45:
-        score += 0.1
-        factors.append("Optimal video length (15-45 seconds) for viewer retention")
-    elif features['duration_seconds'] > 55:
-        score -= 0.05
+    for rule, factor_bit in zip(SCORING_RULES, FACTOR_BITS):
+        fired = rule_fires(rule, X[:, FEATURE_COLUMNS.index(rule[0])])
+        # Add in rule order so scores match the original sequential sum exactly
+        scores += np.where(fired, rule[5], 0.0)
+        if factor_bit is not None:
+            factor_masks |= fired.astype(np.uint16) << factor_bit
     
-    # Engagement metrics
-    if features['like_view_ratio'] > 0.1:  # >10% like/view ratio
-        score += 0.15
-        factors.append("Excellent like-to-view ratio (>10%)")
-    elif features['like_view_ratio'] > 0.05:  # >5% like/view ratio
-        score += 0.08
-        factors.append("Good like-to-view ratio (>5%)")
+    # Cap the score between MIN_SCORE and MAX_SCORE
+    np.clip(scores, MIN_SCORE, MAX_SCORE, out=scores)
     
-    if features['comment_view_ratio'] > 0.01:  # >1% comment/view ratio
-        score += 0.1
-        factors.append("High comment engagement")
+    return scores, factor_masks
+
+def explain_score(score):
+    """
+    Return the explanation text for an engagement score
     
-    # Views per day (early traction is a good indicator)
-    if features['views_per_day'] > 10000:
-        score += 0.15
-        factors.append("Strong daily view velocity")
-    elif features['views_per_day'] > 1000:
-        score += 0.05
-        factors.append("Good daily view velocity")
-    
-    # Cap the score between 0 and 1
-    score = max(0.1, min(score, 0.99))
-    
-    # Generate explanation based on score
-    if score > 0.7:
-        explanation = "This video shows high viral potential! It has strong engagement metrics and follows best practices."
-    elif score > 0.5:
-        explanation = "This video has moderate viral potential with decent engagement. Some aspects could be improved."
-    else:
-        explanation = "This video has lower viral potential. Consider improving key factors to boost engagement."
+    Args:
+        score (float): Engagement score
+        
+    Returns:
+        str: Explanation
+    """
+    for lower_bound, explanation in EXPLANATIONS:
+        if score > lower_bound:
+            return explanation
+    return EXPLANATIONS[-1][1]
+
+def decode_factors(factor_mask, limit=3):
+    """
+    Turn a factor bitmask into the key factor messages
     
-    # Select top 3 factors that contributed most positively
-    key_factors = sorted(factors, key=lambda x: len(x), reverse=True)[:3] if factors else ["No standout factors detected"]
+    Args:
+        factor_mask (int): Bitmask from predict_engagement_batch
+        limit (int): Maximum number of factors to return
+        
+    Returns:
+        list: The longest (most descriptive) factor messages
+    """
+    factor_mask = int(factor_mask)
+    factors = [factor for bit, factor in enumerate(FACTORS) if factor_mask & (1 << bit)]
     
-    return {
-        'score': score,
-        'explanation': explanation,
-        'key_factors': key_factors
-    }
+    # Select top factors that contributed most positively
+    return sorted(factors, key=lambda x: len(x), reverse=True)[:limit] if factors else ["No standout factors detected"]
+
+# Trained model artifacts live in versioned directories under MODEL_DIR
+MODEL_DIR = os.getenv("ENGAGEMENT_MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models"))
+ARTIFACT_PREFIX = "engagement-v"
+ARTIFACT_FORMAT = 1
 
-# This is a placeholder for a future ML model
 class EngagementModel:
     """
-    A more sophisticated model that would be trained on historical data
-    This is not implemented yet but shows the structure for future expansion
+    Engagement model trained on historical Shorts
+    
+    Wraps a fitted MinMaxScaler and a scikit-learn regressor that predicts
+    an engagement score in [0, 1] from features in FEATURE_COLUMNS order.
     """
-    def __init__(self):
-        self.scaler = MinMaxScaler()
-        # In a real implementation, we would load pre-trained model weights here
+    def __init__(self, estimator=None, scaler=None, feature_columns=None, metadata=None):
+        # scikit-learn is only imported when a trained model is actually used
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        from sklearn.preprocessing import MinMaxScaler
+        
+        self.estimator = estimator if estimator is not None else HistGradientBoostingRegressor(max_iter=200)
+        self.scaler = scaler if scaler is not None else MinMaxScaler()
+        self.feature_columns = list(feature_columns or FEATURE_COLUMNS)
+        self.metadata = metadata or {}
+    
+    def fit(self, X, y):
+        """
+        Fit the scaler and estimator
+        
+        Args:
+            X (np.ndarray): Feature matrix in FEATURE_COLUMNS order
+            y (np.ndarray): Engagement targets in [0, 1]
+            
+        Returns:
+            EngagementModel: self
+        """
+        X_scaled = self.scaler.fit_transform(np.asarray(X, dtype=np.float64))
+        self.estimator.fit(X_scaled, np.asarray(y, dtype=np.float64))
+        return self
     
     def predict(self, features):
         """
         Make prediction using the trained model
         
+        Args:
+            features (dict or np.ndarray): Features of one video, or a
+                feature matrix of shape (n_videos, len(FEATURE_COLUMNS))
+            
+        Returns:
+            float or np.ndarray: Engagement score(s) between 0 and 1
+        """
+        if isinstance(features, dict):
+            X = np.array([[features[column] for column in self.feature_columns]], dtype=np.float64)
+            return float(self.predict(X)[0])
+        
+        X_scaled = self.scaler.transform(np.asarray(features, dtype=np.float64))
+        return np.clip(self.estimator.predict(X_scaled), 0.0, 1.0)
+    
+    def predict_engagement(self, features):
+        """
+        Same contract as the rule-based predict_engagement, scored by this model
+        
+        The explanation follows the model's score; key factors still come
+        from the scoring rules, since tree ensembles have no per-video reasons.
+        
         Args:
             features (dict): Video features
             
         Returns:
-            float: Engagement score between 0 and 1
+            dict: Prediction results including score and explanation
         """
-        # Convert features to array
-        feature_array = np.array([
-            features['title_length'],
-            features['title_word_count'],
-            features['has_question_in_title'],
-            features['has_exclamation_in_title'],
-            features['has_number_in_title'],
-            features['has_emoji_in_title'],
-            features['tag_count'],
-            features['avg_tag_length'],
-            features['duration_seconds'],
-            features['like_view_ratio'],
-            features['comment_view_ratio'],
-            features['views_per_day'],
-            features['days_since_published']
-        ]).reshape(1, -1)
-        
-        # Scale features
-        scaled_features = self.scaler.transform(feature_array)
-        
-        # In a real implementation, we would use the trained model to make predictions
-        # For now, return a random score between 0.2 and 0.8
-        return np.random.uniform(0.2, 0.8)
+        score = self.predict(features)
+        _, factor_mask = score_rules(features)
+        
+        return {
+            'score': score,
+            'explanation': explain_score(score),
+            'key_factors': decode_factors(factor_mask)
+        }
+    
+    def save(self, model_dir=MODEL_DIR):
+        """
+        Save the model as the next versioned artifact in model_dir
+        
+        Args:
+            model_dir (str): Directory holding engagement-v<N> artifacts
+            
+        Returns:
+            str: Path of the new artifact directory
+        """
+        import joblib
+        import sklearn
+        
+        existing = _artifact_versions(model_dir)
+        version = max(existing) + 1 if existing else 1
+        path = os.path.join(model_dir, f"{ARTIFACT_PREFIX}{version}")
+        os.makedirs(path)
+        
+        # Uncompressed so the arrays can be memory-mapped on load
+        joblib.dump({'estimator': self.estimator, 'scaler': self.scaler}, os.path.join(path, "model.joblib"))
+        
+        self.metadata = dict(
+            self.metadata,
+            version=version,
+            format=ARTIFACT_FORMAT,
+            feature_columns=self.feature_columns,
+            sklearn_version=sklearn.__version__,
+            saved_at=datetime.now().isoformat(),
+        )
+        with open(os.path.join(path, "metadata.json"), "w") as f:
+            json.dump(self.metadata, f, indent=2)
+        
+        return path
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Load a saved artifact, memory-mapping its arrays
+        
+        Args:
+            path (str): Artifact directory written by save()
+            
+        Returns:
+            EngagementModel: The loaded model
+        """
+        import joblib
+        
+        with open(os.path.join(path, "metadata.json")) as f:
+            metadata = json.load(f)
+        
+        if metadata.get('format') != ARTIFACT_FORMAT:
+            raise ValueError(f"Unsupported model artifact format {metadata.get('format')} in {path}")
+        if metadata['feature_columns'] != FEATURE_COLUMNS:
+            raise ValueError(f"Model artifact {path} was trained on a different feature schema")
+        
+        artifact = joblib.load(os.path.join(path, "model.joblib"), mmap_mode='r')
+        return cls(artifact['estimator'], artifact['scaler'], metadata['feature_columns'], metadata)
+
+def train_engagement_model(data_path, target_column="engagement", model_dir=MODEL_DIR, estimator=None):
+    """
+    Train an EngagementModel on historical Shorts and save it as a new version
+    
+    The data file holds one row per video, either with the FEATURE_COLUMNS
+    already extracted or with the raw columns returned by
+    youtube_api.get_video_data, plus the target column.
+    
+    Args:
+        data_path (str): CSV or Parquet file of historical Shorts
+        target_column (str): Column holding the engagement target in [0, 1]
+        model_dir (str): Directory to save the artifact in
+        estimator: Optional scikit-learn regressor to use instead of
+            gradient boosting
+        
+    Returns:
+        tuple: (model, artifact_path)
+    """
+    import pandas as pd
+    
+    if data_path.endswith(".parquet"):
+        df = pd.read_parquet(data_path)
+    else:
+        df = pd.read_csv(data_path)
+    
+    if target_column not in df.columns:
+        raise ValueError(f"Target column '{target_column}' not found in {data_path}")
+    
+    if all(column in df.columns for column in FEATURE_COLUMNS):
+        X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+    else:
+        if df['tags'].map(lambda tags: isinstance(tags, str)).any():
+            # CSV files store the tag lists as JSON strings
+            df['tags'] = df['tags'].fillna('[]').map(json.loads)
+        X = extract_feature_matrix(process_video_frame(df))
+    y = df[target_column].to_numpy(dtype=np.float64)
+    
+    model = EngagementModel(estimator=estimator, metadata={
+        'training_data': os.path.abspath(data_path),
+        'target_column': target_column,
+        'training_rows': len(df),
+    })
+    model.fit(X, y)
+    path = model.save(model_dir)
+    
+    return model, path
+
+_loaded_models = {}
+_load_lock = threading.Lock()
+
+def load_engagement_model(path=None):
+    """
+    Load a trained EngagementModel once per process
+    
+    Args:
+        path (str): Artifact directory; defaults to ENGAGEMENT_MODEL_PATH or
+            the latest version in MODEL_DIR
+        
+    Returns:
+        EngagementModel: The cached model
+    """
+    path = path or os.getenv("ENGAGEMENT_MODEL_PATH") or latest_model_path()
+    if path is None:
+        raise ValueError(f"No trained engagement model found in {MODEL_DIR}")
+    
+    with _load_lock:
+        if path not in _loaded_models:
+            _loaded_models[path] = EngagementModel.load(path)
+        return _loaded_models[path]
+
+def latest_model_path(model_dir=MODEL_DIR):
+    """
+    Return the directory of the newest saved artifact, or None if there is none
+    """
+    versions = _artifact_versions(model_dir)
+    return os.path.join(model_dir, f"{ARTIFACT_PREFIX}{max(versions)}") if versions else None
+
+def get_engagement_scorer(name=None):
+    """
+    Return the configured engagement scorer
+    
+    Args:
+        name (str): "rules" for the rule-based scorer or "model" for the
+            trained EngagementModel; defaults to the ENGAGEMENT_SCORER
+            environment variable, then "rules"
+        
+    Returns:
+        callable: Function taking a features dict and returning the
+            predict_engagement result dict
+    """
+    name = name or os.getenv("ENGAGEMENT_SCORER", "rules")
+    if name == "rules":
+        return predict_engagement
+    if name == "model":
+        return load_engagement_model().predict_engagement
+    raise ValueError(f"Unknown engagement scorer '{name}'. Use 'rules' or 'model'.")
+
+def _artifact_versions(model_dir):
+    if not os.path.isdir(model_dir):
+        return []
+    return [
+        int(name[len(ARTIFACT_PREFIX):])
+        for name in os.listdir(model_dir)
+        if name.startswith(ARTIFACT_PREFIX) and name[len(ARTIFACT_PREFIX):].isdigit()
+    ]
@@ -0,0 +1,141 @@
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import tracing
+from data_processor import process_video_data, extract_features
+from thumbnails import prefetch_thumbnail
+from utils import get_thread_pool
+from youtube_api import get_video_data, get_trending_shorts
+
+# function is called with the results of the stages named in requires, in order
+Stage = namedtuple('Stage', ['name', 'function', 'requires'])
+
+class StageFailedError(Exception):
+    """Raised by Pipeline.run when a stage raises; wraps the original error."""
+    def __init__(self, stage, error):
+        super().__init__(f"{stage}: {error}")
+        self.stage = stage
+        self.error = error
+
+class Pipeline:
+    """
+    DAG of stages run on the process-wide thread pool (utils.get_thread_pool)
+
+    Every stage starts as soon as the stages it requires have finished, so
+    independent stages (e.g. the video and trending fetches) overlap.
+    Results are yielded as they complete, letting callers show each one
+    without waiting for the rest. If a stage fails, nothing that depends on
+    it is started and stages that have not started yet are cancelled.
+    """
+    def __init__(self, stages):
+        self.stages = list(stages)
+        names = [stage.name for stage in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError("Stage names must be unique")
+        self._check_acyclic()
+
+    def run(self, inputs=None, max_workers=None):
+        """
+        Run the stages, yielding each result as soon as it is ready
+
+        Args:
+            inputs (dict): Values for requirements that are not stages,
+                e.g. {'video_id': ...}
+            max_workers (int): Maximum number of stages running at once;
+                defaults to no limit beyond the size of the shared pool
+
+        Yields:
+            tuple: (stage name, result) in completion order
+
+        Raises:
+            StageFailedError: If a stage raises; remaining stages are
+                cancelled
+        """
+        results = dict(inputs or {})
+        known = set(results) | {stage.name for stage in self.stages}
+        for stage in self.stages:
+            unknown = [name for name in stage.requires if name not in known]
+            if unknown:
+                raise ValueError(f"Stage {stage.name} requires unknown inputs {unknown}")
+
+        pending = [stage for stage in self.stages if stage.name not in results]
+        running = {}
+        # Long-lived pool threads keep their per-thread API clients and
+        # connections from one run to the next
+        executor = get_thread_pool()
+        try:
+            while pending or running:
+                for stage in [stage for stage in pending if all(name in results for name in stage.requires)]:
+                    if max_workers and len(running) >= max_workers:
+                        break
+                    pending.remove(stage)
+                    # Stage spans nest under the caller's trace
+                    function = tracing.in_current_context(stage.function)
+                    running[executor.submit(function, *[results[name] for name in stage.requires])] = stage
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        raise StageFailedError(stage.name, error) from error
+                    results[stage.name] = future.result()
+                    yield stage.name, results[stage.name]
+        finally:
+            # Also reached when the caller stops iterating early; stages not
+            # started yet are cancelled, running ones finish in the
+            # background and their results are dropped
+            for future in running:
+                future.cancel()
+
+    def _check_acyclic(self):
+        requires = {stage.name: stage.requires for stage in self.stages}
+        visiting, visited = set(), set()
+
+        def visit(name, path):
+            if name in visited or name not in requires:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage dependency cycle: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for required in requires[name]:
+                visit(required, path + [name])
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in requires:
+            visit(name, [])
+
+class VideoNotFoundError(LookupError):
+    """Raised by the video_data stage when the video cannot be fetched."""
+
+def fetch_video(video_id):
+    video_data = get_video_data(video_id)
+    if not video_data:
+        raise VideoNotFoundError(video_id)
+    return video_data
+
+def build_analysis_pipeline(predict_engagement):
+    """
+    Build the analyze-video flow of the app
+
+    The trending fetch needs nothing from the analyzed video, so it runs
+    alongside the video fetch, processing and scoring, and the thumbnail
+    is cached while the video is processed and scored. Run it with
+    inputs={'video_id': ...}; stages: video_data, processed_data,
+    features, prediction, thumbnail and trending_videos.
+
+    Args:
+        predict_engagement (callable): Scorer from get_engagement_scorer()
+
+    Returns:
+        Pipeline: The analysis pipeline
+    """
+    return Pipeline([
+        Stage('video_data', fetch_video, ('video_id',)),
+        Stage('processed_data', process_video_data, ('video_data',)),
+        Stage('features', extract_features, ('processed_data',)),
+        Stage('prediction', tracing.traced('predict_engagement')(predict_engagement), ('features',)),
+        Stage('thumbnail', prefetch_thumbnail, ('video_data',)),
+        Stage('trending_videos', get_trending_shorts, ()),
+    ])
@@ -0,0 +1,267 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import tracing
+
+# Quota units charged per call, from the YouTube Data API quota calculator
+ENDPOINT_COSTS = {
+    'search.list': 100,
+    'videos.list': 1,
+    'channels.list': 1,
+    'playlistItems.list': 1,
+    'commentThreads.list': 1,
+}
+DEFAULT_COST = 1
+
+# Lower value = higher priority
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# The daily quota resets at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+# Shortest wait the rate limiter hands out; float rounding can otherwise
+# leave a bucket a hair short of a token and callers spinning on ~0s sleeps
+MIN_WAIT = 0.001
+
+class QuotaExceededError(Exception):
+    """Raised when a call would exceed the daily quota budget."""
+
+class TokenBucket:
+    """
+    Token bucket rate limiter
+
+    Holds up to capacity tokens and refills at rate tokens per second.
+    """
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def try_take(self, reserve=0):
+        """
+        Take one token, leaving at least reserve tokens in the bucket
+
+        Args:
+            reserve (float): Tokens that must remain after taking one
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds (at least
+                MIN_WAIT) to wait before trying again
+        """
+        if self.rate == float('inf'):
+            return 0
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+        if self.tokens - 1 >= reserve:
+            self.tokens -= 1
+            return 0
+        return max(MIN_WAIT, (reserve + 1 - self.tokens) / self.rate)
+
+class QuotaScheduler:
+    """
+    Gatekeeper for every YouTube Data API call
+
+    Tracks quota units against a daily budget and rejects calls up front once
+    the budget would be exceeded. Rate-limits calls with a token bucket and
+    retries 429 and 5xx responses with jittered exponential backoff.
+    Background calls are held back from the last background_reserve units of
+    the budget and from the reserved part of the token bucket, so
+    interactive analysis always goes first.
+
+    clock is the wall clock that decides the quota day; the token bucket
+    runs on monotonic so clock adjustments cannot stall or burst it.
+    """
+    def __init__(self, daily_budget=10000, rate=10, burst=20, background_reserve=0.2,
+                 max_retries=4, base_delay=0.5, max_delay=30,
+                 clock=time.time, sleep=time.sleep, rand=random.random, monotonic=time.monotonic):
+        self.daily_budget = daily_budget
+        self.background_reserve = background_reserve
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self._sleep = sleep
+        self._rand = rand
+        self._bucket = TokenBucket(rate, burst, monotonic)
+        self._lock = threading.Lock()
+        self._day = self._quota_day()
+        self._units_used = 0
+        self._calls = {}
+        self._units = {}
+        self._retries = 0
+        self._rejected = 0
+        self._throttled_seconds = 0.0
+
+    def execute(self, endpoint, call, priority=INTERACTIVE):
+        """
+        Run call() once admitted, retrying transient failures
+
+        Args:
+            endpoint (str): API method, e.g. "videos.list", used for costing
+            call (callable): Zero-argument function performing the request
+            priority (int): INTERACTIVE or BACKGROUND
+
+        Returns:
+            object: Whatever call() returns
+        """
+        attempt = 0
+        while True:
+            wait = self._admit(endpoint, priority)
+            while wait:
+                self._sleep(wait)
+                wait = self._admit(endpoint, priority)
+            try:
+                return call()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+            self._sleep(delay)
+            attempt += 1
+
+    async def execute_async(self, endpoint, call, priority=INTERACTIVE):
+        """
+        Async variant of execute; call() must return an awaitable
+
+        Args:
+            endpoint (str): API method, e.g. "videos.list", used for costing
+            call (callable): Zero-argument function returning a coroutine
+            priority (int): INTERACTIVE or BACKGROUND
+
+        Returns:
+            object: Result of awaiting call()
+        """
+        attempt = 0
+        while True:
+            wait = self._admit(endpoint, priority)
+            while wait:
+                await asyncio.sleep(wait)
+                wait = self._admit(endpoint, priority)
+            try:
+                return await call()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def metrics(self):
+        """
+        Return quota usage counters
+
+        Returns:
+            dict: Budget, units used and remaining today, per-endpoint call
+                and unit counts, retries, rejected calls and total seconds
+                spent waiting on the rate limiter
+        """
+        with self._lock:
+            self._roll_day()
+            return {
+                'daily_budget': self.daily_budget,
+                'units_used': self._units_used,
+                'units_remaining': max(0, self.daily_budget - self._units_used),
+                'calls': dict(self._calls),
+                'units': dict(self._units),
+                'retries': self._retries,
+                'rejected': self._rejected,
+                'throttled_seconds': self._throttled_seconds,
+            }
+
+    def _admit(self, endpoint, priority):
+        """Charge the call if it may run now; otherwise return seconds to wait."""
+        cost = ENDPOINT_COSTS.get(endpoint, DEFAULT_COST)
+        with self._lock:
+            self._roll_day()
+
+            reserve = 0
+            if priority >= BACKGROUND:
+                reserve = self.daily_budget * self.background_reserve
+            if self._units_used + cost > self.daily_budget - reserve:
+                self._rejected += 1
+                raise QuotaExceededError(
+                    f"{endpoint} needs {cost} units but only "
+                    f"{max(0, self.daily_budget - self._units_used - reserve):.0f} are left today"
+                )
+
+            token_reserve = self._bucket.capacity * self.background_reserve if priority >= BACKGROUND else 0
+            wait = self._bucket.try_take(token_reserve)
+            if wait:
+                self._throttled_seconds += wait
+                return wait
+
+            self._units_used += cost
+            self._calls[endpoint] = self._calls.get(endpoint, 0) + 1
+            self._units[endpoint] = self._units.get(endpoint, 0) + cost
+        tracing.record('api_calls')
+        tracing.record('quota_units', cost)
+        return 0
+
+    def _retry_delay(self, error, attempt):
+        """Return the backoff before retrying error, or re-raise it."""
+        status = _status_of(error)
+        if status == 403 and _is_quota_error(error):
+            # The API says the quota is gone whatever we counted
+            with self._lock:
+                self._units_used = max(self._units_used, self.daily_budget)
+            raise QuotaExceededError(f"YouTube API quota exceeded: {error}") from error
+
+        if status is None or not (status == 429 or status >= 500) or attempt >= self.max_retries:
+            raise error
+
+        with self._lock:
+            self._retries += 1
+        # Full jitter: uniform between 0 and the exponential cap
+        return self._rand() * min(self.max_delay, self.base_delay * 2 ** attempt)
+
+    def _quota_day(self):
+        return datetime.fromtimestamp(self._clock(), QUOTA_TIMEZONE).date()
+
+    def _roll_day(self):
+        day = self._quota_day()
+        if day != self._day:
+            self._day = day
+            self._units_used = 0
+            self._calls = {}
+            self._units = {}
+
+def _status_of(error):
+    resp = getattr(error, 'resp', None)
+    if resp is not None:
+        return int(resp.status)
+    return getattr(error, 'status', None)
+
+def _is_quota_error(error):
+    content = getattr(error, 'content', b'') or b''
+    if isinstance(content, bytes):
+        content = content.decode('utf-8', 'replace')
+    return 'quota' in content.lower() or 'quota' in str(error).lower()
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_quota_scheduler():
+    """
+    Return the process-wide QuotaScheduler, configured from the environment
+
+    YOUTUBE_DAILY_QUOTA sets the daily budget (default 10000 units) and
+    YOUTUBE_API_RATE / YOUTUBE_API_BURST the token bucket.
+
+    Returns:
+        QuotaScheduler: The shared scheduler
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = QuotaScheduler(
+                daily_budget=int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000")),
+                rate=float(os.getenv("YOUTUBE_API_RATE", "10")),
+                burst=float(os.getenv("YOUTUBE_API_BURST", "20")),
+            )
+        return _scheduler
@@ -0,0 +1,339 @@
+"""
+Nearest-neighbor search for Shorts with similar titles and tags
+
+Each video becomes a sparse TF-IDF vector over hashed features: words of
+its cleaned title and its normalized tags and hashtags (see tag_index),
+with tags weighted higher. IDF comes from the document frequencies of
+the index itself, as of insertion. Vectors are kept as CSR arrays
+(uint32 feature indices, float32 weights).
+
+Stored vectors keep that IDF: only hashed features are stored, not the
+terms, so they cannot be re-weighted as the corpus grows (load() does
+not either). Early videos therefore weight terms that later turn common
+as rare, and even a video's own title scores a little under 1 against
+it. Scores are meant for ranking; rebuild the index from a crawl if its
+early part was indexed against a very different corpus.
+
+For approximate search every vector also gets a 320-bit SimHash: the
+signs of its projections on 320 random hyperplanes, whose ±1
+coefficients are derived from a hash of each feature, so they never need
+to be stored. The signature is cut into 32 bands of 10 bits, each band
+keys a hash table, and a query probes its own bucket plus every bucket
+one bit away in each table. Short bands are needed because titles of
+related Shorts only reach cosine similarities around 0.4-0.6. The videos
+colliding in the most bands are ranked by exact cosine similarity.
+Inserts are incremental and the index saves to a compressed .npz file:
+
+    python similarity.py crawl --days 7 --quota-budget 2000 -o .cache/similar.npz
+    python similarity.py query .cache/similar.npz "easy pasta recipe #cooking"
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from array import array
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+import numpy as np
+
+from tag_index import video_tags
+from text_features import title_features
+from utils import GrowableArray
+
+NUM_FEATURES = 1 << 20
+BANDS = 32
+BAND_BITS = 10
+SIGNATURE_BITS = BANDS * BAND_BITS
+TAG_WEIGHT = 2.0
+# Candidates ranked by exact cosine after the LSH probe
+MAX_CANDIDATES = 2000
+# Metadata kept per video for display
+VIDEO_FIELDS = ('video_id', 'title', 'channel_title', 'published_at', 'view_count', 'like_count', 'comment_count')
+
+WORD_PATTERN = re.compile(r'\w\w+')
+
+@lru_cache(maxsize=262144)
+def _feature(token):
+    """Hashed feature index and the ±1 hyperplane coefficients of a token."""
+    digest = hashlib.blake2b(token.encode('utf-8'), digest_size=4 + SIGNATURE_BITS // 8).digest()
+    index = int.from_bytes(digest[:4], 'little') % NUM_FEATURES
+    signs = np.unpackbits(np.frombuffer(digest[4:], dtype=np.uint8)).astype(np.float32) * 2 - 1
+    return index, signs
+
+def video_terms(video):
+    """
+    Weighted terms of a video: title words, and its tags at TAG_WEIGHT
+
+    Args:
+        video (dict or VideoRecord): Video metadata with title and tags
+
+    Returns:
+        dict: Token -> term frequency weight
+    """
+    terms = {}
+    for word in WORD_PATTERN.findall(title_features(video.get('title') or '').clean_title.casefold()):
+        terms[word] = terms.get(word, 0.0) + 1.0
+    for tag in video_tags(video):
+        terms["#" + tag] = terms.get("#" + tag, 0.0) + TAG_WEIGHT
+    return terms
+
+class SimilarityIndex:
+    """
+    Incremental LSH index of title and tag vectors
+
+    Videos already in the index are skipped on insert. Each vector's IDF
+    is frozen at insertion; see the module docstring.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.videos = []
+        self._doc_ids = {}
+        self._document_frequency = {}
+        self._offsets = GrowableArray(np.int64, [0])
+        self._features = GrowableArray(np.uint32)
+        self._weights = GrowableArray(np.float32)
+        self._signatures = GrowableArray(np.uint8, np.empty((0, (SIGNATURE_BITS + 7) // 8)))
+        self._tables = [{} for _ in range(BANDS)]
+
+    def __len__(self):
+        return len(self.videos)
+
+    def add(self, video):
+        """
+        Insert a video
+
+        Args:
+            video (dict or VideoRecord): Video metadata with video_id, title,
+                tags and the counts in VIDEO_FIELDS
+
+        Returns:
+            bool: True if the video was new to the index
+        """
+        terms = video_terms(video)
+        with self._lock:
+            if video['video_id'] in self._doc_ids:
+                return False
+            for token in terms:
+                self._document_frequency[token] = self._document_frequency.get(token, 0) + 1
+            features, weights, signature = self._vectorize(terms)
+
+            doc_id = len(self.videos)
+            self._doc_ids[video['video_id']] = doc_id
+            self.videos.append({field: video.get(field) for field in VIDEO_FIELDS})
+            self._features.extend(features)
+            self._weights.extend(weights)
+            self._offsets.extend([len(self._features)])
+            self._signatures.extend(signature[None, :])
+            for table, key in zip(self._tables, _band_keys(signature)):
+                table.setdefault(key, array('I')).append(doc_id)
+            return True
+
+    def add_many(self, videos):
+        """
+        Insert videos
+
+        Returns:
+            int: Number of videos new to the index
+        """
+        return sum(self.add(video) for video in videos)
+
+    def query(self, video, k=10, exclude=None):
+        """
+        Approximate top-k most similar indexed videos
+
+        Args:
+            video (dict or VideoRecord): Video to find neighbors of; needs
+                title and tags
+            k (int): Number of neighbors
+            exclude (str): Video ID to leave out, by default the video's own
+
+        Returns:
+            list: (similarity, video metadata dict) pairs, most similar first
+        """
+        exclude = video.get('video_id') if exclude is None else exclude
+        terms = video_terms(video)
+        with self._lock:
+            if not terms or not self.videos:
+                return []
+            features, weights, signature = self._vectorize(terms)
+            candidates = self._candidates(signature)
+            excluded = self._doc_ids.get(exclude)
+            offsets = self._offsets.values()
+            all_features = self._features.values()
+            all_weights = self._weights.values()
+        if excluded is not None:
+            candidates = candidates[candidates != excluded]
+        if not len(candidates):
+            return []
+
+        # Exact cosine: vectors are unit length, so it is the sparse dot product
+        starts, lengths = offsets[candidates], offsets[candidates + 1] - offsets[candidates]
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        owner = np.repeat(np.arange(len(candidates)), lengths)
+        order = np.argsort(features)
+        query_features, query_weights = features[order], weights[order]
+        candidate_features = all_features[positions]
+        slots = np.minimum(np.searchsorted(query_features, candidate_features), len(query_features) - 1)
+        products = np.where(query_features[slots] == candidate_features, query_weights[slots] * all_weights[positions], 0)
+        scores = np.bincount(owner, weights=products, minlength=len(candidates))
+
+        top = np.argsort(-scores, kind='stable')[:k]
+        return [(float(scores[i]), dict(self.videos[candidates[i]])) for i in top if scores[i] > 0]
+
+    def save(self, path):
+        """Write the index to a compressed .npz file; hash tables are rebuilt on load."""
+        with self._lock:
+            arrays = {
+                'videos': _encode_json(self.videos),
+                'document_frequency': _encode_json(self._document_frequency),
+                'offsets': self._offsets.values().copy(),
+                'features': self._features.values().copy(),
+                'weights': self._weights.values().copy(),
+                'signatures': self._signatures.values().copy(),
+            }
+        # Write-then-rename so a crash never leaves a torn file
+        with open(path + ".tmp", "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save()."""
+        with np.load(path) as data:
+            index = cls()
+            index.videos = _decode_json(data['videos'])
+            index._document_frequency = _decode_json(data['document_frequency'])
+            index._offsets = GrowableArray(np.int64, data['offsets'])
+            index._features = GrowableArray(np.uint32, data['features'])
+            index._weights = GrowableArray(np.float32, data['weights'])
+            signatures = data['signatures']
+            index._signatures = GrowableArray(np.uint8, signatures)
+
+        index._doc_ids = {video['video_id']: doc_id for doc_id, video in enumerate(index.videos)}
+        keys = _band_keys(signatures) if len(signatures) else np.empty((0, BANDS), dtype=np.int64)
+        for band, table in enumerate(index._tables):
+            # Group document IDs by key with one sort per band
+            order = np.argsort(keys[:, band], kind='stable')
+            sorted_keys = keys[order, band]
+            boundaries = np.flatnonzero(np.diff(sorted_keys)) + 1
+            for key, doc_ids in zip(sorted_keys[np.r_[0, boundaries]] if len(order) else (), np.split(order.astype(np.uint32), boundaries)):
+                table[int(key)] = array('I', doc_ids.tobytes())
+        return index
+
+    def _vectorize(self, terms):
+        # Callers hold self._lock
+        total = len(self.videos) + 1
+        vector = {}
+        signs = np.zeros(SIGNATURE_BITS, dtype=np.float32)
+        for token, frequency in terms.items():
+            idf = math.log((1 + total) / (1 + self._document_frequency.get(token, 0))) + 1
+            index, coefficients = _feature(token)
+            weight = (1 + math.log(frequency)) * idf
+            vector[index] = vector.get(index, 0.0) + weight
+            signs += weight * coefficients
+        features = np.fromiter(vector, dtype=np.uint32, count=len(vector))
+        weights = np.fromiter(vector.values(), dtype=np.float32, count=len(vector))
+        weights /= max(np.linalg.norm(weights), 1e-12)
+        return features, weights, np.packbits(signs > 0)
+
+    def _candidates(self, signature):
+        # Callers hold self._lock. Probes each band's bucket and the buckets
+        # one bit away; videos colliding in more bands come first
+        found = []
+        for table, key in zip(self._tables, _band_keys(signature)):
+            for probe in (key, *(key ^ (1 << bit) for bit in range(BAND_BITS))):
+                bucket = table.get(probe)
+                if bucket:
+                    found.append(np.frombuffer(bucket, dtype=np.uint32))
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        # bincount beats sorting the probed IDs once they run into the 100k
+        collisions = np.bincount(np.concatenate(found), minlength=len(self.videos))
+        candidates = np.flatnonzero(collisions)
+        collisions = collisions[candidates]
+        if len(candidates) > MAX_CANDIDATES:
+            candidates = candidates[np.argpartition(-collisions, MAX_CANDIDATES)[:MAX_CANDIDATES]]
+        return candidates.astype(np.int64)
+
+def _band_keys(signatures):
+    """Hash table keys of packed signatures: one row of BANDS ints per signature."""
+    bits = np.unpackbits(np.atleast_2d(signatures), axis=1)[:, :SIGNATURE_BITS]
+    keys = bits.reshape(len(bits), BANDS, BAND_BITS).astype(np.int64) @ (1 << np.arange(BAND_BITS))
+    return keys[0].tolist() if np.ndim(signatures) == 1 else keys
+
+def _encode_json(value):
+    return np.frombuffer(json.dumps(value).encode('utf-8'), dtype=np.uint8)
+
+def _decode_json(data):
+    return json.loads(data.tobytes().decode('utf-8'))
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_similarity_index():
+    """
+    Return the process-wide similarity index, loading SIMILARITY_INDEX_PATH if set
+
+    Returns:
+        SimilarityIndex: The shared index
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            path = os.getenv("SIMILARITY_INDEX_PATH", "")
+            _index = SimilarityIndex.load(path) if path and os.path.exists(path) else SimilarityIndex()
+        return _index
+
+def index_videos(videos):
+    """
+    Insert videos into the shared index, saving it to SIMILARITY_INDEX_PATH if anything changed
+
+    Returns:
+        SimilarityIndex: The shared index
+    """
+    index = get_similarity_index()
+    path = os.getenv("SIMILARITY_INDEX_PATH", "")
+    if index.add_many(videos) and path:
+        try:
+            index.save(path)
+        except OSError as e:
+            print(f"Error saving similarity index: {e}")
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the similar-Shorts index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    crawl_parser = commands.add_parser("crawl", help="Index Shorts from the trending crawl")
+    crawl_parser.add_argument("-o", "--output", required=True, help="Index file, extended if it exists")
+    crawl_parser.add_argument("--days", type=int, default=7, help="Publish days to crawl")
+    crawl_parser.add_argument("--quota-budget", type=int, default=2000)
+    crawl_parser.add_argument("--save-every", type=int, default=1000, help="Videos between saves")
+    query_parser = commands.add_parser("query", help="Find Shorts similar to a title with optional #hashtags")
+    query_parser.add_argument("index")
+    query_parser.add_argument("title")
+    query_parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "query":
+        index = SimilarityIndex.load(args.index)
+        for similarity, video in index.query({'title': args.title, 'tags': []}, args.k):
+            print(f"{similarity:.3f}  {video['video_id']}  {video['title']}")
+        return
+
+    from youtube_api import crawl_trending_shorts
+
+    index = SimilarityIndex.load(args.output) if os.path.exists(args.output) else SimilarityIndex()
+    added = 0
+    for video in crawl_trending_shorts(datetime.now(timezone.utc) - timedelta(days=args.days), quota_budget=args.quota_budget):
+        added += index.add(video)
+        if added and added % args.save_every == 0:
+            index.save(args.output)
+    index.save(args.output)
+    print(f"Indexed {added} new videos; {len(index)} videos")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,508 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+
+import numpy as np
+
+DEFAULT_BUCKETS = 64
+# Compact a partition once it holds this many files
+COMPACT_MIN_FILES = 8
+# Seconds between background compactions started by get_snapshot_store;
+# 0 disables them
+COMPACT_INTERVAL = float(os.getenv("SNAPSHOT_COMPACT_INTERVAL", "300"))
+# Seconds buffered observations wait before a background flush writes
+# them; a buffer of FLUSH_ROWS rows is flushed at once
+FLUSH_INTERVAL = float(os.getenv("SNAPSHOT_FLUSH_INTERVAL", "5"))
+FLUSH_ROWS = 10000
+ROW_GROUP_SIZE = 65536
+SECONDS_PER_DAY = 86400
+
+class ParquetSnapshotStore:
+    """
+    Append-only store of view/like/comment observations over time
+
+    Rows (video_id, observed_at, views, likes, comments) are written to
+    Parquet files partitioned by a hash bucket of the video ID and by UTC
+    day:
+
+        root/bucket=007/day=2026-10-17/part-....parquet
+
+    Video IDs are dictionary-encoded and every file is sorted by video ID
+    and time, so reading one video's history only opens the files of its
+    bucket within the requested days and skips row groups by statistics.
+    Every append writes new files, so nothing is ever loaded in full;
+    compact() merges the small files of a partition into one and can run
+    in a background thread, which appends wake early once a partition has
+    collected COMPACT_MIN_FILES new files. Reads drop duplicate
+    observations, so a read racing a compaction never sees a row twice.
+
+    append_items_later() is for request paths: it only buffers rows, and a
+    background thread writes the buffer every FLUSH_INTERVAL seconds as one
+    append, so a burst of small fetches becomes one file per partition
+    rather than one per fetch. read() flushes the buffer first.
+    """
+    def __init__(self, root, num_buckets=None):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.num_buckets = self._load_layout(num_buckets)
+        self._compact_lock = threading.Lock()
+        self._compactor = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        # Files appended per partition since it was last compacted
+        self._new_files = {}
+        self._new_files_lock = threading.Lock()
+        self._compact_min_files = COMPACT_MIN_FILES
+        self.flush_interval = FLUSH_INTERVAL
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        self._flush_wake = threading.Event()
+        self._closed = False
+
+    def append(self, video_ids, observed_at, views, likes, comments):
+        """
+        Append observations
+
+        Args:
+            video_ids (list): Video IDs
+            observed_at (array-like): Observation times, seconds since the
+                epoch (UTC), one per row or a single value for all rows
+            views (array-like): View counts
+            likes (array-like): Like counts
+            comments (array-like): Comment counts
+
+        Returns:
+            int: Number of rows written
+        """
+        import pyarrow as pa
+
+        video_ids = list(video_ids)
+        n = len(video_ids)
+        if not n:
+            return 0
+        observed_at = np.broadcast_to(np.asarray(observed_at, dtype=np.float64), (n,))
+        views = np.asarray(views, dtype=np.int64)
+        likes = np.asarray(likes, dtype=np.int64)
+        comments = np.asarray(comments, dtype=np.int64)
+
+        buckets = np.fromiter((self.bucket_of(video_id) for video_id in video_ids), dtype=np.int64, count=n)
+        days = (observed_at // SECONDS_PER_DAY).astype(np.int64)
+        partitions = buckets * 1000000 + days
+        ids = np.array(video_ids, dtype=object)
+
+        for partition in np.unique(partitions):
+            rows = np.flatnonzero(partitions == partition)
+            # Sorted by ID, then time, so row-group statistics prune reads
+            rows = rows[np.lexsort((observed_at[rows], ids[rows].astype(str)))]
+            table = pa.table({
+                'video_id': pa.array(ids[rows].tolist(), pa.string()).dictionary_encode(),
+                'observed_at': pa.array((observed_at[rows] * 1000).astype(np.int64), pa.timestamp('ms', tz='UTC')),
+                'views': pa.array(views[rows]),
+                'likes': pa.array(likes[rows]),
+                'comments': pa.array(comments[rows]),
+            })
+            partition_dir = self._partition_dir(int(partition // 1000000), int(partition % 1000000))
+            self._write(partition_dir, table, "part")
+            with self._new_files_lock:
+                self._new_files[partition_dir] = self._new_files.get(partition_dir, 0) + 1
+                if self._new_files[partition_dir] >= self._compact_min_files:
+                    self._wake.set()
+        return n
+
+    def append_items(self, items, observed_at=None):
+        """
+        Append the statistics of videos().list items
+
+        Args:
+            items (list): Video resources with a statistics part
+            observed_at (float): Observation time; defaults to now
+
+        Returns:
+            int: Number of rows written
+        """
+        items = [item for item in items if 'statistics' in item]
+        return self.append(
+            [item['id'] for item in items],
+            time.time() if observed_at is None else observed_at,
+            [int(item['statistics'].get('viewCount', 0)) for item in items],
+            [int(item['statistics'].get('likeCount', 0)) for item in items],
+            [int(item['statistics'].get('commentCount', 0)) for item in items],
+        )
+
+    def append_items_later(self, items, observed_at=None):
+        """
+        Buffer the statistics of videos().list items for a background append
+
+        Returns at once; the rows are written by the next flush().
+
+        Args:
+            items (list): Video resources with a statistics part
+            observed_at (float): Observation time; defaults to now
+
+        Returns:
+            int: Number of rows buffered
+        """
+        observed_at = time.time() if observed_at is None else observed_at
+        rows = [
+            (item['id'], observed_at, int(item['statistics'].get('viewCount', 0)),
+             int(item['statistics'].get('likeCount', 0)), int(item['statistics'].get('commentCount', 0)))
+            for item in items if 'statistics' in item
+        ]
+        if not rows:
+            return 0
+        with self._pending_lock:
+            self._pending.extend(rows)
+            if len(self._pending) >= FLUSH_ROWS:
+                self._flush_wake.set()
+        self._start_flusher()
+        return len(rows)
+
+    def flush(self):
+        """
+        Write the rows buffered by append_items_later
+
+        Returns:
+            int: Number of rows written
+        """
+        # Serialized, so rows of one flush are written before the next
+        # flush's and a read after flush() sees everything buffered before it
+        with self._flush_lock:
+            with self._pending_lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            video_ids, observed_at, views, likes, comments = zip(*rows)
+            return self.append(video_ids, observed_at, views, likes, comments)
+
+    def close(self):
+        """Stop the background threads and flush what is buffered."""
+        self._closed = True
+        self._flush_wake.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+        self.stop_background_compaction()
+
+    def read(self, video_ids, start=None, end=None):
+        """
+        Read the observations of some videos within a time range
+
+        Args:
+            video_ids (str or list): Video ID or IDs
+            start (float): Earliest observation time (inclusive), seconds
+                since the epoch; None for no bound
+            end (float): Latest observation time (exclusive); None for no
+                bound
+
+        Returns:
+            pd.DataFrame: Columns video_id, observed_at, views, likes and
+                comments, sorted by video and time, without duplicates
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        self.flush()
+        video_ids = [video_ids] if isinstance(video_ids, str) else list(video_ids)
+        condition = ds.field('video_id').isin(video_ids)
+        if start is not None:
+            condition &= ds.field('observed_at') >= pa.scalar(int(start * 1000), pa.timestamp('ms', tz='UTC'))
+        if end is not None:
+            condition &= ds.field('observed_at') < pa.scalar(int(end * 1000), pa.timestamp('ms', tz='UTC'))
+
+        buckets = {self.bucket_of(video_id) for video_id in video_ids}
+        for attempt in range(3):
+            paths = [path for bucket in buckets for path in self._files(bucket, start, end)]
+            if not paths:
+                return _empty_frame()
+            try:
+                table = ds.dataset(paths, format='parquet').to_table(filter=condition)
+                break
+            except FileNotFoundError:
+                # A compaction replaced some files after they were listed
+                if attempt == 2:
+                    raise
+        return _sorted_unique(table.to_pandas())
+
+    def velocity(self, video_ids, start=None, end=None):
+        """
+        Read observations with instantaneous velocity and acceleration
+
+        Velocities are per day between consecutive observations of a video;
+        accelerations are the change in view velocity per day. Both are NaN
+        where there is no earlier observation to compare with.
+
+        Args:
+            video_ids (str or list): Video ID or IDs
+            start (float): Earliest observation time, seconds since the epoch
+            end (float): Latest observation time (exclusive)
+
+        Returns:
+            pd.DataFrame: read() columns plus view_velocity, like_velocity,
+                comment_velocity and view_acceleration
+        """
+        df = self.read(video_ids, start, end)
+        seconds = df['observed_at'].to_numpy(dtype='datetime64[ms]').astype(np.int64) / 1000
+        ids = df['video_id'].astype(str).to_numpy()
+        for column, name in [('views', 'view'), ('likes', 'like'), ('comments', 'comment')]:
+            df[f'{name}_velocity'] = compute_velocity(ids, seconds, df[column].to_numpy())
+        df['view_acceleration'] = compute_acceleration(ids, seconds, df['view_velocity'].to_numpy())
+        return df
+
+    def compact(self, min_files=COMPACT_MIN_FILES):
+        """
+        Merge the files of every partition with at least min_files of them
+
+        Args:
+            min_files (int): Partitions with fewer files are left alone
+
+        Returns:
+            int: Number of partitions compacted
+        """
+        import pyarrow.dataset as ds
+
+        compacted = 0
+        with self._compact_lock:
+            for partition_dir in self._partition_dirs():
+                paths = self._parquet_files(partition_dir)
+                if len(paths) < min_files:
+                    continue
+                lock_path = os.path.join(partition_dir, ".compacting")
+                try:
+                    # Keeps other processes off this partition
+                    lock = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                except FileExistsError:
+                    continue
+                try:
+                    import pyarrow as pa
+
+                    df = _sorted_unique(ds.dataset(paths, format='parquet').to_table().to_pandas())
+                    table = pa.Table.from_pandas(df, preserve_index=False)
+                    self._write(partition_dir, table, "compact")
+                    for path in paths:
+                        os.remove(path)
+                    with self._new_files_lock:
+                        self._new_files.pop(partition_dir, None)
+                    compacted += 1
+                finally:
+                    os.close(lock)
+                    os.remove(lock_path)
+        return compacted
+
+    def start_background_compaction(self, interval=300, min_files=COMPACT_MIN_FILES):
+        """
+        Run compact() every interval seconds in a daemon thread
+
+        Appends wake the thread early once a partition has collected
+        COMPACT_MIN_FILES new files.
+
+        Args:
+            interval (float): Seconds between compactions
+            min_files (int): Passed to compact()
+
+        Returns:
+            threading.Thread: The compaction thread
+        """
+        if self._compactor is None or not self._compactor.is_alive():
+            self._stop.clear()
+            self._compact_min_files = min_files
+
+            def run():
+                while not self._stop.is_set():
+                    self._wake.wait(interval)
+                    self._wake.clear()
+                    if self._stop.is_set():
+                        break
+                    try:
+                        self.compact(min_files)
+                    except Exception as e:
+                        print(f"Snapshot compaction failed: {e}")
+
+            self._compactor = threading.Thread(target=run, daemon=True, name="snapshot-compaction")
+            self._compactor.start()
+        return self._compactor
+
+    def stop_background_compaction(self):
+        """Stop the thread started by start_background_compaction."""
+        self._stop.set()
+        self._wake.set()
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def _start_flusher(self):
+        if self._flusher is not None or self._closed:
+            return
+        # Not _flush_lock, which a running flush holds while it writes
+        with self._pending_lock:
+            if self._flusher is not None:
+                return
+
+            def run():
+                while not self._closed:
+                    self._flush_wake.wait(self.flush_interval)
+                    self._flush_wake.clear()
+                    try:
+                        self.flush()
+                    except Exception as e:
+                        print(f"Snapshot flush failed: {e}")
+
+            self._flusher = threading.Thread(target=run, daemon=True, name="snapshot-flush")
+            self._flusher.start()
+            # The thread is a daemon, so write what is left at exit
+            atexit.register(self.flush)
+
+    def bucket_of(self, video_id):
+        return zlib.crc32(video_id.encode('utf-8')) % self.num_buckets
+
+    def _load_layout(self, num_buckets):
+        # The bucket count is fixed per store, since it decides where rows live
+        layout_path = os.path.join(self.root, "layout.json")
+        if os.path.exists(layout_path):
+            with open(layout_path) as f:
+                return json.load(f)['num_buckets']
+        num_buckets = num_buckets or DEFAULT_BUCKETS
+        with open(layout_path + ".tmp", "w") as f:
+            json.dump({'num_buckets': num_buckets}, f)
+        os.replace(layout_path + ".tmp", layout_path)
+        return num_buckets
+
+    def _partition_dir(self, bucket, day):
+        day_name = datetime.fromtimestamp(day * SECONDS_PER_DAY, timezone.utc).strftime("%Y-%m-%d")
+        return os.path.join(self.root, f"bucket={bucket:03d}", f"day={day_name}")
+
+    def _partition_dirs(self):
+        for bucket_name in sorted(os.listdir(self.root)):
+            bucket_dir = os.path.join(self.root, bucket_name)
+            if bucket_name.startswith("bucket=") and os.path.isdir(bucket_dir):
+                for day_name in sorted(os.listdir(bucket_dir)):
+                    yield os.path.join(bucket_dir, day_name)
+
+    def _files(self, bucket, start, end):
+        bucket_dir = os.path.join(self.root, f"bucket={bucket:03d}")
+        if not os.path.isdir(bucket_dir):
+            return []
+        first_day = None if start is None else datetime.fromtimestamp(start, timezone.utc).strftime("%Y-%m-%d")
+        last_day = None if end is None else datetime.fromtimestamp(end, timezone.utc).strftime("%Y-%m-%d")
+        paths = []
+        for day_name in os.listdir(bucket_dir):
+            day = day_name.removeprefix("day=")
+            if (first_day is None or day >= first_day) and (last_day is None or day <= last_day):
+                paths.extend(self._parquet_files(os.path.join(bucket_dir, day_name)))
+        return paths
+
+    @staticmethod
+    def _parquet_files(partition_dir):
+        return sorted(
+            os.path.join(partition_dir, name) for name in os.listdir(partition_dir)
+            if name.endswith(".parquet")
+        )
+
+    @staticmethod
+    def _write(partition_dir, table, prefix):
+        import pyarrow.parquet as pq
+
+        os.makedirs(partition_dir, exist_ok=True)
+        path = os.path.join(partition_dir, f"{prefix}-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet")
+        # Write-then-rename so readers never see a partial file
+        pq.write_table(table, path + ".tmp", row_group_size=ROW_GROUP_SIZE)
+        os.replace(path + ".tmp", path)
+
+def compute_velocity(video_ids, seconds, counts):
+    """
+    Per-day rate of change between consecutive observations of each video
+
+    Args:
+        video_ids (np.ndarray): Video ID per row, rows grouped by video
+        seconds (np.ndarray): Observation times, ascending within a video
+        counts (np.ndarray): Counts at each observation
+
+    Returns:
+        np.ndarray: float64 velocity per row, NaN on each video's first row
+    """
+    velocity = np.full(len(counts), np.nan)
+    if len(counts) > 1:
+        same_video = video_ids[1:] == video_ids[:-1]
+        elapsed_days = np.diff(seconds) / SECONDS_PER_DAY
+        valid = same_video & (elapsed_days > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            velocity[1:] = np.where(valid, np.diff(counts.astype(np.float64)) / elapsed_days, np.nan)
+    return velocity
+
+def compute_acceleration(video_ids, seconds, velocity):
+    """
+    Per-day change of a velocity from compute_velocity
+
+    Each velocity belongs to the midpoint of its observation interval, so
+    the change is divided by the time between consecutive midpoints.
+
+    Args:
+        video_ids (np.ndarray): Video ID per row, rows grouped by video
+        seconds (np.ndarray): Observation times, ascending within a video
+        velocity (np.ndarray): Velocities from compute_velocity
+
+    Returns:
+        np.ndarray: float64 acceleration per row, NaN where undefined
+    """
+    acceleration = np.full(len(velocity), np.nan)
+    if len(velocity) > 2:
+        same_video = (video_ids[2:] == video_ids[1:-1]) & (video_ids[1:-1] == video_ids[:-2])
+        midpoint_days = (seconds[2:] - seconds[:-2]) / 2 / SECONDS_PER_DAY
+        with np.errstate(divide='ignore', invalid='ignore'):
+            acceleration[2:] = np.where(
+                same_video & (midpoint_days > 0), (velocity[2:] - velocity[1:-1]) / midpoint_days, np.nan
+            )
+    return acceleration
+
+def _sorted_unique(df):
+    df = df.sort_values(
+        ['video_id', 'observed_at'], kind='stable',
+        key=lambda column: column.astype(str) if column.name == 'video_id' else column
+    )
+    return df.drop_duplicates(['video_id', 'observed_at']).reset_index(drop=True)
+
+def _empty_frame():
+    import pandas as pd
+
+    return pd.DataFrame({
+        'video_id': pd.Series(dtype=str),
+        'observed_at': pd.Series(dtype='datetime64[ms, UTC]'),
+        'views': pd.Series(dtype=np.int64),
+        'likes': pd.Series(dtype=np.int64),
+        'comments': pd.Series(dtype=np.int64),
+    })
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_snapshot_store():
+    """
+    Return the process-wide snapshot store, creating it on first use
+
+    Recording snapshots is opt-in: set SNAPSHOT_STORE_PATH to a directory
+    to keep an observation every time video statistics are fetched. The
+    store compacts itself in the background every SNAPSHOT_COMPACT_INTERVAL
+    seconds, and sooner when appends pile up small files.
+
+    Returns:
+        ParquetSnapshotStore: The shared store, or None if disabled
+    """
+    global _store
+    path = os.getenv("SNAPSHOT_STORE_PATH", "")
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None or _store.root != path:
+            if _store is not None:
+                _store.close()
+            _store = ParquetSnapshotStore(path)
+            if COMPACT_INTERVAL > 0:
+                _store.start_background_compaction(COMPACT_INTERVAL)
+        return _store
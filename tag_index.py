@@ -0,0 +1,441 @@
+"""
+Inverted index from tags and hashtags to videos
+
+Tags and title/description hashtags are normalized ("#Cooking Tips" and
+"cooking tips" are the same tag) and interned to integer IDs. Each video
+gets an integer document ID; the index keeps, per tag, a sorted posting
+list of document IDs, and per video its tag IDs in CSR form (one flat
+uint32 array plus offsets). Document and trending frequencies per tag are
+kept up to date on every add, so:
+
+- co_occurring(tag): tags that appear with tag, with their lift
+- trending_tags(): tags over-represented among trending videos
+- tag_stats(tag): frequency, trending lift and trending rank of a tag
+
+are answered with a few vectorized NumPy passes, in milliseconds on a
+1M-video corpus. The trending crawl can feed it incrementally:
+
+    python tag_index.py crawl --days 7 --quota-budget 2000 -o .cache/tags.npz
+    python tag_index.py query .cache/tags.npz cooking
+"""
+import argparse
+import os
+import threading
+from array import array
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from text_features import HASHTAG_PATTERN, title_features
+from utils import GrowableArray
+from video_record import parse_published_at
+
+# Videos gaining at least this many views per day count as trending when
+# the caller does not say
+TRENDING_VIEWS_PER_DAY = float(os.getenv("TAG_TRENDING_VIEWS_PER_DAY", "50000"))
+# Tags on fewer videos than this are left out of lift rankings
+MIN_SUPPORT = 5
+# Trending lift compares against the rest of the corpus, so it needs at
+# least this many non-trending videos to mean anything
+MIN_BASELINE = 50
+
+def normalize_tag(tag):
+    """
+    Canonical form of a tag or hashtag
+
+    Args:
+        tag (str): Tag as written by the creator, with or without '#'
+
+    Returns:
+        str: Case-folded tag with collapsed whitespace, '' if nothing is left
+    """
+    return ' '.join(tag.lstrip('#').casefold().split())
+
+def video_tags(video):
+    """
+    Normalized tags of a video, including hashtags in its title and description
+
+    Args:
+        video (dict or VideoRecord): Video metadata
+
+    Returns:
+        list: Unique tags in first-seen order
+    """
+    tags = list(video.get('tags') or ())
+    tags.extend(title_features(video.get('title') or '').hashtags)
+    description = video.get('description') or ''
+    if '#' in description:
+        tags.extend(HASHTAG_PATTERN.findall(description))
+    return [tag for tag in dict.fromkeys(normalize_tag(tag) for tag in tags) if tag]
+
+def is_trending(video, now=None):
+    """Whether a video gains at least TRENDING_VIEWS_PER_DAY views per day."""
+    published = video['published'] if 'published' in video else parse_published_at(video['published_at'])
+    days_live = max(1, ((now or datetime.utcnow()) - published).days)
+    return video['view_count'] / days_live >= TRENDING_VIEWS_PER_DAY
+
+class TagIndex:
+    """
+    Incrementally built inverted index of video tags
+
+    Videos are only ever added; adding a video that is already indexed
+    can mark it trending but does not change its tags.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tags = []
+        self._tag_ids = {}
+        self.video_ids = []
+        self._doc_ids = {}
+        self._postings = []
+        self._offsets = GrowableArray(np.int64, [0])
+        self._doc_tags = GrowableArray(np.uint32)
+        self._trending = bytearray()
+        self._doc_freq = array('I')
+        self._trending_freq = array('I')
+        self.trending_count = 0
+
+    def __len__(self):
+        return len(self.video_ids)
+
+    def has_baseline(self, min_videos=MIN_BASELINE):
+        """
+        Whether enough non-trending videos are indexed for trending lift
+
+        An index fed only trending lists gives every tag a lift of about
+        1; a crawled index (see main) has the baseline lift needs.
+        """
+        return len(self.video_ids) - self.trending_count >= min_videos
+
+    def add(self, video, trending=None):
+        """
+        Index one video
+
+        Args:
+            video (dict or VideoRecord): Video metadata with video_id, tags
+                and title, and for trending=None view_count and a publish time
+            trending (bool): Whether the video is trending; None to decide
+                with is_trending
+
+        Returns:
+            bool: True if the video was new to the index
+        """
+        if trending is None:
+            trending = is_trending(video)
+        tags = video_tags(video)
+        with self._lock:
+            doc_id = self._doc_ids.get(video['video_id'])
+            if doc_id is not None:
+                if trending and not self._trending[doc_id]:
+                    self._trending[doc_id] = 1
+                    self.trending_count += 1
+                    for tag_id in self._doc_tags.values()[self._offsets.values()[doc_id]:self._offsets.values()[doc_id + 1]]:
+                        self._trending_freq[tag_id] += 1
+                return False
+
+            doc_id = len(self.video_ids)
+            self._doc_ids[video['video_id']] = doc_id
+            self.video_ids.append(video['video_id'])
+            self._trending.append(1 if trending else 0)
+            self.trending_count += bool(trending)
+
+            tag_ids = [self._intern(tag) for tag in tags]
+            for tag_id in tag_ids:
+                self._postings[tag_id].append(doc_id)
+                self._doc_freq[tag_id] += 1
+                if trending:
+                    self._trending_freq[tag_id] += 1
+            self._doc_tags.extend(tag_ids)
+            self._offsets.extend([len(self._doc_tags)])
+            return True
+
+    def add_many(self, videos, trending=None):
+        """
+        Index videos
+
+        Returns:
+            int: Number of videos new to the index
+        """
+        return sum(self.add(video, trending) for video in videos)
+
+    def posting(self, tag):
+        """
+        Document IDs of the videos with a tag
+
+        Args:
+            tag (str): Tag, normalized here
+
+        Returns:
+            np.ndarray: Sorted uint32 document IDs
+        """
+        with self._lock:
+            tag_id = self._tag_ids.get(normalize_tag(tag))
+            if tag_id is None:
+                return np.empty(0, dtype=np.uint32)
+            return np.array(self._postings[tag_id], dtype=np.uint32)
+
+    def videos_with(self, *tags):
+        """Video IDs carrying every one of tags."""
+        docs = None
+        for tag in tags:
+            posting = self.posting(tag)
+            docs = posting if docs is None else np.intersect1d(docs, posting, assume_unique=True)
+        return [self.video_ids[doc_id] for doc_id in (docs if docs is not None else ())]
+
+    def co_occurring(self, tag, top=10, min_count=2):
+        """
+        Tags that appear most often on the same videos as tag
+
+        Lift is how much more often the two tags appear together than they
+        would if they were independent; above 1 means they go together.
+
+        Args:
+            tag (str): Tag to look up
+            top (int): Number of tags to return
+            min_count (int): Ignore tags seen with tag fewer times than this
+
+        Returns:
+            list: Dicts with tag, count and lift, most frequent first
+        """
+        with self._lock:
+            tag_id = self._tag_ids.get(normalize_tag(tag))
+            if tag_id is None:
+                return []
+            docs = np.array(self._postings[tag_id], dtype=np.int64)
+            offsets = self._offsets.values()
+            doc_tags = self._doc_tags.values()
+            doc_freq = np.frombuffer(self._doc_freq.tobytes(), dtype=np.uint32).astype(np.float64)
+            total = len(self.video_ids)
+
+        # Gather the tag lists of every matching video in one pass
+        starts, lengths = offsets[docs], offsets[docs + 1] - offsets[docs]
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        counts = np.bincount(doc_tags[positions], minlength=len(doc_freq))
+        counts[tag_id] = 0
+
+        candidates = np.flatnonzero(counts >= min_count)
+        order = candidates[np.lexsort((candidates, -counts[candidates]))][:top]
+        return [
+            {
+                'tag': self.tags[other],
+                'count': int(counts[other]),
+                'lift': float(counts[other] * total / (len(docs) * doc_freq[other])),
+            }
+            for other in order
+        ]
+
+    def trending_tags(self, top=20, min_support=MIN_SUPPORT):
+        """
+        Tags over-represented among trending videos
+
+        Lift is the share of trending videos with the tag over the share of
+        all videos with it.
+
+        Args:
+            top (int): Number of tags to return
+            min_support (int): Only rank tags on at least this many videos
+
+        Returns:
+            list: Dicts with tag, videos, trending_videos and lift, highest
+                lift first
+        """
+        doc_freq, trending_freq, lift = self._lifts()
+        candidates = np.flatnonzero((doc_freq >= min_support) & (trending_freq > 0))
+        order = candidates[np.lexsort((-trending_freq[candidates], -lift[candidates]))][:top]
+        return [
+            {'tag': self.tags[tag_id], 'videos': int(doc_freq[tag_id]),
+             'trending_videos': int(trending_freq[tag_id]), 'lift': float(lift[tag_id])}
+            for tag_id in order
+        ]
+
+    def tag_stats(self, tag):
+        """
+        Usage of one tag across the corpus
+
+        Args:
+            tag (str): Tag to look up
+
+        Returns:
+            dict: tag, videos, trending_videos, lift (NaN without trending
+                videos) and trending_rank (1 = on the most trending videos,
+                None if on none), or None for an unknown tag
+        """
+        tag_id = self._tag_ids.get(normalize_tag(tag))
+        if tag_id is None:
+            return None
+        doc_freq, trending_freq, lift = self._lifts()
+        trending = int(trending_freq[tag_id])
+        return {
+            'tag': self.tags[tag_id],
+            'videos': int(doc_freq[tag_id]),
+            'trending_videos': trending,
+            'lift': float(lift[tag_id]),
+            'trending_rank': int(np.count_nonzero(trending_freq > trending)) + 1 if trending else None,
+        }
+
+    def known_tag_stats(self, tags):
+        """
+        tag_stats of the tags the index has seen, skipping the others
+
+        A video's own tags can be missing from the index even when the
+        video is indexed, e.g. description hashtags of a video first
+        indexed from a trending list without its description.
+
+        Args:
+            tags (list): Tags to look up
+
+        Returns:
+            list: tag_stats dicts, in the order of tags
+        """
+        return [stats for stats in map(self.tag_stats, tags) if stats is not None]
+
+    def save(self, path):
+        """
+        Write the index to a compressed .npz file
+
+        Only the forward (video -> tags) arrays are stored; posting lists
+        and frequencies are rebuilt on load.
+        """
+        with self._lock:
+            arrays = {
+                'tags': _encode_lines(self.tags),
+                'video_ids': _encode_lines(self.video_ids),
+                'offsets': self._offsets.values().copy(),
+                'doc_tags': self._doc_tags.values().copy(),
+                'trending': np.frombuffer(bytes(self._trending), dtype=np.uint8),
+            }
+        # Write-then-rename so a crash never leaves a torn file
+        with open(path + ".tmp", "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save()."""
+        with np.load(path) as data:
+            tags, video_ids = _decode_lines(data['tags']), _decode_lines(data['video_ids'])
+            offsets, doc_tags, trending = data['offsets'], data['doc_tags'], data['trending']
+
+        index = cls()
+        index.tags = tags
+        index._tag_ids = {tag: tag_id for tag_id, tag in enumerate(tags)}
+        index.video_ids = video_ids
+        index._doc_ids = {video_id: doc_id for doc_id, video_id in enumerate(video_ids)}
+        index._offsets = GrowableArray(np.int64, offsets)
+        index._doc_tags = GrowableArray(np.uint32, doc_tags)
+        index._trending = bytearray(trending.tobytes())
+        index.trending_count = int(trending.sum())
+
+        # A stable sort by tag keeps every posting list in document order
+        docs = np.repeat(np.arange(len(video_ids), dtype=np.uint32), np.diff(offsets))
+        order = np.argsort(doc_tags, kind='stable')
+        bounds = np.searchsorted(doc_tags[order], np.arange(len(tags) + 1))
+        sorted_docs = docs[order]
+        index._postings = [array('I', sorted_docs[bounds[i]:bounds[i + 1]].tobytes()) for i in range(len(tags))]
+        index._doc_freq = array('I', np.diff(bounds).astype(np.uint32).tobytes())
+        trending_freq = np.bincount(doc_tags[trending[docs] == 1], minlength=len(tags)).astype(np.uint32)
+        index._trending_freq = array('I', trending_freq.tobytes())
+        return index
+
+    def _intern(self, tag):
+        tag_id = self._tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = self._tag_ids[tag] = len(self.tags)
+            self.tags.append(tag)
+            self._postings.append(array('I'))
+            self._doc_freq.append(0)
+            self._trending_freq.append(0)
+        return tag_id
+
+    def _lifts(self):
+        with self._lock:
+            doc_freq = np.frombuffer(self._doc_freq.tobytes(), dtype=np.uint32).astype(np.float64)
+            trending_freq = np.frombuffer(self._trending_freq.tobytes(), dtype=np.uint32).astype(np.float64)
+            total, trending_total = len(self.video_ids), self.trending_count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lift = (trending_freq / trending_total) / (doc_freq / total) if trending_total else np.full(len(doc_freq), np.nan)
+        return doc_freq, trending_freq, lift
+
+def _encode_lines(strings):
+    # Normalized tags and video IDs never contain newlines
+    return np.frombuffer('\n'.join(strings).encode('utf-8'), dtype=np.uint8)
+
+def _decode_lines(data):
+    text = data.tobytes().decode('utf-8')
+    return text.split('\n') if text else []
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_tag_index():
+    """
+    Return the process-wide tag index, loading TAG_INDEX_PATH if set
+
+    Returns:
+        TagIndex: The shared index
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            path = os.getenv("TAG_INDEX_PATH", "")
+            _index = TagIndex.load(path) if path and os.path.exists(path) else TagIndex()
+        return _index
+
+def index_videos(videos, trending=None):
+    """
+    Add videos to the shared index, saving it to TAG_INDEX_PATH if anything changed
+
+    Args:
+        videos (iterable): Video metadata
+        trending (bool): Passed to TagIndex.add
+
+    Returns:
+        TagIndex: The shared index
+    """
+    index = get_tag_index()
+    path = os.getenv("TAG_INDEX_PATH", "")
+    if index.add_many(videos, trending) and path:
+        try:
+            index.save(path)
+        except OSError as e:
+            print(f"Error saving tag index: {e}")
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the tag index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    crawl_parser = commands.add_parser("crawl", help="Index Shorts from the trending crawl")
+    crawl_parser.add_argument("-o", "--output", required=True, help="Index file, extended if it exists")
+    crawl_parser.add_argument("--days", type=int, default=7, help="Publish days to crawl")
+    crawl_parser.add_argument("--quota-budget", type=int, default=2000)
+    crawl_parser.add_argument("--save-every", type=int, default=1000, help="Videos between saves")
+    query_parser = commands.add_parser("query", help="Show statistics of tags")
+    query_parser.add_argument("index")
+    query_parser.add_argument("tags", nargs="*")
+    args = parser.parse_args()
+
+    if args.command == "query":
+        index = TagIndex.load(args.index)
+        print(f"{len(index)} videos, {len(index.tags)} tags, {index.trending_count} trending")
+        for tag in args.tags:
+            print(index.tag_stats(tag))
+            for row in index.co_occurring(tag):
+                print(f"  {row['tag']:30s} {row['count']:8d} lift {row['lift']:.2f}")
+        if not args.tags:
+            for row in index.trending_tags():
+                print(f"{row['tag']:30s} {row['trending_videos']:8d}/{row['videos']:<8d} lift {row['lift']:.2f}")
+        return
+
+    from youtube_api import crawl_trending_shorts
+
+    index = TagIndex.load(args.output) if os.path.exists(args.output) else TagIndex()
+    added = 0
+    for video in crawl_trending_shorts(datetime.now(timezone.utc) - timedelta(days=args.days), quota_budget=args.quota_budget):
+        added += index.add(video)
+        if added and added % args.save_every == 0:
+            index.save(args.output)
+    index.save(args.output)
+    print(f"Indexed {added} new videos; {len(index)} videos, {len(index.tags)} tags")
+
+if __name__ == "__main__":
+    main()
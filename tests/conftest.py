@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root, the fake API in benchmarks/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+@pytest.fixture(scope="session")
+def fake_api_url():
+    from fake_api import FakeYouTubeAPI, start_fake_api_thread, synthetic_items
+
+    return start_fake_api_thread(FakeYouTubeAPI(synthetic_items(300)))
+
+@pytest.fixture
+def fake_api(fake_api_url, monkeypatch):
+    """Point the API clients at a local fake YouTube API, without the metadata store."""
+    import youtube_api
+
+    monkeypatch.setenv("YOUTUBE_API_KEY", "test")
+    monkeypatch.setenv("YOUTUBE_API_BASE_URL", fake_api_url)
+    monkeypatch.setenv("METADATA_STORE_PATH", "")
+    youtube_api.reset_youtube_api()
+    yield fake_api_url
+    youtube_api.reset_youtube_api()
@@ -0,0 +1,83 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+
+import bulk_analyze
+import thumbnails
+from fake_api import synthetic_items
+
+def fake_thumbnail(url):
+    from PIL import Image
+
+    output = io.BytesIO()
+    Image.new('RGB', (480, 360), (200, 30, 30)).save(output, 'JPEG')
+    return output.getvalue()
+
+@pytest.fixture
+def thumbnail_cache(tmp_path, monkeypatch):
+    pytest.importorskip("PIL")
+    path = str(tmp_path / "thumbnails")
+    monkeypatch.setenv("THUMBNAIL_CACHE_PATH", path)
+    cache = thumbnails.ThumbnailCache(path, fetch=fake_thumbnail)
+    monkeypatch.setattr(thumbnails, '_cache', cache)
+    yield cache
+    cache.close()
+
+def test_main_warms_thumbnails(fake_api, thumbnail_cache, tmp_path, monkeypatch):
+    items = synthetic_items(300)[:20]
+    input_path = tmp_path / "urls.txt"
+    input_path.write_text("".join(f"https://www.youtube.com/shorts/{item['id']}\n" for item in items))
+    output_path = tmp_path / "results.jsonl"
+    monkeypatch.setattr(sys, 'argv', [
+        "bulk_analyze.py", str(input_path), "-o", str(output_path), "--workers", "1", "--thumbnails",
+    ])
+
+    bulk_analyze.main()
+
+    results = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert [result['status'] for result in results] == ['ok'] * len(items)
+    urls = {item['snippet']['thumbnails']['high']['url'] for item in items}
+    for url in urls:
+        for width in thumbnails.DISPLAY_WIDTHS:
+            assert thumbnail_cache.lookup(url, width) is not None
+    assert thumbnail_cache.stats()['renditions'] == len(urls) * len(thumbnails.DISPLAY_WIDTHS)
+
+def test_run_without_thumbnails_leaves_cache_empty(fake_api, thumbnail_cache, tmp_path):
+    items = synthetic_items(300)[:5]
+    counters = bulk_analyze.run(
+        io.StringIO("".join(f"{item['id']}\n" for item in items)), str(tmp_path / "results.jsonl"),
+        workers=1, progress=None,
+    )
+    assert counters['ok'] == len(items)
+    assert thumbnail_cache.stats()['renditions'] == 0
+
+def test_resume_starts_over_when_the_output_is_gone(fake_api, tmp_path):
+    items = synthetic_items(300)[:6]
+    input_text = "".join(f"{item['id']}\n" for item in items)
+    output_path = str(tmp_path / "results.jsonl")
+    bulk_analyze.run(io.StringIO(input_text), output_path, batch_size=2, workers=1, progress=None)
+    assert os.path.exists(output_path + ".checkpoint")
+
+    os.remove(output_path)
+    counters = bulk_analyze.run(io.StringIO(input_text), output_path, batch_size=2, workers=1, progress=None)
+
+    assert counters['lines'] == counters['ok'] == len(items)
+    with open(output_path) as f:
+        assert [json.loads(line)['video_id'] for line in f] == [item['id'] for item in items]
+
+def test_resume_continues_after_the_checkpoint(fake_api, tmp_path):
+    items = synthetic_items(300)[:6]
+    output_path = str(tmp_path / "results.jsonl")
+    first = "".join(f"{item['id']}\n" for item in items[:4])
+    bulk_analyze.run(io.StringIO(first), output_path, batch_size=2, workers=1, progress=None)
+
+    counters = bulk_analyze.run(
+        io.StringIO("".join(f"{item['id']}\n" for item in items)), output_path, batch_size=2, workers=1, progress=None
+    )
+
+    assert counters['lines'] == len(items)
+    with open(output_path) as f:
+        assert [json.loads(line)['video_id'] for line in f] == [item['id'] for item in items]
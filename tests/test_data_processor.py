@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processor import (
+    FEATURE_COLUMNS, extract_feature_matrix, extract_features, process_video_data, process_video_frame,
+)
+
+def raw_video(i, **overrides):
+    video = {
+        'video_id': f"video{i:06d}",
+        'title': f"Easy pasta recipe {i} 🍝 #cooking #shorts",
+        'description': "",
+        'published_at': (datetime.now() - timedelta(days=i % 40, hours=3)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        'channel_id': "channel",
+        'channel_title': "Channel",
+        'tags': ["cooking", "pasta", "recipe"],
+        'category_id': "26",
+        'thumbnail_url': "",
+        'duration': "PT45S",
+        'view_count': 1000 * (i + 1),
+        'like_count': 50 * i,
+        'comment_count': 3 * i,
+    }
+    video.update(overrides)
+    return video
+
+MIXED_VIDEOS = [
+    raw_video(0),
+    raw_video(1, duration=""),
+    raw_video(2, duration="P1D"),
+    raw_video(3, duration="PT1H2M3S"),
+    raw_video(4, view_count=0, like_count=0, comment_count=0),
+    raw_video(5, view_count=0, like_count=7, comment_count=2),
+    raw_video(6, tags=[]),
+    raw_video(7, tags=None),
+    raw_video(8, title="Why does this work?! 100% real"),
+    raw_video(9, title=""),
+    raw_video(10, published_at=datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")),
+]
+
+def test_frame_matches_row_path():
+    rows = [process_video_data(video) for video in MIXED_VIDEOS]
+    frame = process_video_frame(pd.DataFrame(MIXED_VIDEOS))
+
+    for column in ['clean_title', 'title_length', 'title_word_count', 'has_question_in_title',
+                   'has_exclamation_in_title', 'has_number_in_title', 'has_emoji_in_title', 'tag_count',
+                   'total_tag_length', 'avg_tag_length', 'like_view_ratio', 'comment_view_ratio',
+                   'days_since_published', 'views_per_day', 'duration_seconds']:
+        assert frame[column].tolist() == pytest.approx([row[column] for row in rows]), column
+    assert frame['hashtags'].tolist() == [row['hashtags'] for row in rows]
+
+def test_feature_matrix_matches_extract_features():
+    expected = np.array([
+        [extract_features(process_video_data(video))[column] for column in FEATURE_COLUMNS]
+        for video in MIXED_VIDEOS
+    ], dtype=np.float32)
+    matrix = extract_feature_matrix(process_video_frame(pd.DataFrame(MIXED_VIDEOS)))
+
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (len(MIXED_VIDEOS), len(FEATURE_COLUMNS))
+    np.testing.assert_array_equal(matrix, expected)
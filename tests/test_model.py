@@ -0,0 +1,43 @@
+import random
+
+import numpy as np
+
+from data_processor import FEATURE_COLUMNS
+from model import FACTORS, SCORING_RULES, decode_factors, predict_engagement, predict_engagement_batch, score_rules
+
+def boundary_values(feature):
+    """Every rule bound of feature, with its neighbours on both sides."""
+    values = {0.0}
+    for rule_feature, low, _, high, _, _, _ in SCORING_RULES:
+        if rule_feature == feature:
+            for bound in (low, high):
+                if np.isfinite(bound):
+                    values.update((np.nextafter(bound, -np.inf), bound, np.nextafter(bound, np.inf), bound * 2 + 1))
+    return sorted(values)
+
+def feature_sets(count=5000, seed=0):
+    rng = random.Random(seed)
+    candidates = {column: boundary_values(column) for column in FEATURE_COLUMNS}
+    return [{column: rng.choice(candidates[column]) for column in FEATURE_COLUMNS} for _ in range(count)]
+
+def test_score_rules_matches_batch_on_rule_bounds():
+    features = feature_sets()
+    X = np.array([[data[column] for column in FEATURE_COLUMNS] for data in features], dtype=np.float64)
+    scores, factor_masks = predict_engagement_batch(X)
+
+    for data, score, factor_mask in zip(features, scores, factor_masks):
+        assert score_rules(data) == (score, int(factor_mask))
+
+def test_every_rule_fires_somewhere():
+    features = feature_sets()
+    fired = 0
+    for data in features:
+        fired |= score_rules(data)[1]
+    assert fired == (1 << len(FACTORS)) - 1
+
+def test_predict_engagement_uses_rule_scores():
+    data = feature_sets(1)[0]
+    score, factor_mask = score_rules(data)
+    result = predict_engagement(data)
+    assert result['score'] == score
+    assert result['key_factors'] == decode_factors(factor_mask)
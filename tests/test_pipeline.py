@@ -0,0 +1,85 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import utils
+from pipeline import Pipeline, Stage, StageFailedError
+from utils import get_thread_pool, map_in_pool
+
+@pytest.fixture
+def small_pool(monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="test-worker")
+    monkeypatch.setattr(utils, '_thread_pool', pool)
+    yield pool
+    pool.shutdown(wait=True)
+
+def test_map_in_pool_keeps_order():
+    assert map_in_pool(lambda x: x * x, range(23), max_workers=4) == [x * x for x in range(23)]
+    assert map_in_pool(lambda x: x, [], max_workers=4) == []
+
+def test_map_in_pool_limits_concurrency():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work(_):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.01)
+        with lock:
+            active.pop()
+
+    map_in_pool(work, range(20), max_workers=3)
+    assert max(peak) <= 3
+
+def test_map_in_pool_from_busy_pool_threads_does_not_deadlock(small_pool):
+    # Every pool thread calls map_in_pool, so no thread is free for the lanes
+    futures = [small_pool.submit(map_in_pool, lambda x: x + 1, range(10), 4) for _ in range(2)]
+    for future in futures:
+        assert future.result(timeout=5) == list(range(1, 11))
+
+def test_pipeline_reuses_pool_threads_across_runs():
+    seen = set()
+
+    def record(*_):
+        seen.add(threading.current_thread().name)
+        return True
+
+    pipeline = Pipeline([Stage('a', record, ()), Stage('b', record, ('a',)), Stage('c', record, ('a',))])
+    for _ in range(20):
+        assert dict(pipeline.run()) == {'a': True, 'b': True, 'c': True}
+    assert all(name.startswith("worker") for name in seen)
+    assert len(seen) <= utils.WORKER_THREADS
+    assert get_thread_pool() is get_thread_pool()
+
+def test_pipeline_respects_max_workers(small_pool):
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work(*_):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.pop()
+
+    pipeline = Pipeline([Stage(name, work, ()) for name in "abcd"])
+    assert len(list(pipeline.run(max_workers=1))) == 4
+    assert max(peak) == 1
+
+def test_pipeline_failure_cancels_dependents():
+    calls = []
+
+    def fail():
+        raise ValueError("boom")
+
+    pipeline = Pipeline([Stage('a', fail, ()), Stage('b', lambda a: calls.append(a), ('a',))])
+    with pytest.raises(StageFailedError) as error:
+        list(pipeline.run())
+    assert error.value.stage == 'a'
+    assert not calls
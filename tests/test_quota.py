@@ -0,0 +1,136 @@
+import pytest
+
+from quota import BACKGROUND, INTERACTIVE, MIN_WAIT, QuotaExceededError, QuotaScheduler, TokenBucket
+
+class FakeClock:
+    """Wall and monotonic time that only moves when sleep() is called."""
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class HttpError(Exception):
+    """Stub of googleapiclient's HttpError: status on resp, body on content."""
+    class Response:
+        def __init__(self, status):
+            self.status = status
+
+    def __init__(self, status, content=b''):
+        super().__init__(f"HTTP {status}")
+        self.resp = self.Response(status)
+        self.content = content
+
+class StubTransport:
+    """Call that fails with the queued errors, then returns 'ok'."""
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+def scheduler(clock, **kwargs):
+    return QuotaScheduler(clock=clock, monotonic=clock, sleep=clock.sleep, rand=lambda: 1.0, **kwargs)
+
+def test_token_bucket_refills_at_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+    assert bucket.try_take() == 0
+    assert bucket.try_take() == 0
+    assert bucket.try_take() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.try_take() == 0
+
+def test_token_bucket_wait_is_never_below_min_wait():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=1, clock=clock)
+    bucket.try_take()
+    # Leave the bucket a rounding error short of a whole token
+    clock.now += 0.1 - 1e-12
+    assert bucket.try_take() == MIN_WAIT
+
+def test_scheduler_bucket_ignores_wall_clock_jumps():
+    wall, monotonic = FakeClock(), FakeClock(0.0)
+    quota = QuotaScheduler(rate=1, burst=1, clock=wall, monotonic=monotonic, sleep=monotonic.sleep)
+    quota.execute('videos.list', StubTransport())
+    wall.now -= 3600
+    quota.execute('videos.list', StubTransport())
+    assert monotonic.sleeps == [pytest.approx(1.0)]
+
+def test_execute_waits_for_the_rate_limit():
+    clock = FakeClock()
+    quota = scheduler(clock, rate=5, burst=1)
+    for _ in range(3):
+        assert quota.execute('videos.list', StubTransport()) == 'ok'
+    assert clock.sleeps == [pytest.approx(0.2), pytest.approx(0.2)]
+    assert quota.metrics()['throttled_seconds'] == pytest.approx(0.4)
+
+def test_execute_charges_endpoint_costs():
+    quota = scheduler(FakeClock())
+    quota.execute('search.list', StubTransport())
+    quota.execute('videos.list', StubTransport())
+    metrics = quota.metrics()
+    assert metrics['units_used'] == 101
+    assert metrics['units'] == {'search.list': 100, 'videos.list': 1}
+    assert metrics['calls'] == {'search.list': 1, 'videos.list': 1}
+
+def test_execute_retries_transient_errors_with_backoff():
+    clock = FakeClock()
+    quota = scheduler(clock, base_delay=0.5)
+    transport = StubTransport(HttpError(503), HttpError(429))
+    assert quota.execute('videos.list', transport) == 'ok'
+    assert transport.calls == 3
+    assert clock.sleeps == [0.5, 1.0]
+    assert quota.metrics()['retries'] == 2
+
+def test_execute_gives_up_after_max_retries():
+    quota = scheduler(FakeClock(), max_retries=2)
+    transport = StubTransport(*[HttpError(500)] * 5)
+    with pytest.raises(HttpError):
+        quota.execute('videos.list', transport)
+    assert transport.calls == 3
+
+def test_execute_does_not_retry_client_errors():
+    transport = StubTransport(HttpError(400))
+    with pytest.raises(HttpError):
+        scheduler(FakeClock()).execute('videos.list', transport)
+    assert transport.calls == 1
+
+def test_quota_error_from_api_exhausts_the_budget():
+    quota = scheduler(FakeClock())
+    with pytest.raises(QuotaExceededError):
+        quota.execute('videos.list', StubTransport(HttpError(403, b'{"reason": "quotaExceeded"}')))
+    assert quota.metrics()['units_remaining'] == 0
+
+def test_background_calls_leave_the_reserve_to_interactive_ones():
+    quota = scheduler(FakeClock(), daily_budget=10, background_reserve=0.2)
+    for _ in range(8):
+        quota.execute('videos.list', StubTransport(), priority=BACKGROUND)
+    transport = StubTransport()
+    with pytest.raises(QuotaExceededError):
+        quota.execute('videos.list', transport, priority=BACKGROUND)
+    assert transport.calls == 0
+    quota.execute('videos.list', StubTransport(), priority=INTERACTIVE)
+    quota.execute('videos.list', StubTransport(), priority=INTERACTIVE)
+    with pytest.raises(QuotaExceededError):
+        quota.execute('videos.list', StubTransport(), priority=INTERACTIVE)
+    assert quota.metrics()['rejected'] == 2
+
+def test_budget_resets_at_pacific_midnight():
+    clock = FakeClock()
+    quota = scheduler(clock, daily_budget=1)
+    quota.execute('videos.list', StubTransport())
+    with pytest.raises(QuotaExceededError):
+        quota.execute('videos.list', StubTransport())
+    clock.now += 86400
+    assert quota.execute('videos.list', StubTransport()) == 'ok'
+    assert quota.metrics()['units_used'] == 1
@@ -0,0 +1,98 @@
+import random
+
+import numpy as np
+import pytest
+
+from similarity import SimilarityIndex, video_terms
+
+TOPICS = {
+    'cooking': "pasta sauce garlic dinner recipe oven noodles tomato basil quick".split(),
+    'gaming': "speedrun boss level glitch controller minecraft raid loot quest clutch".split(),
+    'fitness': "workout squat abs cardio stretch gym protein plank sprint routine".split(),
+    'travel': "beach flight hotel mountain island sunset roadtrip hiking passport cruise".split(),
+}
+FILLER = "best easy crazy new daily first ultimate tiny epic simple".split()
+
+def video(video_id, title, tags=()):
+    return {'video_id': video_id, 'title': title, 'tags': list(tags), 'view_count': 1}
+
+def synthetic_corpus(n, seed=0):
+    rng = random.Random(seed)
+    videos = []
+    for i in range(n):
+        topic = rng.choice(sorted(TOPICS))
+        words = rng.sample(TOPICS[topic], 4) + [rng.choice(FILLER)]
+        videos.append(video(f"v{i:05d}", " ".join(words), [topic]))
+    return videos
+
+def brute_force(index, query, k):
+    features, weights, _ = index._vectorize(video_terms(query))
+    vector = dict(zip(features.tolist(), weights.tolist()))
+    offsets, all_features, all_weights = index._offsets.values(), index._features.values(), index._weights.values()
+    scores = []
+    for doc_id, indexed in enumerate(index.videos):
+        start, end = offsets[doc_id], offsets[doc_id + 1]
+        score = sum(vector.get(int(feature), 0.0) * weight
+                    for feature, weight in zip(all_features[start:end], all_weights[start:end]))
+        if indexed['video_id'] != query['video_id'] and score > 0:
+            scores.append((score, indexed['video_id']))
+    return [video_id for _, video_id in sorted(scores, reverse=True)[:k]]
+
+def test_query_ranks_the_closest_titles_first():
+    index = SimilarityIndex()
+    index.add_many([
+        video("same", "garlic pasta dinner recipe", ["cooking"]),
+        video("close", "garlic pasta with tomato", ["cooking"]),
+        video("topic", "protein pancakes recipe", ["cooking"]),
+        video("other", "minecraft speedrun glitch", ["gaming"]),
+    ])
+    results = index.query(video("query", "garlic pasta dinner recipe", ["cooking"]))
+    ids = [result['video_id'] for _, result in results]
+    assert ids[:3] == ["same", "close", "topic"]
+    assert "other" not in ids
+    # Not exactly 1: the indexed vector kept the IDF of its insertion time
+    assert results[0][0] == pytest.approx(1.0, abs=0.05)
+    assert all(a >= b for (a, _), (b, _) in zip(results, results[1:]))
+
+def test_query_excludes_the_video_itself_or_the_given_id():
+    index = SimilarityIndex()
+    index.add_many([video("a", "garlic pasta dinner"), video("b", "garlic pasta lunch")])
+    assert [v['video_id'] for _, v in index.query(video("a", "garlic pasta dinner"))] == ["b"]
+    assert [v['video_id'] for _, v in index.query(video("new", "garlic pasta dinner"), exclude="b")] == ["a"]
+
+def test_add_after_load_and_duplicates(tmp_path):
+    index = SimilarityIndex()
+    index.add_many(synthetic_corpus(200))
+    path = str(tmp_path / "similar.npz")
+    index.save(path)
+
+    loaded = SimilarityIndex.load(path)
+    assert len(loaded) == 200
+    assert not loaded.add(synthetic_corpus(1)[0])
+    assert loaded.add(video("fresh", "volcano lava documentary clip", ["volcano"]))
+    results = loaded.query(video("query", "volcano lava documentary clip", ["volcano"]), k=1)
+    assert results[0][1]['video_id'] == "fresh"
+
+    query = synthetic_corpus(1, seed=7)[0]
+    assert [v['video_id'] for _, v in loaded.query(query)] == [v['video_id'] for _, v in index.query(query)]
+
+def test_save_and_load_empty_index(tmp_path):
+    path = str(tmp_path / "empty.npz")
+    SimilarityIndex().save(path)
+    loaded = SimilarityIndex.load(path)
+    assert len(loaded) == 0
+    assert loaded.query(video("q", "garlic pasta")) == []
+    assert loaded.add(video("a", "garlic pasta"))
+    assert [v['video_id'] for _, v in loaded.query(video("q", "garlic pasta"))] == ["a"]
+
+def test_lsh_recall_against_brute_force():
+    corpus = synthetic_corpus(2000)
+    index = SimilarityIndex()
+    index.add_many(corpus)
+    k = 10
+    recalls = []
+    for query in random.Random(1).sample(corpus, 30):
+        exact = set(brute_force(index, query, k))
+        found = {result['video_id'] for _, result in index.query(query, k)}
+        recalls.append(len(exact & found) / len(exact))
+    assert np.mean(recalls) >= 0.8
@@ -0,0 +1,121 @@
+import time
+
+import numpy as np
+import pytest
+
+import snapshot_store
+from snapshot_store import COMPACT_MIN_FILES, get_snapshot_store
+
+pytest.importorskip("pyarrow")
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("SNAPSHOT_STORE_PATH", str(tmp_path / "snapshots"))
+    monkeypatch.setattr(snapshot_store, '_store', None)
+    store = get_snapshot_store()
+    yield store
+    store.close()
+
+def partition_file_counts(store):
+    return [len(store._parquet_files(partition_dir)) for partition_dir in store._partition_dirs()]
+
+def test_get_snapshot_store_starts_compaction(store):
+    assert store._compactor is not None and store._compactor.is_alive()
+
+def test_file_count_stays_bounded_under_repeated_appends(store):
+    video_ids = [f"video{i:06d}" for i in range(50)]
+    now = time.time()
+    for i in range(40):
+        # One 50-ID statistics fetch, as youtube_api records them
+        store.append(video_ids, now + i, np.arange(50) + i * 100, np.arange(50), np.arange(50))
+
+    deadline = time.time() + 30
+    while max(partition_file_counts(store)) >= COMPACT_MIN_FILES and time.time() < deadline:
+        time.sleep(0.05)
+    assert max(partition_file_counts(store)) < COMPACT_MIN_FILES
+
+    history = store.read(video_ids[0])
+    assert len(history) == 40
+    assert history['views'].tolist() == [i * 100 for i in range(40)]
+
+def test_stop_background_compaction(store):
+    store.stop_background_compaction()
+    assert store._compactor is None
+
+def items(video_ids, views):
+    return [{'id': video_id, 'statistics': {'viewCount': str(views), 'likeCount': '1', 'commentCount': '0'}}
+            for video_id in video_ids]
+
+def test_buffered_appends_write_one_file_per_partition(store):
+    store.flush_interval = 3600
+    video_ids = [f"video{i:06d}" for i in range(3)]
+    now = time.time()
+    for i in range(20):
+        assert store.append_items_later(items(video_ids, i), observed_at=now + i) == 3
+    assert sum(partition_file_counts(store)) == 0
+
+    assert store.flush() == 60
+    partitions = {store._partition_dir(store.bucket_of(video_id), int(now // 86400)) for video_id in video_ids}
+    assert sorted(partition_file_counts(store)) == [1] * len(partitions)
+    assert store.read(video_ids[0])['views'].tolist() == list(range(20))
+
+def test_read_sees_buffered_rows(store):
+    store.flush_interval = 3600
+    store.append_items_later(items(["video000001"], 5))
+    assert store.read("video000001")['views'].tolist() == [5]
+
+def test_background_flush_writes_buffered_rows(store):
+    store.flush_interval = 0.05
+    store.append_items_later(items(["video000001"], 5))
+    deadline = time.time() + 10
+    while not sum(partition_file_counts(store)) and time.time() < deadline:
+        time.sleep(0.02)
+    assert sum(partition_file_counts(store)) == 1
+
+def test_read_bounds_span_days(store):
+    day = 86400
+    start = (time.time() // day - 3) * day
+    times = start + np.array([0, day / 2, day, 2 * day, 2 * day + 10])
+    store.append(["video000001"] * 5, times, np.arange(5), np.zeros(5), np.zeros(5))
+
+    def views(**bounds):
+        return store.read("video000001", **bounds)['views'].tolist()
+
+    assert views() == [0, 1, 2, 3, 4]
+    # start is inclusive, end exclusive
+    assert views(start=start + day, end=start + 2 * day) == [2]
+    assert views(start=start + day / 2) == [1, 2, 3, 4]
+    assert views(end=start + 2 * day + 10) == [0, 1, 2, 3]
+    assert views(start=start + 4 * day) == []
+
+def test_reads_merge_compacted_and_new_files(store):
+    now = time.time()
+    for i in range(3):
+        store.append(["video000001", "video000002"], now + i, [i, 10 + i], [0, 0], [0, 0])
+    assert store.compact(min_files=1) >= 1
+    store.append(["video000001"], now + 3, [3], [0], [0])
+    # Written again, as a read racing a compaction may see it twice
+    store.append(["video000001"], now + 1, [1], [0], [0])
+
+    history = store.read(["video000001", "video000002"])
+    assert history[history['video_id'] == "video000001"]['views'].tolist() == [0, 1, 2, 3]
+    assert history[history['video_id'] == "video000002"]['views'].tolist() == [10, 11, 12]
+
+def test_velocity_and_acceleration_values():
+    day = 86400.0
+    ids = np.array(["a", "a", "a", "b", "b"])
+    seconds = np.array([0, day, 3 * day, 0, day / 2])
+    views = np.array([0, 100, 500, 10, 20])
+
+    velocity = snapshot_store.compute_velocity(ids, seconds, views)
+    np.testing.assert_allclose(velocity, [np.nan, 100, 200, np.nan, 20])
+    # a: from 100/day (midpoint day 0.5) to 200/day (midpoint day 2) over 1.5 days
+    acceleration = snapshot_store.compute_acceleration(ids, seconds, velocity)
+    np.testing.assert_allclose(acceleration, [np.nan, np.nan, 100 / 1.5, np.nan, np.nan])
+
+def test_velocity_from_the_store(store):
+    now = time.time()
+    store.append(["video000001"] * 3, now + np.array([0, 3600, 7200]), [0, 100, 400], [0, 0, 0], [0, 0, 0])
+    df = store.velocity("video000001")
+    np.testing.assert_allclose(df['view_velocity'], [np.nan, 2400, 7200])
+    np.testing.assert_allclose(df['view_acceleration'], [np.nan, np.nan, 4800 * 24])
@@ -0,0 +1,6 @@
+from startup import STARTUP_BUDGET_MS, measure_import
+
+def test_app_imports_within_budget():
+    total, children = measure_import("app", runs=3)
+    slowest = sorted(children.items(), key=lambda item: item[1], reverse=True)[:5]
+    assert total < STARTUP_BUDGET_MS, f"import app took {total:.0f} ms; slowest imports: {slowest}"
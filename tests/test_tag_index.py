@@ -0,0 +1,80 @@
+import pytest
+
+from tag_index import TagIndex, video_tags
+
+def trending_entry(video_id, tags, title="Quick dinner idea"):
+    # Trending results carry no description
+    return {'video_id': video_id, 'title': title, 'tags': tags,
+            'published_at': "2026-01-01T00:00:00Z", 'view_count': 1000}
+
+def test_video_first_indexed_without_description():
+    index = TagIndex()
+    index.add(trending_entry("a", ["cooking", "pasta"]), trending=True)
+    index.add(trending_entry("b", ["cooking"]), trending=False)
+
+    # The full metadata of the same video has description hashtags
+    analyzed = dict(trending_entry("a", ["cooking", "pasta"]), description="Try it tonight #weeknightdinner")
+    assert not index.add(analyzed)
+    own_tags = video_tags(analyzed)
+    assert "weeknightdinner" in own_tags
+    assert index.tag_stats("weeknightdinner") is None
+
+    rows = index.known_tag_stats(own_tags)
+    assert [row['tag'] for row in rows] == ["cooking", "pasta"]
+    assert max(rows, key=lambda row: row['videos'])['tag'] == "cooking"
+
+def test_known_tag_stats_of_unindexed_tags_is_empty():
+    index = TagIndex()
+    index.add(trending_entry("a", ["cooking"]), trending=True)
+    assert index.known_tag_stats(["gardening", "#diy"]) == []
+
+def corpus():
+    """Ten trending videos, all tagged cooking, and forty others."""
+    index = TagIndex()
+    for i in range(10):
+        index.add(trending_entry(f"t{i}", ["cooking", "pasta" if i < 6 else "salad"]), trending=True)
+    for i in range(40):
+        index.add(trending_entry(f"n{i}", ["cooking" if i < 10 else "gaming", "pasta" if i < 4 else "speedrun"]),
+                  trending=False)
+    return index
+
+def test_co_occurring_counts_and_lift():
+    rows = corpus().co_occurring("cooking")
+    assert [(row['tag'], row['count']) for row in rows] == [("pasta", 10), ("speedrun", 6), ("salad", 4)]
+    # pasta: 10 of 20 cooking videos vs 10 of 50 overall
+    assert rows[0]['lift'] == pytest.approx((10 / 20) / (10 / 50))
+    assert corpus().co_occurring("unknown") == []
+
+def test_trending_lift_and_rank():
+    index = corpus()
+    cooking = index.tag_stats("#Cooking")
+    # On all 10 trending videos, on 20 of 50 overall
+    assert cooking['lift'] == pytest.approx((10 / 10) / (20 / 50))
+    assert cooking['trending_rank'] == 1
+    pasta = index.tag_stats("pasta")
+    # On 6 of 10 trending videos, on 10 of 50 overall
+    assert pasta['lift'] == pytest.approx((6 / 10) / (10 / 50))
+    assert pasta['trending_rank'] == 2
+    assert index.tag_stats("gaming")['trending_rank'] is None
+    # salad is on too few videos to be ranked
+    assert [row['tag'] for row in index.trending_tags(min_support=5)] == ["pasta", "cooking"]
+
+def test_save_and_load_round_trip(tmp_path):
+    index = corpus()
+    path = str(tmp_path / "tags.npz")
+    index.save(path)
+    loaded = TagIndex.load(path)
+
+    assert len(loaded) == len(index) and loaded.trending_count == index.trending_count
+    for tag in index.tags:
+        assert loaded.tag_stats(tag) == index.tag_stats(tag)
+        assert loaded.co_occurring(tag) == index.co_occurring(tag)
+    assert loaded.add(trending_entry("new", ["cooking", "pasta"]), trending=True)
+    assert loaded.tag_stats("pasta")['trending_videos'] == 7
+
+def test_trending_only_index_has_no_baseline():
+    index = TagIndex()
+    index.add_many((trending_entry(f"t{i}", ["cooking"]) for i in range(100)), trending=True)
+    index.add(trending_entry("analyzed", ["cooking"]), trending=False)
+    assert not index.has_baseline()
+    assert corpus().has_baseline(min_videos=40)
@@ -0,0 +1,63 @@
+import io
+import os
+import zlib
+
+import pytest
+
+import thumbnails
+
+def fake_thumbnail(url):
+    from PIL import Image
+
+    # A different image per URL, so every URL gets its own files
+    seed = zlib.crc32(url.encode())
+    output = io.BytesIO()
+    Image.new('RGB', (480, 360), (seed & 255, (seed >> 8) & 255, (seed >> 16) & 255)).save(output, 'JPEG')
+    return output.getvalue()
+
+@pytest.fixture
+def cache(tmp_path):
+    pytest.importorskip("PIL")
+    cache = thumbnails.ThumbnailCache(str(tmp_path / "thumbnails"), fetch=fake_thumbnail)
+    yield cache
+    cache.close()
+
+def rendition_files(cache):
+    rows = cache._connection().execute(
+        "SELECT files.digest, files.format FROM renditions JOIN files USING (digest)"
+    ).fetchall()
+    return [cache._file_path(*row) for row in rows]
+
+def test_lookup_forgets_a_deleted_file_and_get_fetches_it_again(cache):
+    url = "https://i.ytimg.com/vi/a/hqdefault.jpg"
+    assert cache.get(url, thumbnails.VIDEO_INFO_WIDTH) is not None
+    for path in rendition_files(cache):
+        os.remove(path)
+
+    assert cache.lookup(url, thumbnails.VIDEO_INFO_WIDTH) is None
+    assert cache.stats()['renditions'] < len(thumbnails.DISPLAY_WIDTHS)
+    assert cache.get(url, thumbnails.VIDEO_INFO_WIDTH) is not None
+    assert all(os.path.exists(path) for path in rendition_files(cache))
+
+def test_concurrent_loads_and_eviction_leave_no_stale_rows(cache):
+    urls = [f"https://i.ytimg.com/vi/{i}/hqdefault.jpg" for i in range(40)]
+    cache.warm(urls[:1])
+    # Room for a handful of files, so most loads evict another load's files
+    cache.max_bytes = 4 * cache.stats()['bytes']
+
+    counts = cache.warm(urls)
+
+    assert counts['failed'] == 0
+    assert cache.stats()['bytes'] <= cache.max_bytes
+    assert all(os.path.exists(path) for path in rendition_files(cache))
+
+def test_unusable_cache_path_falls_back_to_the_url(tmp_path, monkeypatch, capsys):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    monkeypatch.setenv("THUMBNAIL_CACHE_PATH", str(blocker / "thumbnails"))
+    monkeypatch.setattr(thumbnails, '_cache', None)
+    url = "https://i.ytimg.com/vi/a/hqdefault.jpg"
+
+    assert thumbnails.thumbnail(url, thumbnails.VIDEO_INFO_WIDTH) == url
+    assert thumbnails.prefetch_thumbnail({'video_id': 'a', 'thumbnail_url': url}) is None
+    assert "Error" in capsys.readouterr().out
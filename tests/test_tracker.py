@@ -0,0 +1,174 @@
+import pytest
+
+import tracker
+from fake_api import synthetic_items
+from tracker import BATCH_SIZE, MAX_MISSES, MAX_STEP, NOT_FOUND, ShortsTracker, next_interval
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+class FakeFetch:
+    """Answers with views from self.views; IDs not in it are reported missing."""
+    def __init__(self, views=None, units=1):
+        self.views = views or {}
+        self.units = units
+        self.error = None
+        self.batches = []
+
+    def __call__(self, video_ids):
+        self.batches.append(list(video_ids))
+        if self.error is not None:
+            raise self.error
+        videos = [
+            {'video_id': video_id, 'view_count': self.views[video_id], 'like_count': 0, 'comment_count': 0}
+            for video_id in video_ids if video_id in self.views
+        ]
+        missing = {video_id: NOT_FOUND for video_id in video_ids if video_id not in self.views}
+        return videos, missing, self.units
+
+def make_tracker(fetch, clock, **kwargs):
+    return ShortsTracker(fetch=fetch, clock=clock, sleep=clock.sleep, monotonic=clock,
+                         min_interval=60, max_interval=3600, **kwargs)
+
+@pytest.mark.parametrize("views, expected", [
+    (100, 1200),      # no growth: the interval doubles
+    (1000000, 300),   # explosive growth: it halves at most
+    (102, 600),       # growth on target: it stays
+])
+def test_next_interval_moves_at_most_max_step(views, expected):
+    assert next_interval(600, 100, views, 600, min_interval=60, max_interval=3600) == pytest.approx(expected)
+    assert 600 / MAX_STEP <= expected <= 600 * MAX_STEP
+
+def test_next_interval_stays_within_bounds():
+    assert next_interval(3000, 100, 100, 3000, min_interval=60, max_interval=3600) == 3600
+    assert next_interval(100, 100, 1000000, 100, min_interval=60, max_interval=3600) == 60
+    assert next_interval(600, 100, 200, 0, min_interval=60, max_interval=3600) == 600
+
+def test_due_batch_packs_at_most_fifty_ids():
+    clock = FakeClock()
+    shorts = make_tracker(FakeFetch(), clock)
+    shorts.track([f"video{i:03d}" for i in range(120)])
+    sizes = []
+    while batch := shorts.due_batch():
+        sizes.append(len(batch))
+    assert sizes == [BATCH_SIZE, BATCH_SIZE, 20]
+
+def test_due_batch_packs_videos_due_soon_into_a_due_call():
+    clock = FakeClock()
+    shorts = make_tracker(FakeFetch(), clock)
+    start = clock.now
+    shorts.track(["due"], interval=100)
+    clock.now = start + 20
+    shorts.track(["soon"], interval=100)
+    clock.now = start + 50
+    shorts.track(["later"], interval=100)
+
+    assert shorts.due_batch(now=start) == ["due", "soon"]
+    assert shorts.due_batch(now=start) == []
+    assert shorts.due_batch(now=start + 50) == ["later"]
+
+def test_poll_reschedules_by_growth():
+    clock = FakeClock()
+    fetch = FakeFetch({"a": 100})
+    shorts = make_tracker(fetch, clock)
+    shorts.track(["a"], interval=600)
+    shorts.poll(shorts.due_batch())
+    clock.now += 600
+    shorts.poll(shorts.due_batch())
+    assert shorts.videos["a"]['interval'] == 1200
+    assert shorts.videos["a"]['next_poll'] == clock.now + 1200
+
+def test_failed_calls_back_off_exponentially():
+    clock = FakeClock()
+    fetch = FakeFetch({"a": 100})
+    fetch.error = RuntimeError("backend down")
+    shorts = make_tracker(fetch, clock)
+    shorts.track(["a"])
+
+    delays = []
+    for _ in range(3):
+        clock.now = shorts.videos["a"]['next_poll']
+        shorts.poll(shorts.due_batch())
+        delays.append(shorts.videos["a"]['next_poll'] - clock.now)
+    assert delays == [60, 120, 240]
+    assert shorts.metrics()['failed_batches'] == 3
+
+    fetch.error = None
+    clock.now = shorts.videos["a"]['next_poll']
+    assert shorts.poll(shorts.due_batch()) == {"a": (100, 0, 0)}
+    clock.now = shorts.videos["a"]['next_poll'] + 1
+    fetch.error = RuntimeError("down again")
+    shorts.poll(shorts.due_batch())
+    assert shorts.videos["a"]['next_poll'] - clock.now == 60
+
+def test_missing_videos_are_dropped_after_max_misses():
+    clock = FakeClock()
+    shorts = make_tracker(FakeFetch({"kept": 10}), clock)
+    shorts.track(["kept", "gone"])
+    for _ in range(MAX_MISSES):
+        clock.now = max(state['next_poll'] for state in shorts.videos.values())
+        shorts.poll(["kept", "gone"])
+    assert set(shorts.videos) == {"kept"}
+    assert shorts.metrics()['dropped'] == 1
+
+def test_units_count_only_api_calls():
+    clock = FakeClock()
+    fetch = FakeFetch({"a": 1, "b": 2}, units=0)
+    shorts = make_tracker(fetch, clock)
+    shorts.track(["a", "b"])
+    shorts.poll(shorts.due_batch())
+    assert shorts.metrics()['units'] == 0
+    assert shorts.metrics()['batches'] == 1
+
+    fetch.units = 1
+    clock.now += 3600
+    shorts.poll(shorts.due_batch())
+    assert shorts.metrics()['units'] == 1
+
+def test_fetch_statistics_spends_nothing_when_the_store_answers(fake_api, tmp_path, monkeypatch):
+    import metadata_store
+
+    monkeypatch.setenv("METADATA_STORE_PATH", str(tmp_path / "metadata.sqlite3"))
+    monkeypatch.setattr(metadata_store, '_store', None)
+    video_ids = [item['id'] for item in synthetic_items(300)[:3]]
+
+    videos, missing, units = tracker.fetch_statistics(video_ids)
+    assert len(videos) == 3 and not missing and units == 1
+    videos, missing, units = tracker.fetch_statistics(video_ids)
+    assert len(videos) == 3 and units == 0
+
+def test_save_and_load_restore_the_schedule(tmp_path):
+    clock = FakeClock()
+    state_path = str(tmp_path / "tracker.json")
+    shorts = make_tracker(FakeFetch({"a": 100, "b": 5}), clock, state_path=state_path)
+    shorts.track(["a", "b"], interval=300)
+    shorts.poll(shorts.due_batch())
+    shorts.save()
+
+    restarted = make_tracker(FakeFetch(), clock, state_path=state_path)
+    assert restarted.videos == shorts.videos
+    assert restarted.metrics()['polls'] == 2
+    assert restarted.due_batch() == []
+    clock.now += 300
+    assert sorted(restarted.due_batch()) == ["a", "b"]
+
+def test_metrics_report_queue_depth_and_lag():
+    clock = FakeClock()
+    shorts = make_tracker(FakeFetch(), clock)
+    start = clock.now
+    shorts.track(["a"])
+    clock.now = start + 30
+    shorts.track(["b"])
+    clock.now = start + 40
+    metrics = shorts.metrics()
+    assert metrics['tracked'] == 2
+    assert metrics['queue_depth'] == 2
+    assert metrics['lag_seconds'] == 40
+    assert "analyzer_tracker_queue_depth 2" in shorts.render_prometheus()
@@ -0,0 +1,97 @@
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+import trend_stats
+from data_processor import summarize_trending
+from trend_stats import KLLSketch, RunningStats, TrendAggregator
+
+def video(video_id, views, likes=10, comments=1, category_id="22", published_at=None):
+    return {'video_id': video_id, 'view_count': views, 'like_count': likes, 'comment_count': comments,
+            'category_id': category_id, 'published_at': published_at}
+
+def rank_errors(sketch, values):
+    values = np.sort(values)
+    probes = np.quantile(values, np.linspace(0.01, 0.99, 99))
+    exact = np.searchsorted(values, probes, side='right') / len(values)
+    return np.abs(np.array([sketch.rank(probe) for probe in probes]) - exact)
+
+def test_kll_rank_error_is_within_bound():
+    values = np.random.default_rng(0).lognormal(8, 2, 50000)
+    sketch = KLLSketch(k=200, seed=0)
+    for value in values:
+        sketch.update(value)
+    assert rank_errors(sketch, values).max() < 3 * 1.7 / 200
+    assert sum(len(items) for items in sketch.levels) < 4 * 200
+
+def test_kll_merge_matches_one_sketch_over_all_values():
+    rng = np.random.default_rng(1)
+    parts = [rng.lognormal(8, 2, 20000), rng.lognormal(10, 1, 20000)]
+    merged = KLLSketch(k=200, seed=0)
+    for seed, part in enumerate(parts):
+        sketch = KLLSketch(k=200, seed=seed)
+        for value in part:
+            sketch.update(value)
+        merged.merge(sketch)
+    assert merged.n == 40000
+    assert rank_errors(merged, np.concatenate(parts)).max() < 3 * 1.7 / 200
+
+def test_running_stats_merge_matches_numpy():
+    values = [random.Random(2).gauss(100, 15) for _ in range(1000)]
+    left, right = RunningStats(), RunningStats()
+    for value in values[:300]:
+        left.update(value)
+    for value in values[300:]:
+        right.update(value)
+    left.merge(right)
+    assert left.count == 1000
+    assert left.mean == pytest.approx(np.mean(values))
+    assert left.variance == pytest.approx(np.var(values, ddof=1))
+    assert (left.min, left.max) == (min(values), max(values))
+
+def test_aggregator_round_trips_through_json():
+    aggregator = TrendAggregator(k=50)
+    today = datetime.now(timezone.utc).date().isoformat()
+    aggregator.add_many(video(f"v{i}", 1000 * i, published_at=f"{today}T00:00:00Z") for i in range(1, 500))
+    restored = TrendAggregator.from_dict(json.loads(json.dumps(aggregator.to_dict())))
+
+    assert set(restored.groups) == {"all", "category:22", f"day:{today}"}
+    for metric, aggregate in aggregator.get().items():
+        assert restored.get()[metric].summary() == aggregate.summary()
+    probe = video("probe", 250000)
+    assert restored.percentile_ranks(probe) == aggregator.percentile_ranks(probe)
+
+def test_day_groups_expire_and_windows_merge_recent_days():
+    today = datetime.now(timezone.utc).date()
+    aggregator = TrendAggregator(max_window_days=30)
+    for days_ago in (0, 1, 5, 45):
+        day = today - timedelta(days=days_ago)
+        aggregator.add_many([video(f"v{days_ago}", 100 * (days_ago + 1), published_at=f"{day}T12:00:00Z")])
+
+    assert f"day:{today - timedelta(days=45)}" not in aggregator.groups
+    assert aggregator.get()['views'].stats.count == 4
+    assert aggregator.window(2, end=today)['views'].stats.count == 2
+    assert aggregator.window(7, end=today)['views'].stats.count == 3
+
+def test_summarize_trending_uses_exact_medians():
+    trending = [video(f"v{i}", views) for i, views in enumerate([10, 20, 30, 1000000])]
+    summary = summarize_trending(trending)
+    assert summary['count'] == 4
+    assert summary['median_views'] == 25
+    assert summary['avg_views'] == pytest.approx(250015)
+    assert summarize_trending([]) == {'count': 0}
+
+def test_trend_corpus_does_not_recount_after_a_restart(tmp_path, monkeypatch):
+    monkeypatch.setenv("TREND_STATS_PATH", str(tmp_path / "trend.json"))
+    monkeypatch.setattr(trend_stats, '_corpus', None)
+    trending = [video(f"v{i}", 100 * i) for i in range(1, 6)]
+    trend_stats.add_to_trend_corpus(trending)
+
+    # A new process starts from the saved files
+    monkeypatch.setattr(trend_stats, '_corpus', None)
+    corpus = trend_stats.add_to_trend_corpus(trending + [video("v6", 600)])
+
+    assert corpus.get()['views'].stats.count == 6
@@ -0,0 +1,63 @@
+import json
+import urllib.request
+from datetime import datetime, timedelta, timezone
+
+import async_youtube_api
+import youtube_api
+from fake_api import synthetic_items
+from quota import ENDPOINT_COSTS
+
+def test_sync_and_async_trending_have_the_same_shape(fake_api):
+    sync_results = youtube_api.get_trending_shorts(max_results=10, use_cache=False)
+    async_results = async_youtube_api.get_trending_shorts(max_results=10)
+
+    assert sync_results
+    assert async_results == sync_results
+    for video in sync_results:
+        assert video['category_id']
+
+def test_batch_fetches_reuse_clients_across_calls(fake_api, monkeypatch):
+    builds = []
+    build = youtube_api._build_youtube_api
+    monkeypatch.setattr(youtube_api, '_build_youtube_api', lambda api_key: builds.append(api_key) or build(api_key))
+    video_ids = [item['id'] for item in synthetic_items(300)][:200]
+
+    for _ in range(10):
+        videos, missing = youtube_api.get_videos_data(video_ids, max_workers=4)
+        assert len(videos) == 200 and not missing
+    # One client per thread that ever fetched, not one per call
+    assert len(builds) <= 4
+
+def api_requests(fake_api_url, endpoint):
+    base = fake_api_url.split("/youtube/")[0]
+    with urllib.request.urlopen(f"{base}/_stats") as response:
+        return json.load(response)['requests'].get(endpoint, 0)
+
+def crawl_ids(published_after, **kwargs):
+    return [video['video_id'] for video in youtube_api.crawl_trending_shorts(
+        published_after, window=timedelta(days=400), **kwargs
+    )]
+
+def test_crawl_accepts_naive_and_aware_times(fake_api):
+    now = datetime.now(timezone.utc)
+    aware = crawl_ids(now - timedelta(days=365))
+    naive = crawl_ids((now - timedelta(days=365)).replace(tzinfo=None))
+    assert aware and naive == aware
+    assert crawl_ids(now - timedelta(days=365), published_before=now.replace(tzinfo=None)) == aware
+
+def test_crawl_charges_videos_only_for_api_calls(fake_api, tmp_path, monkeypatch):
+    import metadata_store
+
+    monkeypatch.setenv("METADATA_STORE_PATH", str(tmp_path / "metadata.sqlite3"))
+    monkeypatch.setattr(metadata_store, '_store', None)
+    published_after = datetime.now(timezone.utc) - timedelta(days=365)
+    searches = api_requests(fake_api, "search.list")
+    first = crawl_ids(published_after)
+    pages = api_requests(fake_api, "search.list") - searches
+
+    # Every video is now in the metadata store, so a second crawl makes only
+    # search calls, and a budget for exactly those must cover every page
+    videos = api_requests(fake_api, "videos.list")
+    budget = pages * ENDPOINT_COSTS['search.list'] + 2 * ENDPOINT_COSTS['videos.list']
+    assert crawl_ids(published_after, quota_budget=budget) == first
+    assert api_requests(fake_api, "videos.list") == videos
@@ -0,0 +1,132 @@
+import re
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+# All patterns are compiled once at import, not per call
+EMOJI_PATTERN = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F700-\U0001F77F"  # alchemical symbols
+    "\U0001F780-\U0001F7FF"  # Geometric Shapes
+    "\U0001F800-\U0001F8FF"  # Supplemental Arrows-C
+    "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
+    "\U0001FA00-\U0001FA6F"  # Chess Symbols
+    "\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
+    "\U00002702-\U000027B0"  # Dingbats
+    "\U000024C2-\U0001F251"
+    "]+", flags=re.UNICODE
+)
+HASHTAG_PATTERN = re.compile(r'#\w+')
+ASCII_DIGIT_PATTERN = re.compile(r'[0-9]')
+# ASCII-only case folding matches exactly what str.lower() does for "#shorts"
+SHORTS_MARKER_PATTERN = re.compile(r'#shorts', re.IGNORECASE | re.ASCII)
+
+TITLE_CACHE_SIZE = 65536
+
+TitleFeatures = namedtuple('TitleFeatures', [
+    'clean_title',
+    'length',
+    'word_count',
+    'has_question',
+    'has_exclamation',
+    'has_number',
+    'has_emoji',
+    'hashtags',
+    'has_shorts_marker',
+])
+
+@lru_cache(maxsize=TITLE_CACHE_SIZE)
+def title_features(title):
+    """
+    Compute every title feature the app uses
+
+    Emoji removal and detection share one subn() pass, skipped entirely for
+    ASCII titles, the word count and whitespace collapsing share one split(),
+    and results are cached since trending titles repeat across analyses.
+
+    Args:
+        title (str): Video title
+
+    Returns:
+        TitleFeatures: Cleaned title, length, word count, flags for '?',
+            '!', digits, emoji and the #shorts marker, and the hashtags
+    """
+    words = title.split()
+    if title.isascii():
+        # No emoji possible: skip the regex and reuse the split
+        clean_title, has_emoji = ' '.join(words), False
+        has_number = ASCII_DIGIT_PATTERN.search(title) is not None
+    else:
+        without_emoji, emoji_runs = EMOJI_PATTERN.subn('', title)
+        clean_title = ' '.join(without_emoji.split()) if emoji_runs else ' '.join(words)
+        has_emoji = emoji_runs > 0
+        has_number = digit_pattern().search(title) is not None
+
+    return TitleFeatures(
+        clean_title=clean_title,
+        length=len(title),
+        word_count=len(words),
+        has_question='?' in title,
+        has_exclamation='!' in title,
+        has_number=has_number,
+        has_emoji=has_emoji,
+        hashtags=tuple(HASHTAG_PATTERN.findall(title)) if '#' in title else (),
+        has_shorts_marker=has_shorts_marker(title),
+    )
+
+def title_features_batch(titles):
+    """
+    Compute title features for many titles, deduplicating repeats
+
+    Args:
+        titles (list): Video titles
+
+    Returns:
+        list: TitleFeatures, one per title, in input order
+    """
+    unique = {title: title_features(title) for title in dict.fromkeys(titles)}
+    return [unique[title] for title in titles]
+
+def has_shorts_marker(text):
+    """
+    Check for a case-insensitive '#shorts' without lowercasing the text
+
+    Args:
+        text (str): Title or description
+
+    Returns:
+        bool: True if the text contains '#shorts'
+    """
+    return SHORTS_MARKER_PATTERN.search(text) is not None
+
+def contains_digit(text):
+    """
+    Same as any(char.isdigit() for char in text), without a Python-level loop
+
+    Args:
+        text (str): Text to check
+
+    Returns:
+        bool: True if any character is a digit
+    """
+    if text.isascii():
+        return ASCII_DIGIT_PATTERN.search(text) is not None
+    return digit_pattern().search(text) is not None
+
+@lru_cache(maxsize=1)
+def digit_pattern():
+    """
+    Pattern matching every character for which str.isdigit() is True
+
+    \\d only covers decimal digits, while the title features use isdigit,
+    which also accepts superscripts and other numeric digits. Built on
+    first use since it scans the whole Unicode range.
+    """
+    extra = ''.join(
+        chr(code) for code in range(sys.maxunicode + 1)
+        if chr(code).isdigit() and not chr(code).isdecimal()
+    )
+    return re.compile(r'[\d' + re.escape(extra) + ']')
@@ -0,0 +1,472 @@
+"""
+Local cache of resized video thumbnails for the dashboard
+
+Thumbnails are fetched once, on a thread pool, and resized to the exact
+widths the app displays them at (DISPLAY_WIDTHS), as WebP or JPEG when
+Pillow has no WebP support. Renditions are stored content-addressed:
+each file is named by the SHA-256 of its bytes, so identical images
+(e.g. the same frame behind two URLs) are stored once. A SQLite index
+maps (url, width) to a file and records when each file was last served;
+once the files exceed THUMBNAIL_CACHE_BYTES the least recently served
+ones are evicted.
+
+Concurrent requests for the same URL share one download. The analysis
+pipeline starts the download as soon as video metadata arrives, so it
+overlaps processing and scoring, and batch jobs can warm the cache in
+bulk:
+
+    python thumbnails.py warm urls.txt
+    python thumbnails.py stats
+"""
+import argparse
+import hashlib
+import io
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+import tracing
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "thumbnails")
+CACHE_BYTES = int(os.getenv("THUMBNAIL_CACHE_BYTES", str(256 * 1024 * 1024)))
+# Widths the app shows thumbnails at: the video info column and the history strip
+VIDEO_INFO_WIDTH = 360
+HISTORY_WIDTH = 200
+DISPLAY_WIDTHS = (VIDEO_INFO_WIDTH, HISTORY_WIDTH)
+FETCH_WORKERS = 8
+FETCH_TIMEOUT = 10
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+def render(image_bytes, width):
+    """
+    Resize an image to width pixels wide and re-encode it
+
+    Images narrower than width are re-encoded without upscaling. Without
+    Pillow the original bytes are returned.
+
+    Args:
+        image_bytes (bytes): Encoded source image
+        width (int): Target width in pixels
+
+    Returns:
+        tuple: (encoded bytes, format) with format 'webp', 'jpeg' or 'original'
+    """
+    try:
+        from PIL import Image, features
+    except ImportError:
+        return image_bytes, 'original'
+
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image = image.convert('RGB')
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        output = io.BytesIO()
+        if features.check('webp'):
+            image.save(output, 'WEBP', quality=WEBP_QUALITY, method=4)
+            return output.getvalue(), 'webp'
+        image.save(output, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+        return output.getvalue(), 'jpeg'
+
+def download(url):
+    """
+    Fetch an image
+
+    Args:
+        url (str): Image URL
+
+    Returns:
+        bytes: Response body
+
+    Raises:
+        requests.RequestException: On network errors and non-2xx responses
+    """
+    import requests
+
+    response = requests.get(url, timeout=FETCH_TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+class ThumbnailCache:
+    """
+    Size-bounded, content-addressed disk cache of thumbnail renditions
+
+    Files live under path/<first two hex digits>/<sha256>.<format>; the
+    index is path/index.sqlite3. Thread-safe; each thread gets its own
+    SQLite connection.
+
+    Args:
+        path (str): Cache directory
+        max_bytes (int): Total size of cached files to evict down to
+        fetch (callable): url -> bytes, defaults to download
+        widths (tuple): Widths rendered for every fetched URL
+        max_workers (int): Concurrent downloads
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=CACHE_BYTES, fetch=download,
+                 widths=DISPLAY_WIDTHS, max_workers=FETCH_WORKERS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.widths = tuple(widths)
+        self._fetch = fetch
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._inflight = {}  # url -> Future
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnails")
+        os.makedirs(path, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    digest TEXT PRIMARY KEY,
+                    format TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS renditions (
+                    url TEXT NOT NULL,
+                    width INTEGER NOT NULL,
+                    digest TEXT NOT NULL,
+                    PRIMARY KEY (url, width)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS files_accessed_at ON files (accessed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS renditions_digest ON renditions (digest)")
+
+    def get(self, url, width, timeout=FETCH_TIMEOUT):
+        """
+        Bytes of the rendition of url at width, fetching it if needed
+
+        A download already in flight for url is waited for rather than
+        repeated.
+
+        Args:
+            url (str): Thumbnail URL
+            width (int): Display width, one of the cache's widths
+            timeout (float): Seconds to wait for a download
+
+        Returns:
+            bytes: Encoded image, or None if it could not be fetched
+        """
+        data = self.lookup(url, width)
+        if data is not None:
+            tracing.record('thumbnail_hits')
+            return data
+        tracing.record('thumbnail_misses')
+        future = self.prefetch([url], widths=(width,))[0]
+        try:
+            future.result(timeout=timeout)
+        except Exception as e:
+            print(f"Error fetching thumbnail {url}: {e}")
+            return None
+        return self.lookup(url, width)
+
+    def lookup(self, url, width):
+        """
+        Cached rendition of url at width, without fetching
+
+        Returns:
+            bytes: Encoded image, or None on a miss
+        """
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT files.digest, files.format FROM renditions JOIN files USING (digest) "
+            "WHERE renditions.url = ? AND renditions.width = ?",
+            (url, width)
+        ).fetchone()
+        if row is None:
+            return None
+        path = self._file_path(*row)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            # Evicted between the query and the read, or deleted by hand.
+            # Drop the rows if the file is still gone once we hold the
+            # write lock, so prefetch fetches the URL again.
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                if not os.path.exists(path):
+                    conn.execute("DELETE FROM renditions WHERE digest = ?", (row[0],))
+                    conn.execute("DELETE FROM files WHERE digest = ?", (row[0],))
+            return None
+        with conn:
+            conn.execute("UPDATE files SET accessed_at = ? WHERE digest = ?", (time.time(), row[0]))
+        return data
+
+    def prefetch(self, urls, widths=None):
+        """
+        Start fetching every URL whose renditions are not cached yet
+
+        Returns at once; the downloads run on the cache's thread pool.
+
+        Args:
+            urls (iterable): Thumbnail URLs; empty values are skipped
+            widths (tuple): Widths that must be cached, by default all of
+                the cache's widths; downloads always render the cache's
+                widths too
+
+        Returns:
+            list: One Future per distinct URL, resolving to True if the URL
+                was downloaded and False if it was already cached
+        """
+        widths = tuple(widths or self.widths)
+        futures = []
+        for url in dict.fromkeys(url for url in urls if url):
+            with self._lock:
+                future = self._inflight.get(url)
+                if future is None:
+                    if self._cached_widths(url).issuperset(widths):
+                        future = Future()
+                        future.set_result(False)
+                    else:
+                        # The download's span nests under the caller's trace
+                        load = tracing.in_current_context(self._load)
+                        future = self._inflight[url] = self._executor.submit(
+                            load, url, tuple(sorted(set(self.widths) | set(widths)))
+                        )
+            futures.append(future)
+        return futures
+
+    def warm(self, urls, widths=None):
+        """
+        Fetch and cache every URL, blocking until done
+
+        Args:
+            urls (iterable): Thumbnail URLs
+            widths (tuple): Widths to cache, by default the cache's widths
+
+        Returns:
+            dict: Counts of cached (already present), fetched and failed URLs
+        """
+        futures = self.prefetch(urls, widths)
+        wait(futures)
+        counts = {'cached': 0, 'fetched': 0, 'failed': 0}
+        for future in futures:
+            if future.exception() is not None:
+                counts['failed'] += 1
+            else:
+                counts['fetched' if future.result() else 'cached'] += 1
+        return counts
+
+    def stats(self):
+        """
+        Return the size of the cache
+
+        Returns:
+            dict: files, renditions, bytes and max_bytes
+        """
+        conn = self._connection()
+        files, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files").fetchone()
+        renditions = conn.execute("SELECT COUNT(*) FROM renditions").fetchone()[0]
+        return {'files': files, 'renditions': renditions, 'bytes': size, 'max_bytes': self.max_bytes}
+
+    def evict(self, max_bytes=None):
+        """
+        Delete least recently served files until the cache fits max_bytes
+
+        Args:
+            max_bytes (int): Size to evict down to, by default the cache's
+
+        Returns:
+            int: Number of files deleted
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            return self._evict(conn, self.max_bytes if max_bytes is None else max_bytes)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _evict(self, conn, max_bytes):
+        # Runs inside a write transaction, so no _load can check for a file
+        # and point a row at it between the row deletion and the removal
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM files").fetchone()[0]
+        if total <= max_bytes:
+            return 0
+        victims = []
+        for digest, file_format, size in conn.execute(
+            "SELECT digest, format, size FROM files ORDER BY accessed_at"
+        ):
+            if total <= max_bytes:
+                break
+            victims.append((digest, file_format))
+            total -= size
+        conn.executemany("DELETE FROM renditions WHERE digest = ?", [(digest,) for digest, _ in victims])
+        conn.executemany("DELETE FROM files WHERE digest = ?", [(digest,) for digest, _ in victims])
+        for digest, file_format in victims:
+            try:
+                os.remove(self._file_path(digest, file_format))
+            except FileNotFoundError:
+                pass
+        return len(victims)
+
+    def _load(self, url, widths):
+        try:
+            with tracing.span('fetch_thumbnail'):
+                source = self._fetch(url)
+                renditions = [(width, *render(source, width)) for width in widths]
+            now = time.time()
+            conn = self._connection()
+            with conn:
+                # The write lock spans the existence checks, the inserts and
+                # the eviction, so a concurrent eviction (in this process or
+                # another) cannot delete a file this load has just relied on
+                conn.execute("BEGIN IMMEDIATE")
+                stored = []
+                for width, data, file_format in renditions:
+                    digest = hashlib.sha256(data).hexdigest()
+                    path = self._file_path(digest, file_format)
+                    if not os.path.exists(path):
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        # Atomic, so readers never see a partly written file
+                        with open(path + f".{threading.get_ident()}.tmp", 'wb') as f:
+                            f.write(data)
+                        os.replace(path + f".{threading.get_ident()}.tmp", path)
+                    stored.append((url, width, digest, file_format, len(data)))
+                conn.executemany(
+                    "INSERT INTO files (digest, format, size, accessed_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (digest) DO UPDATE SET accessed_at = excluded.accessed_at",
+                    [(digest, file_format, size, now) for _, _, digest, file_format, size in stored]
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO renditions (url, width, digest) VALUES (?, ?, ?)",
+                    [(url, width, digest) for url, width, digest, _, _ in stored]
+                )
+                self._evict(conn, self.max_bytes)
+            return True
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+
+    def _cached_widths(self, url):
+        rows = self._connection().execute("SELECT width FROM renditions WHERE url = ?", (url,)).fetchall()
+        return {row[0] for row in rows}
+
+    def _file_path(self, digest, file_format):
+        return os.path.join(self.path, digest[:2], f"{digest}.{file_format}")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.path, "index.sqlite3"), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_thumbnail_cache():
+    """
+    Return the process-wide thumbnail cache, creating it on first use
+
+    The directory comes from THUMBNAIL_CACHE_PATH; set it to an empty
+    string to disable the cache.
+
+    Returns:
+        ThumbnailCache: The shared cache, or None if disabled
+    """
+    global _cache
+    path = os.getenv("THUMBNAIL_CACHE_PATH", DEFAULT_CACHE_PATH)
+    if not path:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.path != path:
+            _cache = ThumbnailCache(path)
+        return _cache
+
+def thumbnail(url, width):
+    """
+    Image for st.image: local bytes when possible, else the URL itself
+
+    Args:
+        url (str): Thumbnail URL
+        width (int): Display width
+
+    Returns:
+        bytes or str: Cached rendition, or url if the cache is disabled or
+            unusable or the fetch failed
+    """
+    try:
+        cache = get_thumbnail_cache()
+        data = cache.get(url, width) if cache is not None and url else None
+    except (OSError, sqlite3.Error) as e:
+        print(f"Error reading thumbnail cache: {e}")
+        return url
+    return data if data is not None else url
+
+def prefetch_thumbnail(video_data):
+    """
+    Pipeline stage: cache the renditions of an analyzed video's thumbnail
+
+    Failures, including an unusable THUMBNAIL_CACHE_PATH, are reported and
+    swallowed; the app then falls back to the remote URL.
+
+    Args:
+        video_data (dict): Video metadata with thumbnail_url
+
+    Returns:
+        dict: Counts from ThumbnailCache.warm, or None if the cache is disabled
+    """
+    try:
+        cache = get_thumbnail_cache()
+        if cache is None or not video_data.get('thumbnail_url'):
+            return None
+        counts = cache.warm([video_data['thumbnail_url']])
+    except (OSError, sqlite3.Error) as e:
+        print(f"Error caching thumbnail for {video_data['video_id']}: {e}")
+        return None
+    if counts['failed']:
+        print(f"Error fetching thumbnail for {video_data['video_id']}")
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm or inspect the local thumbnail cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    warm_parser = subparsers.add_parser("warm", help="Cache the thumbnails of videos")
+    warm_parser.add_argument("input", help="File with one URL or video ID per line, or - for stdin")
+    warm_parser.add_argument("--batch-size", type=int, default=500)
+    warm_parser.add_argument("--fetch-workers", type=int, default=4, help="Concurrent API calls per batch")
+    subparsers.add_parser("stats", help="Show the cache size")
+    args = parser.parse_args()
+
+    cache = get_thumbnail_cache()
+    if cache is None:
+        parser.error("THUMBNAIL_CACHE_PATH is empty; the thumbnail cache is disabled")
+
+    if args.command == "warm":
+        from itertools import islice
+
+        from utils import iter_video_ids
+        from youtube_api import get_videos_data
+
+        input_file = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        totals = {'cached': 0, 'fetched': 0, 'failed': 0}
+        try:
+            video_ids = iter_video_ids(input_file)
+            while True:
+                batch = list(islice(video_ids, args.batch_size))
+                if not batch:
+                    break
+                videos, _ = get_videos_data(batch, max_workers=args.fetch_workers)
+                for name, count in cache.warm(video['thumbnail_url'] for video in videos).items():
+                    totals[name] += count
+                print(f"{totals['fetched']} fetched, {totals['cached']} already cached, {totals['failed']} failed",
+                      file=sys.stderr)
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+
+    stats = cache.stats()
+    print(f"{stats['files']} files, {stats['renditions']} renditions, "
+          f"{stats['bytes'] / 1e6:.1f} of {stats['max_bytes'] / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Innermost open span of the current thread or asyncio task
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+class Span:
+    """
+    One timed stage of a trace
+
+    Counters (API calls, quota units, cache hits, payload bytes, ...) are
+    recorded on the innermost open span and added to its parent when it
+    ends, so every span reports the totals of everything it covered.
+    """
+    __slots__ = ('name', 'trace', 'parent', 'attributes', 'counters', 'errors', 'depth', 'start', 'end', '_token')
+
+    def __init__(self, name, trace, parent=None, attributes=None):
+        self.name = name
+        self.trace = trace
+        self.parent = parent
+        self.attributes = attributes or {}
+        self.counters = {}
+        self.errors = []
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.start = None
+        self.end = None
+        self._token = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self._token = _current_span.set(self)
+        with self.trace._lock:
+            self.trace.spans.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.errors.append(f"{exc_type.__name__}: {exc}")
+        if self.parent is not None:
+            with self.trace._lock:
+                for counter, amount in self.counters.items():
+                    self.parent.counters[counter] = self.parent.counters.get(counter, 0) + amount
+        return False
+
+    @property
+    def duration(self):
+        """Wall time in seconds, or None while the span is open."""
+        return None if self.end is None else self.end - self.start
+
+    def add(self, counter, amount=1):
+        """
+        Increase a counter on this span
+
+        Args:
+            counter (str): Counter name, e.g. "api_calls"
+            amount (int): Amount to add
+        """
+        with self.trace._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def set(self, **attributes):
+        """Attach attributes, e.g. the video ID, to this span."""
+        self.attributes.update(attributes)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'depth': self.depth,
+            'offset_ms': (self.start - self.trace.root.start) * 1000,
+            'duration_ms': (self.duration or 0) * 1000,
+            'attributes': dict(self.attributes),
+            'counters': dict(self.counters),
+            'errors': list(self.errors),
+        }
+
+class _NoopSpan:
+    """Returned by span() when no trace is active; every method does nothing."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add(self, counter, amount=1):
+        pass
+
+    def set(self, **attributes):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class Trace:
+    """
+    All spans recorded for one run of the pipeline
+
+    The root span covers the whole run; spans are kept in start order.
+    """
+    def __init__(self, name, **attributes):
+        self.name = name
+        self.spans = []
+        self._lock = threading.Lock()
+        self.root = Span(name, self, attributes=attributes)
+        self.started_at = time.time()
+
+    @property
+    def duration(self):
+        return self.root.duration
+
+    def waterfall(self):
+        """
+        Return the spans as rows for a waterfall chart
+
+        Returns:
+            list: One dict per span with name, depth, offset_ms,
+                duration_ms, attributes, counters and errors
+        """
+        return [recorded.to_dict() for recorded in self.spans]
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'started_at': self.started_at,
+            'duration_ms': (self.duration or 0) * 1000,
+            'counters': dict(self.root.counters),
+            'spans': self.waterfall(),
+        }
+
+def is_enabled():
+    """
+    Check whether tracing is switched on for every run
+
+    Set TRACING_ENABLED=1 to trace every run; individual runs can also be
+    traced by passing enabled=True to trace().
+
+    Returns:
+        bool: True if TRACING_ENABLED is set to a true value
+    """
+    return os.getenv("TRACING_ENABLED", "").lower() in ("1", "true", "yes")
+
+@contextmanager
+def trace(name, enabled=None, **attributes):
+    """
+    Record a trace of everything run inside the with block
+
+        with trace("analyze_video", enabled=True) as run:
+            ...
+        run.waterfall()
+
+    Yields None when tracing is disabled, in which case span(), traced()
+    and record() cost one context variable lookup. A finished trace is
+    appended as one JSON line to TRACE_EXPORT_PATH and folded into the
+    Prometheus metrics written to TRACE_METRICS_PATH, if those are set.
+
+    Args:
+        name (str): Name of the root span
+        enabled (bool): Force tracing on or off; None follows is_enabled()
+        **attributes: Values to attach to the root span
+    """
+    if not (is_enabled() if enabled is None else enabled):
+        yield None
+        return
+
+    run = Trace(name, **attributes)
+    try:
+        with run.root:
+            yield run
+    finally:
+        export(run)
+
+def span(name, **attributes):
+    """
+    Open a child span of the current span
+
+        with span("render_comparison"):
+            ...
+
+    Args:
+        name (str): Stage name
+        **attributes: Values to attach to the span
+
+    Returns:
+        Span: Context manager; a shared no-op object outside a trace
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP_SPAN
+    return Span(name, parent.trace, parent, attributes)
+
+def traced(name=None):
+    """
+    Decorator that runs the function inside a span
+
+    Args:
+        name (str): Span name; defaults to the function name
+    """
+    def decorator(function):
+        span_name = name or function.__name__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            parent = _current_span.get()
+            if parent is None:
+                return function(*args, **kwargs)
+            with Span(span_name, parent.trace, parent):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def record(counter, amount=1):
+    """
+    Add to a counter on the current span, if a trace is active
+
+    Args:
+        counter (str): Counter name, e.g. "quota_units"
+        amount (int): Amount to add
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.add(counter, amount)
+
+def record_error(message):
+    """
+    Attach an error message to the current span, if a trace is active
+
+    For errors that are handled (printed and turned into a None result)
+    rather than raised, so they still show up in the trace.
+
+    Args:
+        message (str): Error description
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.errors.append(message)
+
+def is_active():
+    """Return True if the caller is inside a trace."""
+    return _current_span.get() is not None
+
+def in_current_context(function):
+    """
+    Bind function to the caller's trace context, for use in worker threads
+
+    Threads started by executors do not inherit context variables, so
+    spans and counters from the worker would otherwise be lost.
+
+    Args:
+        function (callable): Function to run in a worker
+
+    Returns:
+        callable: function itself when no trace is active
+    """
+    if _current_span.get() is None:
+        return function
+    context = contextvars.copy_context()
+
+    @wraps(function)
+    def run(*args, **kwargs):
+        # Each call gets its own copy, since one context cannot be entered
+        # by two threads at once
+        return context.copy().run(function, *args, **kwargs)
+    return run
+
+# Per-stage totals across all finished traces, for render_prometheus()
+_stage_metrics = {}
+_stage_metrics_lock = threading.Lock()
+
+def export(finished_trace):
+    """
+    Record a finished trace in the stage metrics and the export files
+
+    Args:
+        finished_trace (Trace): Trace whose root span has ended
+    """
+    with _stage_metrics_lock:
+        for finished_span in finished_trace.spans:
+            metrics = _stage_metrics.setdefault(finished_span.name, {'count': 0, 'seconds': 0.0, 'errors': 0, 'counters': {}})
+            metrics['count'] += 1
+            metrics['seconds'] += finished_span.duration or 0
+            metrics['errors'] += len(finished_span.errors)
+            for counter, amount in finished_span.counters.items():
+                metrics['counters'][counter] = metrics['counters'].get(counter, 0) + amount
+
+    export_path = os.getenv("TRACE_EXPORT_PATH")
+    if export_path:
+        with open(export_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(finished_trace.to_dict()) + "\n")
+
+    metrics_path = os.getenv("TRACE_METRICS_PATH")
+    if metrics_path:
+        # Write-then-rename so scrapers never read a partial file
+        with open(metrics_path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(render_prometheus())
+        os.replace(metrics_path + ".tmp", metrics_path)
+
+def render_prometheus():
+    """
+    Render the per-stage totals in the Prometheus text exposition format
+
+    Counters of a stage include those of its child stages.
+
+    Returns:
+        str: Metrics text
+    """
+    with _stage_metrics_lock:
+        stages = {name: dict(metrics, counters=dict(metrics['counters'])) for name, metrics in _stage_metrics.items()}
+
+    lines = [
+        "# HELP analyzer_stage_duration_seconds Wall time spent in each pipeline stage",
+        "# TYPE analyzer_stage_duration_seconds summary",
+    ]
+    for name, metrics in sorted(stages.items()):
+        lines.append(f'analyzer_stage_duration_seconds_sum{{stage="{name}"}} {metrics["seconds"]:.6f}')
+        lines.append(f'analyzer_stage_duration_seconds_count{{stage="{name}"}} {metrics["count"]}')
+
+    lines += [
+        "# HELP analyzer_stage_errors_total Errors recorded in each pipeline stage",
+        "# TYPE analyzer_stage_errors_total counter",
+    ]
+    for name, metrics in sorted(stages.items()):
+        lines.append(f'analyzer_stage_errors_total{{stage="{name}"}} {metrics["errors"]}')
+
+    lines += [
+        "# HELP analyzer_stage_events_total API calls, quota units, cache lookups and payload bytes per stage",
+        "# TYPE analyzer_stage_events_total counter",
+    ]
+    for name, metrics in sorted(stages.items()):
+        for counter, amount in sorted(metrics['counters'].items()):
+            lines.append(f'analyzer_stage_events_total{{stage="{name}",event="{counter}"}} {amount}')
+
+    return "\n".join(lines) + "\n"
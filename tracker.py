@@ -0,0 +1,456 @@
+"""
+Long-running tracker that polls the statistics of many Shorts
+
+Each tracked video has its own polling interval. A video gaining views
+quickly is polled more often, and one that has plateaued is polled less
+often, up to a maximum interval. Due videos are taken from a heap of
+next-poll times and packed into videos().list calls of up to 50 IDs.
+Calls are paced by a token bucket sized to the tracker's own daily quota
+budget. State is checkpointed to a JSON file, so a restarted tracker
+picks up every video's interval and schedule. Set SNAPSHOT_STORE_PATH to
+keep every observation in the snapshot store.
+
+    python tracker.py --track urls.txt --daily-quota 2000 --metrics tracker.prom
+"""
+import argparse
+import heapq
+import json
+import math
+import os
+import signal
+import sys
+import threading
+import time
+
+from metadata_store import STATISTICS_TTL
+from quota import BACKGROUND, ENDPOINT_COSTS, TokenBucket
+from utils import iter_video_ids
+
+# videos().list accepts at most 50 IDs per call
+BATCH_SIZE = 50
+
+# Polling faster than the metadata store's statistics TTL would only
+# return the stored counts again
+MIN_INTERVAL = max(60, STATISTICS_TTL)
+MAX_INTERVAL = 24 * 3600
+# A video is polled often enough to see about this relative view growth
+# between polls
+TARGET_GROWTH = 0.02
+# Intervals change by at most this factor per poll, so one noisy reading
+# cannot swing the schedule
+MAX_STEP = 2.0
+# Videos due within this fraction of their interval may join a batch
+# that is being sent anyway, since extra IDs cost no quota
+PACK_AHEAD = 0.25
+# A video reported missing this many polls in a row is dropped
+MAX_MISSES = 3
+# Failed calls (outages, exhausted quota) are retried after min_interval,
+# doubling per consecutive failure up to this many seconds
+MAX_RETRY_DELAY = 3600
+NOT_FOUND = "Video not found"
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "tracker.json")
+
+def next_interval(interval, previous_views, views, elapsed, min_interval=MIN_INTERVAL,
+                  max_interval=MAX_INTERVAL, target_growth=TARGET_GROWTH):
+    """
+    Choose the next polling interval from the growth seen since the last poll
+
+    Aims for about target_growth relative view growth between polls. The
+    interval moves by at most MAX_STEP per poll, so a video that stops
+    growing decays towards max_interval over a few polls.
+
+    Args:
+        interval (float): Current interval in seconds
+        previous_views (int): View count at the previous poll
+        views (int): View count now
+        elapsed (float): Seconds between the two polls
+        min_interval (float): Lower bound in seconds
+        max_interval (float): Upper bound in seconds
+        target_growth (float): Relative growth wanted between polls
+
+    Returns:
+        float: Next interval in seconds
+    """
+    growth = max(0, views - previous_views) / max(previous_views, 1)
+    if elapsed <= 0:
+        wanted = interval
+    elif growth <= 0:
+        wanted = math.inf
+    else:
+        wanted = target_growth / (growth / elapsed)
+    wanted = min(max(wanted, interval / MAX_STEP), interval * MAX_STEP)
+    return min(max(wanted, min_interval), max_interval)
+
+def fetch_statistics(video_ids):
+    """
+    Fetch videos through youtube_api at background priority
+
+    Args:
+        video_ids (list): At most BATCH_SIZE video IDs
+
+    Returns:
+        tuple: (videos, missing, units) where videos and missing are as
+            returned by get_videos_data and units is the quota spent, 0
+            when the metadata store answered without an API call
+    """
+    from youtube_api import get_videos_data
+
+    calls = []
+    videos, missing = get_videos_data(video_ids, max_workers=1, priority=BACKGROUND, calls=calls)
+    return videos, missing, sum(ENDPOINT_COSTS[endpoint] for endpoint in calls)
+
+class ShortsTracker:
+    """
+    Adaptive-interval poller for a set of tracked videos
+
+    The heap holds (next_poll, video_id) entries; rescheduling pushes a new
+    entry and leaves the old one to be skipped when popped, since
+    self.videos holds the authoritative next_poll of every video.
+
+    Args:
+        fetch (callable): Takes a list of video IDs and returns (videos,
+            missing, units) like fetch_statistics
+        state_path (str): Checkpoint file, or None to keep state in memory
+        daily_quota (float): Units per day the tracker may spend; one unit
+            per videos().list call
+        burst (float): Calls that may be made back to back
+        min_interval (float): Shortest polling interval in seconds
+        max_interval (float): Longest polling interval in seconds
+        clock (callable): Returns the current time in seconds; schedules
+            are kept in this time, so it must survive restarts
+        sleep (callable): Sleeps for the given seconds
+        monotonic (callable): Clock the quota token bucket runs on
+    """
+    def __init__(self, fetch=fetch_statistics, state_path=None, daily_quota=2000, burst=10,
+                 min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 clock=time.time, sleep=time.sleep, monotonic=time.monotonic):
+        self.fetch = fetch
+        self.state_path = state_path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._clock = clock
+        self._sleep = sleep
+        self._bucket = TokenBucket(daily_quota / 86400, burst, monotonic)
+        self._lock = threading.Lock()
+        self.videos = {}
+        self._heap = []
+        self._counters = {'polls': 0, 'batches': 0, 'units': 0, 'failed_batches': 0, 'dropped': 0}
+        self._failures = 0
+        self._last_checkpoint = clock()
+        if state_path and os.path.exists(state_path):
+            self.load()
+
+    def track(self, video_ids, interval=None):
+        """
+        Start tracking videos; ones already tracked keep their schedule
+
+        Args:
+            video_ids (iterable): Video IDs
+            interval (float): Starting interval; defaults to min_interval,
+                so new videos are polled right away and soon after
+
+        Returns:
+            int: Number of newly tracked videos
+        """
+        now = self._clock()
+        added = 0
+        with self._lock:
+            for video_id in video_ids:
+                if video_id in self.videos:
+                    continue
+                self.videos[video_id] = {
+                    'interval': interval or self.min_interval,
+                    'next_poll': now,
+                    'last_polled': None,
+                    'views': None,
+                    'likes': None,
+                    'comments': None,
+                    'misses': 0,
+                }
+                heapq.heappush(self._heap, (now, video_id))
+                added += 1
+        return added
+
+    def untrack(self, video_ids):
+        """Stop tracking videos; their heap entries are skipped when popped."""
+        with self._lock:
+            for video_id in video_ids:
+                self.videos.pop(video_id, None)
+
+    def due_batch(self, now=None):
+        """
+        Pop the next batch to poll
+
+        Takes every due video up to BATCH_SIZE. If that leaves room, videos
+        due within PACK_AHEAD of their interval fill the rest of the call.
+
+        Args:
+            now (float): Current time; defaults to the clock
+
+        Returns:
+            list: Video IDs, empty if nothing is due
+        """
+        now = self._clock() if now is None else now
+        batch = []
+        with self._lock:
+            while self._heap and len(batch) < BATCH_SIZE:
+                next_poll, video_id = self._heap[0]
+                state = self.videos.get(video_id)
+                if state is None or state['next_poll'] != next_poll:
+                    heapq.heappop(self._heap)
+                    continue
+                if next_poll > now and not (batch and next_poll - now <= state['interval'] * PACK_AHEAD):
+                    break
+                heapq.heappop(self._heap)
+                batch.append(video_id)
+        return batch
+
+    def poll(self, video_ids):
+        """
+        Fetch one batch and reschedule its videos
+
+        Args:
+            video_ids (list): At most BATCH_SIZE tracked video IDs
+
+        Returns:
+            dict: Video ID -> (views, likes, comments) for the videos fetched
+        """
+        units = 0
+        try:
+            videos, missing, units = self.fetch(video_ids)
+            error = None
+            if not videos and any(reason != NOT_FOUND for reason in missing.values()):
+                # get_videos_data reports a failed call as every ID missing
+                error = next(reason for reason in missing.values() if reason != NOT_FOUND)
+        except Exception as e:
+            error = e
+        self._counters['units'] += units
+        if error is not None:
+            print(f"Tracker poll failed: {error}")
+            self._counters['failed_batches'] += 1
+            self._failures += 1
+            delay = min(MAX_RETRY_DELAY, self.min_interval * 2 ** (self._failures - 1))
+            self._reschedule_all(video_ids, self._clock() + delay)
+            return {}
+        self._failures = 0
+
+        now = self._clock()
+        self._counters['batches'] += 1
+        observed = {}
+        with self._lock:
+            for video in videos:
+                video_id = video['video_id']
+                state = self.videos.get(video_id)
+                if state is None:
+                    continue
+                views = video['view_count']
+                if state['last_polled'] is not None:
+                    state['interval'] = next_interval(
+                        state['interval'], state['views'], views, now - state['last_polled'],
+                        self.min_interval, self.max_interval
+                    )
+                state.update(
+                    last_polled=now, views=views, likes=video['like_count'],
+                    comments=video['comment_count'], misses=0
+                )
+                self._schedule(video_id, now + state['interval'])
+                observed[video_id] = (views, video['like_count'], video['comment_count'])
+            self._counters['polls'] += len(observed)
+
+            for video_id in video_ids:
+                state = self.videos.get(video_id)
+                if state is None or video_id in observed:
+                    continue
+                if missing.get(video_id, NOT_FOUND) == NOT_FOUND:
+                    state['misses'] += 1
+                    if state['misses'] >= MAX_MISSES:
+                        del self.videos[video_id]
+                        self._counters['dropped'] += 1
+                        continue
+                # Errors and recent misses are retried at the shortest interval
+                self._schedule(video_id, now + self.min_interval)
+        return observed
+
+    def step(self):
+        """
+        Poll every batch that is due and allowed by the quota budget
+
+        Returns:
+            float: Seconds until there may be more work
+        """
+        while True:
+            until_due = self._seconds_until_due()
+            if until_due > 0:
+                return until_due
+            wait = self._bucket.try_take()
+            if wait:
+                return wait
+            self.poll(self.due_batch())
+
+    def run(self, stop=None, max_sleep=60, checkpoint_interval=60, metrics_path=None):
+        """
+        Poll until stop is set, checkpointing state along the way
+
+        Args:
+            stop (threading.Event): Set to stop; checked at least every
+                max_sleep seconds
+            max_sleep (float): Longest single sleep in seconds
+            checkpoint_interval (float): Seconds between state checkpoints
+            metrics_path (str): File to write Prometheus metrics to on every
+                checkpoint, or None
+        """
+        stop = stop or threading.Event()
+        try:
+            while not stop.is_set():
+                wait = self.step()
+                if self._clock() - self._last_checkpoint >= checkpoint_interval:
+                    self.checkpoint(metrics_path)
+                self._sleep(min(max(wait, 0.01), max_sleep))
+        finally:
+            self.checkpoint(metrics_path)
+
+    def checkpoint(self, metrics_path=None):
+        """Save state and, if given a path, the Prometheus metrics."""
+        self._last_checkpoint = self._clock()
+        if self.state_path:
+            self.save()
+        if metrics_path:
+            _write_atomic(metrics_path, self.render_prometheus())
+
+    def metrics(self):
+        """
+        Return queue and polling counters
+
+        Returns:
+            dict: Tracked videos, queue depth (videos due now), lag of the
+                most overdue video in seconds, the spread of intervals and
+                counts of videos polled, calls made, quota units spent,
+                failed calls and videos dropped as missing
+        """
+        now = self._clock()
+        with self._lock:
+            overdue = [now - state['next_poll'] for state in self.videos.values() if state['next_poll'] <= now]
+            intervals = [state['interval'] for state in self.videos.values()]
+            return dict(
+                self._counters,
+                tracked=len(self.videos),
+                queue_depth=len(overdue),
+                lag_seconds=max(overdue, default=0.0),
+                min_interval_seconds=min(intervals, default=0.0),
+                max_interval_seconds=max(intervals, default=0.0),
+            )
+
+    def render_prometheus(self):
+        """
+        Render metrics() in the Prometheus text exposition format
+
+        Returns:
+            str: Metrics text
+        """
+        metrics = self.metrics()
+        lines = []
+        for name, kind, help_text in [
+            ('tracked', 'gauge', "Videos being tracked"),
+            ('queue_depth', 'gauge', "Tracked videos that are due for a poll"),
+            ('lag_seconds', 'gauge', "How long the most overdue video has waited"),
+            ('min_interval_seconds', 'gauge', "Shortest polling interval of any video"),
+            ('max_interval_seconds', 'gauge', "Longest polling interval of any video"),
+            ('polls', 'counter', "Video observations made"),
+            ('batches', 'counter', "videos().list calls made"),
+            ('units', 'counter', "Quota units spent"),
+            ('failed_batches', 'counter', "videos().list calls that failed"),
+            ('dropped', 'counter', "Videos dropped after repeatedly going missing"),
+        ]:
+            metric = f"analyzer_tracker_{name}" + ("_total" if kind == 'counter' else "")
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}", f"{metric} {metrics[name]}"]
+        return "\n".join(lines) + "\n"
+
+    def save(self):
+        """Write every video's schedule and last observation to state_path."""
+        with self._lock:
+            state = {'videos': self.videos, 'counters': self._counters}
+            text = json.dumps(state)
+        _write_atomic(self.state_path, text)
+
+    def load(self):
+        """Replace the tracked videos with those saved in state_path."""
+        with open(self.state_path) as f:
+            state = json.load(f)
+        with self._lock:
+            self.videos = state['videos']
+            self._counters.update(state.get('counters', {}))
+            self._heap = [(video['next_poll'], video_id) for video_id, video in self.videos.items()]
+            heapq.heapify(self._heap)
+
+    def _schedule(self, video_id, next_poll):
+        # Callers hold self._lock
+        self.videos[video_id]['next_poll'] = next_poll
+        heapq.heappush(self._heap, (next_poll, video_id))
+
+    def _reschedule_all(self, video_ids, next_poll):
+        with self._lock:
+            for video_id in video_ids:
+                if video_id in self.videos:
+                    self._schedule(video_id, next_poll)
+
+    def _seconds_until_due(self):
+        with self._lock:
+            # Drop superseded entries so the head is a real schedule
+            while self._heap:
+                next_poll, video_id = self._heap[0]
+                state = self.videos.get(video_id)
+                if state is not None and state['next_poll'] == next_poll:
+                    return max(0.0, next_poll - self._clock())
+                heapq.heappop(self._heap)
+        return math.inf
+
+def _write_atomic(path, text):
+    # Write-then-rename so a crash never leaves a torn file
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Track the statistics of YouTube Shorts over time")
+    parser.add_argument("--state", default=os.getenv("TRACKER_STATE_PATH", DEFAULT_STATE_PATH), help="State checkpoint file")
+    parser.add_argument("--track", default=None, help="File of URLs or video IDs to start tracking, or - for stdin")
+    parser.add_argument("--untrack", default=None, help="File of URLs or video IDs to stop tracking")
+    parser.add_argument("--daily-quota", type=float, default=float(os.getenv("TRACKER_DAILY_QUOTA", "2000")),
+                        help="Quota units per day the tracker may spend")
+    parser.add_argument("--min-interval", type=float, default=MIN_INTERVAL, help="Shortest polling interval in seconds")
+    parser.add_argument("--max-interval", type=float, default=MAX_INTERVAL, help="Longest polling interval in seconds")
+    parser.add_argument("--metrics", default=None, help="Write Prometheus metrics to this file on every checkpoint")
+    parser.add_argument("--once", action="store_true", help="Poll whatever is due, save and exit")
+    args = parser.parse_args()
+
+    tracker = ShortsTracker(
+        state_path=args.state, daily_quota=args.daily_quota,
+        min_interval=args.min_interval, max_interval=args.max_interval
+    )
+    for path, apply in [(args.track, tracker.track), (args.untrack, tracker.untrack)]:
+        if path:
+            input_file = sys.stdin if path == "-" else open(path, encoding="utf-8")
+            try:
+                apply(list(iter_video_ids(input_file)))
+            finally:
+                if input_file is not sys.stdin:
+                    input_file.close()
+    print(f"Tracking {len(tracker.videos)} videos", file=sys.stderr)
+
+    if args.once:
+        tracker.step()
+        tracker.checkpoint(args.metrics)
+        return
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    try:
+        tracker.run(stop, metrics_path=args.metrics)
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(tracker.metrics()), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
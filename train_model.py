@@ -0,0 +1,16 @@
+import argparse
+
+from model import MODEL_DIR, train_engagement_model
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the engagement model on historical Shorts")
+    parser.add_argument("data", help="CSV or Parquet file with one row per video")
+    parser.add_argument("--target", default="engagement", help="Column holding the engagement target in [0, 1]")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="Directory for versioned model artifacts")
+    args = parser.parse_args()
+    
+    model, path = train_engagement_model(args.data, target_column=args.target, model_dir=args.model_dir)
+    print(f"Trained on {model.metadata['training_rows']} videos, saved to {path}")
+
+if __name__ == "__main__":
+    main()
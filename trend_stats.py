@@ -0,0 +1,452 @@
+"""
+Incremental aggregates of video metrics for the trend comparison
+
+Every metric keeps a running count, mean and variance (Welford) and a
+KLL quantile sketch, per group: all videos, each category and each
+publish day. Adding a video costs O(1) amortized, a percentile rank is
+answered from the sketch without rescanning the corpus, and every
+aggregate serializes to JSON and merges with one built elsewhere, so
+workers can aggregate separately and combine later:
+
+    python trend_stats.py build results.jsonl -o worker1.json
+    python trend_stats.py merge worker1.json worker2.json -o corpus.json
+"""
+import argparse
+import json
+import math
+import os
+import random
+import threading
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from utils import BloomFilter
+
+# Rank error of a sketch is about 1.7 / k
+SKETCH_K = 200
+MIN_CAPACITY = 8
+# Day groups older than this many days are dropped; the overall and
+# category groups keep counting them
+MAX_WINDOW_DAYS = 90
+
+METRICS = {
+    'views': lambda video: video['view_count'],
+    'likes': lambda video: video['like_count'],
+    'comments': lambda video: video['comment_count'],
+    'like_ratio': lambda video: video['like_count'] / max(1, video['view_count']) * 100,
+}
+
+class RunningStats:
+    """Count, mean, variance, min and max updated one value at a time."""
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        """Fold other into this, as if its values had been added here."""
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2,
+                'min': self.min if self.count else None, 'max': self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count, stats.mean, stats.m2 = data['count'], data['mean'], data['m2']
+        if stats.count:
+            stats.min, stats.max = data['min'], data['max']
+        return stats
+
+class KLLSketch:
+    """
+    KLL quantile sketch
+
+    Values are kept in levels of compactors; an item at level h stands for
+    2**h inserted values. A full level is sorted and every other item
+    (random offset) is promoted to the next level, so memory stays around
+    3k items whatever the number of values, with rank error about 1.7 / k.
+
+    Args:
+        k (int): Capacity of the top level; larger is more accurate
+        seed (int): Random seed for the compaction offsets
+    """
+    def __init__(self, k=SKETCH_K, seed=None):
+        self.k = k
+        self.n = 0
+        self.levels = [[]]
+        self._rng = random.Random(seed)
+        self._sorted = None
+
+    def update(self, value):
+        self.levels[0].append(value)
+        self.n += 1
+        self._sorted = None
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def merge(self, other):
+        """Fold other into this sketch."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.n += other.n
+        self._sorted = None
+        self._compress()
+        return self
+
+    def rank(self, value):
+        """Fraction of values less than or equal to value."""
+        if not self.n:
+            return math.nan
+        items, cumulative = self._weighted()
+        position = bisect_right(items, value)
+        return cumulative[position - 1] / cumulative[-1] if position else 0.0
+
+    def quantile(self, q):
+        """Value at fraction q (0-1) of the sorted values."""
+        if not self.n:
+            return math.nan
+        items, cumulative = self._weighted()
+        target = q * cumulative[-1]
+        position = min(bisect_right(cumulative, target), len(items) - 1)
+        return items[position]
+
+    def to_dict(self):
+        return {'k': self.k, 'n': self.n, 'levels': self.levels}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['k'])
+        sketch.n = data['n']
+        sketch.levels = [list(items) for items in data['levels']]
+        return sketch
+
+    def _capacity(self, level):
+        # Lower levels get geometrically smaller compactors, but not so
+        # small that the sketch compacts on almost every update
+        depth = len(self.levels) - level - 1
+        return max(MIN_CAPACITY, int(self.k * (2 / 3) ** depth) + 1)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items = sorted(self.levels[level])
+                keep = [items.pop()] if len(items) % 2 else []
+                self.levels[level + 1].extend(items[self._rng.random() < 0.5::2])
+                self.levels[level] = keep
+            level += 1
+
+    def _weighted(self):
+        if self._sorted is None:
+            pairs = sorted((value, 1 << level) for level, items in enumerate(self.levels) for value in items)
+            cumulative = []
+            total = 0
+            for _, weight in pairs:
+                total += weight
+                cumulative.append(total)
+            self._sorted = ([value for value, _ in pairs], cumulative)
+        return self._sorted
+
+class MetricAggregate:
+    """Moments and a quantile sketch of one metric."""
+    __slots__ = ('stats', 'sketch')
+
+    def __init__(self, k=SKETCH_K):
+        self.stats = RunningStats()
+        self.sketch = KLLSketch(k)
+
+    def update(self, value):
+        self.stats.update(value)
+        self.sketch.update(value)
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def percentile_rank(self, value):
+        """Percentage (0-100) of values at or below value."""
+        return self.sketch.rank(value) * 100
+
+    def summary(self):
+        return {
+            'count': self.stats.count,
+            'mean': self.stats.mean,
+            'std': self.stats.std,
+            'min': self.stats.min,
+            'p25': self.sketch.quantile(0.25),
+            'median': self.sketch.quantile(0.5),
+            'p75': self.sketch.quantile(0.75),
+            'p90': self.sketch.quantile(0.9),
+            'max': self.stats.max,
+        }
+
+    def to_dict(self):
+        return {'stats': self.stats.to_dict(), 'sketch': self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregate = cls.__new__(cls)
+        aggregate.stats = RunningStats.from_dict(data['stats'])
+        aggregate.sketch = KLLSketch.from_dict(data['sketch'])
+        return aggregate
+
+class TrendAggregator:
+    """
+    Per-group MetricAggregates of every metric in METRICS
+
+    Groups are named "all", "category:<id>" and "day:YYYY-MM-DD" (UTC
+    publish day). Videos are dicts or VideoRecords with view_count,
+    like_count and comment_count, and optionally category_id and
+    published_at.
+
+    Args:
+        k (int): Sketch size, see KLLSketch
+        max_window_days (int): Publish days kept as their own groups
+    """
+    def __init__(self, k=SKETCH_K, max_window_days=MAX_WINDOW_DAYS):
+        self.k = k
+        self.max_window_days = max_window_days
+        self.groups = {}
+        self._lock = threading.Lock()
+
+    def add(self, video):
+        """Add one video to every group it belongs to."""
+        values = [(metric, value(video)) for metric, value in METRICS.items()]
+        with self._lock:
+            for group in self._groups_of(video):
+                aggregates = self.groups.get(group)
+                if aggregates is None:
+                    aggregates = self.groups[group] = {metric: MetricAggregate(self.k) for metric in METRICS}
+                for metric, value in values:
+                    aggregates[metric].update(value)
+
+    def add_many(self, videos, seen=None):
+        """
+        Add videos, skipping IDs in seen
+
+        Args:
+            videos (iterable): Videos to add
+            seen: Set-like object of video IDs already added, updated here
+
+        Returns:
+            int: Number of videos added
+        """
+        added = 0
+        for video in videos:
+            if seen is not None:
+                if video['video_id'] in seen:
+                    continue
+                seen.add(video['video_id'])
+            self.add(video)
+            added += 1
+        if added:
+            self._expire_windows()
+        return added
+
+    def get(self, group="all"):
+        """Return the metric -> MetricAggregate dict of a group, or None."""
+        return self.groups.get(group)
+
+    def window(self, days, end=None):
+        """
+        Merge the day groups of the last days publish days
+
+        Args:
+            days (int): Number of days, ending with end
+            end (date): Last day; defaults to today (UTC)
+
+        Returns:
+            dict: metric -> MetricAggregate, empty if no videos
+        """
+        end = end or datetime.utcnow().date()
+        merged = {}
+        for offset in range(days):
+            aggregates = self.groups.get(f"day:{end - timedelta(days=offset)}")
+            for metric, aggregate in (aggregates or {}).items():
+                merged.setdefault(metric, MetricAggregate(self.k)).merge(aggregate)
+        return merged
+
+    def percentile_ranks(self, video, group="all"):
+        """
+        Place a video within a group
+
+        Returns:
+            dict: metric -> percentile rank (0-100), empty if the group has
+                no videos
+        """
+        aggregates = self.groups.get(group) or {}
+        return {metric: aggregates[metric].percentile_rank(value(video))
+                for metric, value in METRICS.items() if metric in aggregates}
+
+    def merge(self, other):
+        """Fold another aggregator, e.g. from another worker, into this one."""
+        with self._lock:
+            for group, aggregates in other.groups.items():
+                mine = self.groups.setdefault(group, {metric: MetricAggregate(self.k) for metric in METRICS})
+                for metric, aggregate in aggregates.items():
+                    mine[metric].merge(aggregate)
+        self._expire_windows()
+        return self
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'k': self.k,
+                'max_window_days': self.max_window_days,
+                'groups': {group: {metric: aggregate.to_dict() for metric, aggregate in aggregates.items()}
+                           for group, aggregates in self.groups.items()},
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregator = cls(data['k'], data['max_window_days'])
+        aggregator.groups = {
+            group: {metric: MetricAggregate.from_dict(aggregate) for metric, aggregate in aggregates.items()}
+            for group, aggregates in data['groups'].items()
+        }
+        return aggregator
+
+    def save(self, path):
+        # Write-then-rename so a crash never leaves a torn file
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def _groups_of(self, video):
+        groups = ["all"]
+        category_id = video.get('category_id')
+        if category_id:
+            groups.append(f"category:{category_id}")
+        published_at = video.get('published_at')
+        if published_at:
+            groups.append(f"day:{published_at[:10]}")
+        return groups
+
+    def _expire_windows(self):
+        oldest = f"day:{datetime.utcnow().date() - timedelta(days=self.max_window_days)}"
+        with self._lock:
+            for group in [group for group in self.groups if group.startswith("day:") and group < oldest]:
+                del self.groups[group]
+
+_corpus = None
+_corpus_seen = None
+_corpus_lock = threading.Lock()
+# Video IDs already in the corpus, one filter per process like the corpus
+SEEN_CAPACITY = 1000000
+
+def get_trend_corpus():
+    """
+    Return the process-wide aggregate of every trending Short seen
+
+    Set TREND_STATS_PATH to keep it across restarts; give each worker
+    process its own file and combine them with the merge command. The IDs
+    already counted are kept next to it in TREND_STATS_PATH + ".seen", so
+    a restarted process does not count a video again.
+
+    Returns:
+        TrendAggregator: The shared aggregator
+    """
+    global _corpus, _corpus_seen
+    with _corpus_lock:
+        if _corpus is None:
+            path = os.getenv("TREND_STATS_PATH", "")
+            _corpus = TrendAggregator.load(path) if path and os.path.exists(path) else TrendAggregator()
+            _corpus_seen = _load_seen(path + ".seen") if path else BloomFilter(SEEN_CAPACITY)
+        return _corpus
+
+def add_to_trend_corpus(videos):
+    """
+    Add videos to the shared aggregate, once per video ID
+
+    Returns:
+        TrendAggregator: The shared aggregator
+    """
+    corpus = get_trend_corpus()
+    path = os.getenv("TREND_STATS_PATH", "")
+    with _corpus_lock:
+        added = corpus.add_many(videos, _corpus_seen)
+        if added and path:
+            try:
+                corpus.save(path)
+                _corpus_seen.save(path + ".seen")
+            except OSError as e:
+                print(f"Error saving trend statistics: {e}")
+    return corpus
+
+def _load_seen(path):
+    if not os.path.exists(path):
+        return BloomFilter(SEEN_CAPACITY)
+    try:
+        return BloomFilter.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error loading seen trend videos, they may be counted again: {e}")
+        return BloomFilter(SEEN_CAPACITY)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and merge trend statistics")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="Aggregate JSONL video records, e.g. bulk_analyze.py output")
+    build_parser.add_argument("inputs", nargs="+")
+    build_parser.add_argument("-o", "--output", required=True)
+    merge_parser = commands.add_parser("merge", help="Merge saved aggregates")
+    merge_parser.add_argument("inputs", nargs="+")
+    merge_parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    aggregator = TrendAggregator()
+    for path in args.inputs:
+        if args.command == "merge":
+            aggregator.merge(TrendAggregator.load(path))
+            continue
+        with open(path, encoding="utf-8") as f:
+            records = (json.loads(line) for line in f if line.strip())
+            aggregator.add_many(record for record in records if record.get('view_count') is not None)
+    aggregator.save(args.output)
+
+    overall = aggregator.get("all")
+    if overall:
+        print(json.dumps({metric: aggregate.summary() for metric, aggregate in overall.items()}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,26 @@
+import hashlib
+import json
+import math
+import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads of the process-wide pool for I/O-bound work
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", "32"))
+
+# Any supported YouTube link; group 1 is the video ID. Hosts are matched
+# case-insensitively, tracking parameters before v= are skipped, and the
+# lookarounds stop matches inside longer words or IDs in free text.
+YOUTUBE_URL_PATTERN = re.compile(
+    r'(?<![\w.-])(?i:(?:https?://)?(?:(?:www|m|music)\.)?)'
+    r'(?:(?i:youtube\.com)/(?:shorts/|embed/|live/|watch/?\?(?:[^\s#]*?&)?v=)|(?i:youtu\.be)/)'
+    r'([a-zA-Z0-9_-]{11})(?![a-zA-Z0-9_-])'
+)
+# A whole input that is a YouTube URL (group 1) or a bare video ID (group 2)
+VIDEO_REFERENCE_PATTERN = re.compile(
+    r'\s*(?:' + YOUTUBE_URL_PATTERN.pattern + r'/?(?:[?&#]\S*)?|([a-zA-Z0-9_-]{11}))\s*'
+)
 
 def is_shorts_url(url):
     """
@@ -10,49 +32,83 @@ def is_shorts_url(url):
     Returns:
         bool: True if URL is valid, False otherwise
     """
-    # Check for standard YouTube Shorts URL format
-    shorts_pattern = r'https?://(www\.)?youtube\.com/shorts/[a-zA-Z0-9_-]{11}(\?.*)?$'
-    if re.match(shorts_pattern, url):
-        return True
-    
-    # Check for YouTube URL that might be a Short
-    youtube_pattern = r'https?://(www\.)?youtube\.com/watch\?v=[a-zA-Z0-9_-]{11}(&.*)?$'
-    if re.match(youtube_pattern, url):
-        return True
-    
-    # Check for youtu.be short URL
-    short_link_pattern = r'https?://(www\.)?youtu\.be/[a-zA-Z0-9_-]{11}(\?.*)?$'
-    if re.match(short_link_pattern, url):
-        return True
-    
-    return False
+    return extract_video_id(url) is not None
 
 def extract_video_id(url):
     """
     Extract YouTube video ID from URL
     
+    Accepts youtube.com (www, m and music subdomains) /shorts/, /watch,
+    /embed/ and /live/ links and youtu.be links, with or without the scheme
+    and with any trailing query parameters.
+    
     Args:
         url (str): YouTube URL
         
     Returns:
-        str: Video ID
+        str: Video ID, or None if url is not a YouTube video URL
+    """
+    match = VIDEO_REFERENCE_PATTERN.fullmatch(url)
+    return match.group(1) if match else None
+
+def parse_video_id(text):
     """
-    # Check for standard YouTube Shorts URL format
-    shorts_match = re.match(r'https?://(www\.)?youtube\.com/shorts/([a-zA-Z0-9_-]{11})(\?.*)?$', url)
-    if shorts_match:
-        return shorts_match.group(2)
+    Extract a video ID from a YouTube URL or a bare 11-character ID
     
-    # Check for standard YouTube URL
-    watch_match = re.match(r'https?://(www\.)?youtube\.com/watch\?v=([a-zA-Z0-9_-]{11})(&.*)?$', url)
-    if watch_match:
-        return watch_match.group(2)
+    Args:
+        text (str): URL or ID, surrounding whitespace allowed
+        
+    Returns:
+        str: Video ID, or None if text is neither
+    """
+    match = VIDEO_REFERENCE_PATTERN.fullmatch(text)
+    if not match:
+        return None
+    return match.group(1) or match.group(2)
+
+def find_video_ids(text):
+    """
+    Find the video IDs of every YouTube link in free text
     
-    # Check for youtu.be short URL
-    short_link_match = re.match(r'https?://(www\.)?youtu\.be/([a-zA-Z0-9_-]{11})(\?.*)?$', url)
-    if short_link_match:
-        return short_link_match.group(2)
+    Args:
+        text (str): Text such as a chat message or spreadsheet cell
+        
+    Returns:
+        list: Video IDs in order of appearance, repeats included
+    """
+    return YOUTUBE_URL_PATTERN.findall(text)
+
+def iter_video_ids(lines, seen=None):
+    """
+    Stream unique video IDs out of a link dump
+    
+    Each line may be a URL, a bare ID or free text with any number of
+    links. Only the IDs seen so far are held in memory, so this works on
+    inputs of any length.
     
-    return None
+    Args:
+        lines (iterable): Lines of text, e.g. an open file
+        seen: Set-like object (supports `in` and add) of video IDs to skip;
+            pass a BloomFilter to bound memory on huge dumps at the cost of
+            rare false drops
+        
+    Yields:
+        str: Each video ID the first time it appears
+    """
+    seen = set() if seen is None else seen
+    for line in lines:
+        match = VIDEO_REFERENCE_PATTERN.fullmatch(line)
+        if match:
+            video_ids = (match.group(1) or match.group(2),)
+        elif 'youtu' in line.lower():
+            # Substring check first: the full scan costs ~20x more per line
+            video_ids = YOUTUBE_URL_PATTERN.findall(line)
+        else:
+            continue
+        for video_id in video_ids:
+            if video_id not in seen:
+                seen.add(video_id)
+                yield video_id
 
 def format_number(num):
     """
@@ -75,3 +131,166 @@ def format_number(num):
         return f"{num/1000:.1f}K"
     else:
         return str(num)
+
+class BloomFilter:
+    """
+    Compact probabilistic set for deduplicating large numbers of strings
+    
+    Membership tests never give false negatives; false positives happen at
+    roughly error_rate once capacity items have been added. A filter for
+    1M items at 0.1% takes about 1.8 MB, versus ~100 MB for a set of IDs.
+    """
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+    
+    def add(self, item):
+        """
+        Add an item
+        
+        Args:
+            item (str): Item to add
+        """
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+    
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+    
+    def __len__(self):
+        return self._count
+    
+    def save(self, path):
+        """
+        Write the filter to path: a JSON header line, then the bit array
+        
+        Args:
+            path (str): Output file, replaced atomically
+        """
+        header = {'capacity': self.capacity, 'error_rate': self.error_rate, 'count': self._count}
+        # Write-then-rename so a crash never leaves a torn file
+        with open(path + ".tmp", "wb") as f:
+            f.write(json.dumps(header).encode('utf-8') + b"\n")
+            f.write(self._bits)
+        os.replace(path + ".tmp", path)
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Read a filter written by save()
+        
+        Raises:
+            ValueError: If the file is truncated or not a saved filter
+        """
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            bits = f.read()
+        bloom = cls(header['capacity'], header['error_rate'])
+        if len(bits) != len(bloom._bits):
+            raise ValueError(f"{path} holds {len(bits)} bytes of bits, expected {len(bloom._bits)}")
+        bloom._bits = bytearray(bits)
+        bloom._count = header['count']
+        return bloom
+    
+    def _positions(self, item):
+        # Double hashing: k positions from two independent 64-bit hashes
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+class GrowableArray:
+    """
+    NumPy array with amortized O(1) appends along the first axis
+    
+    values() is a view of the filled part. Growing copies into a new
+    buffer, so views handed out earlier stay valid while rows are added.
+    """
+    def __init__(self, dtype, values=()):
+        import numpy as np
+        
+        self._data = np.asarray(values, dtype=dtype)
+        self._size = len(self._data)
+    
+    def extend(self, values):
+        """
+        Append rows
+        
+        Args:
+            values (array-like): Rows shaped like the existing ones
+        """
+        import numpy as np
+        
+        values = np.asarray(values, dtype=self._data.dtype)
+        needed = self._size + len(values)
+        if needed > len(self._data):
+            grown = np.empty((max(needed, 2 * len(self._data), 1024),) + self._data.shape[1:], dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:needed] = values
+        self._size = needed
+    
+    def values(self):
+        return self._data[:self._size]
+    
+    def __len__(self):
+        return self._size
+
+_thread_pool = None
+_thread_pool_lock = threading.Lock()
+
+def get_thread_pool():
+    """
+    Return the process-wide thread pool for I/O-bound work, creating it on first use
+    
+    Its threads live as long as the process, so per-thread state such as
+    youtube_api's cached client and its keep-alive connections is reused
+    from one request to the next. Size it with WORKER_THREADS.
+    
+    Returns:
+        ThreadPoolExecutor: The shared pool
+    """
+    global _thread_pool
+    with _thread_pool_lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="worker")
+        return _thread_pool
+
+def map_in_pool(function, items, max_workers=None):
+    """
+    Apply function to every item on the shared thread pool
+    
+    Items are dealt round-robin into at most max_workers lanes. The calling
+    thread runs the first lane itself, then any lane the pool has not
+    started yet, so a call made from a pool thread (e.g. a pipeline stage)
+    finishes even when every pool thread is busy.
+    
+    Args:
+        function (callable): Function of one item
+        items (iterable): Items to apply it to
+        max_workers (int): Maximum number of items processed at once
+        
+    Returns:
+        list: Results in the order of items; the first exception raised
+            by function propagates
+    """
+    items = list(items)
+    lanes = max(1, min(max_workers or len(items), len(items)))
+    
+    def run_lane(lane):
+        return [function(item) for item in items[lane::lanes]]
+    
+    futures = [get_thread_pool().submit(run_lane, lane) for lane in range(1, lanes)]
+    lane_results = [run_lane(0)]
+    for lane, future in enumerate(futures, 1):
+        lane_results.append(run_lane(lane) if future.cancel() else future.result())
+    
+    results = [None] * len(items)
+    for lane, values in enumerate(lane_results):
+        results[lane::lanes] = values
+    return results
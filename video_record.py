@@ -0,0 +1,234 @@
+import re
+from array import array
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+
+import numpy as np
+
+DURATION_PATTERN = re.compile(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?')
+PUBLISHED_AT_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+def parse_duration(duration, default=0):
+    """
+    Convert an ISO 8601 duration like "PT1M5S" to seconds
+
+    Args:
+        duration (str): Duration from the YouTube API
+        default: Value returned if the duration is not in PT form
+
+    Returns:
+        int: Total seconds, or default
+    """
+    duration_match = DURATION_PATTERN.match(duration)
+    if not duration_match:
+        return default
+    hours = int(duration_match.group(1) or 0)
+    minutes = int(duration_match.group(2) or 0)
+    seconds = int(duration_match.group(3) or 0)
+    return hours * 3600 + minutes * 60 + seconds
+
+def parse_published_at(published_at):
+    """
+    Parse a YouTube publishedAt timestamp into a naive UTC datetime
+
+    Args:
+        published_at (str): Timestamp like "2024-01-01T12:00:00Z"
+
+    Returns:
+        datetime: Publish time
+    """
+    return datetime.strptime(published_at, PUBLISHED_AT_FORMAT)
+
+class VideoRecord(Mapping):
+    """
+    Metadata of one video, with duration and publish time parsed at ingest
+
+    Fields are read as attributes (record.view_count) or, for code written
+    against the original metadata dicts, as keys (record['view_count']).
+    Besides the raw 'duration' and 'published_at' strings it carries
+    'duration_seconds' (int) and 'published' (datetime), so no later layer
+    has to parse them again. Records are read-only; dict(record) gives a
+    mutable copy.
+    """
+    FIELDS = (
+        'video_id', 'title', 'description', 'published_at', 'published',
+        'channel_id', 'channel_title', 'tags', 'category_id', 'thumbnail_url',
+        'duration', 'duration_seconds', 'view_count', 'like_count',
+        'comment_count', 'is_shorts',
+    )
+    __slots__ = FIELDS
+
+    def __init__(self, video_id, title, description, published_at, channel_id, channel_title,
+                 tags, category_id, thumbnail_url, duration, view_count, like_count,
+                 comment_count, is_shorts, published=None, duration_seconds=None):
+        set_field = object.__setattr__
+        set_field(self, 'video_id', video_id)
+        set_field(self, 'title', title)
+        set_field(self, 'description', description)
+        set_field(self, 'published_at', published_at)
+        set_field(self, 'published', published if published is not None else parse_published_at(published_at))
+        set_field(self, 'channel_id', channel_id)
+        set_field(self, 'channel_title', channel_title)
+        set_field(self, 'tags', tuple(tags or ()))
+        set_field(self, 'category_id', category_id)
+        set_field(self, 'thumbnail_url', thumbnail_url)
+        set_field(self, 'duration', duration)
+        set_field(self, 'duration_seconds', duration_seconds if duration_seconds is not None else parse_duration(duration))
+        set_field(self, 'view_count', int(view_count))
+        set_field(self, 'like_count', int(like_count))
+        set_field(self, 'comment_count', int(comment_count))
+        set_field(self, 'is_shorts', bool(is_shorts))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("VideoRecord is read-only")
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def __reduce__(self):
+        return (_rebuild_record, (tuple(getattr(self, field) for field in self.FIELDS),))
+
+    def __repr__(self):
+        return f"VideoRecord(video_id={self.video_id!r}, title={self.title!r})"
+
+    def to_dict(self):
+        """Return the record as a plain dict."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+def _rebuild_record(values):
+    fields = dict(zip(VideoRecord.FIELDS, values))
+    return VideoRecord(**fields)
+
+class VideoRecordColumns:
+    """
+    Column-wise collection of VideoRecords for large corpora
+
+    Counts, durations and publish times are packed into typed arrays, tags
+    are stored as one separator-joined string per video, and repeated
+    channel and category strings are interned. Indexing returns a
+    VideoRecord rebuilt from the columns.
+    """
+    TAG_SEPARATOR = '\x1f'
+
+    def __init__(self, records=()):
+        self.video_ids = []
+        self.titles = []
+        self.descriptions = []
+        self.channel_ids = []
+        self.channel_titles = []
+        self.tags = []
+        self.category_ids = []
+        self.thumbnail_urls = []
+        self.durations = []
+        self.duration_seconds = array('i')
+        self.published = array('q')  # seconds since the epoch, UTC
+        self.view_counts = array('q')
+        self.like_counts = array('q')
+        self.comment_counts = array('q')
+        self.is_shorts = bytearray()
+        self._interned = {}
+        self.extend(records)
+
+    def append(self, record):
+        """
+        Add one record
+
+        Args:
+            record (VideoRecord): Record to add
+        """
+        self.video_ids.append(record.video_id)
+        self.titles.append(record.title)
+        self.descriptions.append(record.description)
+        self.channel_ids.append(self._intern(record.channel_id))
+        self.channel_titles.append(self._intern(record.channel_title))
+        self.tags.append(self.TAG_SEPARATOR.join(record.tags))
+        self.category_ids.append(self._intern(record.category_id))
+        self.thumbnail_urls.append(record.thumbnail_url)
+        self.durations.append(self._intern(record.duration))
+        self.duration_seconds.append(record.duration_seconds)
+        self.published.append(int((record.published - _EPOCH).total_seconds()))
+        self.view_counts.append(record.view_count)
+        self.like_counts.append(record.like_count)
+        self.comment_counts.append(record.comment_count)
+        self.is_shorts.append(record.is_shorts)
+
+    def extend(self, records):
+        """
+        Add many records
+
+        Args:
+            records (iterable): VideoRecords to add
+        """
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return len(self.video_ids)
+
+    def __getitem__(self, i):
+        tags = self.tags[i]
+        published = _EPOCH + timedelta(seconds=self.published[i])
+        return VideoRecord(
+            video_id=self.video_ids[i],
+            title=self.titles[i],
+            description=self.descriptions[i],
+            published_at=published.strftime(PUBLISHED_AT_FORMAT),
+            channel_id=self.channel_ids[i],
+            channel_title=self.channel_titles[i],
+            tags=tags.split(self.TAG_SEPARATOR) if tags else (),
+            category_id=self.category_ids[i],
+            thumbnail_url=self.thumbnail_urls[i],
+            duration=self.durations[i],
+            view_count=self.view_counts[i],
+            like_count=self.like_counts[i],
+            comment_count=self.comment_counts[i],
+            is_shorts=bool(self.is_shorts[i]),
+            published=published,
+            duration_seconds=self.duration_seconds[i],
+        )
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def to_frame(self):
+        """
+        Return the collection as a DataFrame for process_video_frame
+
+        Returns:
+            pd.DataFrame: One row per video with the metadata dict columns
+        """
+        import pandas as pd
+
+        return pd.DataFrame({
+            'video_id': self.video_ids,
+            'title': self.titles,
+            'description': self.descriptions,
+            'published_at': pd.to_datetime(np.frombuffer(self.published, dtype=np.int64), unit='s').strftime(PUBLISHED_AT_FORMAT),
+            'channel_id': self.channel_ids,
+            'channel_title': self.channel_titles,
+            'tags': [tags.split(self.TAG_SEPARATOR) if tags else [] for tags in self.tags],
+            'category_id': self.category_ids,
+            'thumbnail_url': self.thumbnail_urls,
+            'duration': self.durations,
+            'duration_seconds': np.frombuffer(self.duration_seconds, dtype=np.int32),
+            'view_count': np.frombuffer(self.view_counts, dtype=np.int64),
+            'like_count': np.frombuffer(self.like_counts, dtype=np.int64),
+            'comment_count': np.frombuffer(self.comment_counts, dtype=np.int64),
+            'is_shorts': np.frombuffer(self.is_shorts, dtype=np.bool_),
+        })
+
+    def _intern(self, value):
+        return self._interned.setdefault(value, value)
+
+_EPOCH = datetime(1970, 1, 1)
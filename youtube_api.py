@@ -1,27 +1,118 @@
 import os
-import googleapiclient.discovery
+import threading
 import googleapiclient.errors
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import random
-import re
+import time
+from functools import partial
 from dotenv import load_dotenv
+from cache import TTLCache
+from metadata_store import get_metadata_store
+from snapshot_store import get_snapshot_store
+from quota import BACKGROUND, ENDPOINT_COSTS, INTERACTIVE, get_quota_scheduler
+from text_features import has_shorts_marker
+import tracing
+from utils import BloomFilter, map_in_pool
+from video_record import VideoRecord, parse_duration
 load_dotenv()
+
+# videos().list accepts at most 50 IDs per call
+MAX_IDS_PER_REQUEST = 50
+
+# Trending results barely change over minutes: serve them for
+# TRENDING_CACHE_TTL seconds, then stale for up to TRENDING_CACHE_STALE_TTL
+# more while a background refresh runs
+TRENDING_CACHE_TTL = int(os.getenv("TRENDING_CACHE_TTL", "900"))
+TRENDING_CACHE_STALE_TTL = int(os.getenv("TRENDING_CACHE_STALE_TTL", "3600"))
+trending_cache = TTLCache(ttl=TRENDING_CACHE_TTL, stale_ttl=TRENDING_CACHE_STALE_TTL)
+
+# Only the attributes the app actually reads are requested from the API
+VIDEO_FIELDS = (
+    "etag,items(id,etag,"
+    "snippet(title,description,publishedAt,channelId,channelTitle,tags,categoryId,"
+    "thumbnails(default/url,high/url)),"
+    "contentDetails/duration,"
+    "statistics(viewCount,likeCount,commentCount))"
+)
+STATISTICS_FIELDS = "items(id,statistics(viewCount,likeCount,commentCount))"
+SEARCH_FIELDS = "nextPageToken,items/id/videoId"
+
+# Google APIs only compress responses for clients that advertise gzip in both
+# Accept-Encoding and the User-Agent; httplib2 and googleapiclient add the gzip
+# markers themselves, this just identifies the app in front of them
+USER_AGENT = "youtube-shorts-analyzer"
+
+# One client (and httplib2 connection pool) per thread, since httplib2
+# is not thread-safe. Bumping the generation invalidates every thread's client.
+_client_local = threading.local()
+_client_lock = threading.Lock()
+_client_generation = 0
+
 # Setup API client
 def get_youtube_api():
-    """Initialize the YouTube API client."""
+    """
+    Return this thread's cached YouTube API client, building it on first use
+    
+    The client is built from the discovery document bundled with
+    google-api-python-client, so no discovery request is made, and is
+    rebuilt automatically if YOUTUBE_API_KEY changes.
+    
+    Returns:
+        Resource: YouTube Data API v3 client
+    """
     api_key = os.getenv("YOUTUBE_API_KEY", "")
     if not api_key:
         raise ValueError("YouTube API key not found. Please set the YOUTUBE_API_KEY environment variable.")
     
+    cached = getattr(_client_local, 'client', None)
+    if cached is not None and cached[0] == _client_generation and cached[1] == api_key:
+        return cached[2]
+    
+    client = _build_youtube_api(api_key)
+    _client_local.client = (_client_generation, api_key, client)
+    return client
+
+def reset_youtube_api():
+    """
+    Drop all cached YouTube API clients, e.g. after rotating the API key
+    
+    Each thread builds a fresh client on its next get_youtube_api() call.
+    """
+    global _client_generation
+    with _client_lock:
+        _client_generation += 1
+
+def _build_youtube_api(api_key):
+    """Build a YouTube API client with its own keep-alive HTTP connection pool."""
+    # Imported here to keep the discovery machinery off the app's import path
+    import httplib2
+    import googleapiclient.discovery
+    import googleapiclient.http
+    
     api_service_name = "youtube"
     api_version = "v3"
     
+    http = googleapiclient.http.set_user_agent(httplib2.Http(timeout=30), USER_AGENT)
+    
+    # Point the client somewhere else, e.g. the local fake API in benchmarks/.
+    # The variable holds the full .../youtube/v3 base the async client uses;
+    # the discovery document adds the youtube/v3/ part of the path itself.
+    base_url = os.getenv("YOUTUBE_API_BASE_URL")
+    client_options = None
+    if base_url:
+        client_options = {'api_endpoint': base_url.rstrip("/").removesuffix("/youtube/v3") + "/"}
+    
     return googleapiclient.discovery.build(
         api_service_name, 
         api_version, 
-        developerKey=api_key
+        developerKey=api_key,
+        http=http,
+        client_options=client_options,
+        static_discovery=True,
+        cache_discovery=False
     )
 
+@tracing.traced()
 def get_video_data(video_id):
     """
     Fetch metadata for a specific YouTube video
@@ -33,132 +124,458 @@ def get_video_data(video_id):
         dict: Video metadata
     """
     try:
-        youtube = get_youtube_api()
+        items = _fetch_video_items([video_id])
         
-        # Get video details
-        video_response = youtube.videos().list(
-            part="snippet,statistics,contentDetails",
-            id=video_id
-        ).execute()
-        
-        if not video_response['items']:
+        if video_id not in items:
             return None
         
-        video_info = video_response['items'][0]
-        
-        # Extract relevant data
-        video_data = {
-            'video_id': video_id,
-            'title': video_info['snippet']['title'],
-            'description': video_info['snippet']['description'],
-            'published_at': video_info['snippet']['publishedAt'],
-            'channel_id': video_info['snippet']['channelId'],
-            'channel_title': video_info['snippet']['channelTitle'],
-            'tags': video_info['snippet'].get('tags', []),
-            'category_id': video_info['snippet']['categoryId'],
-            'thumbnail_url': video_info['snippet']['thumbnails']['high']['url'] if 'high' in video_info['snippet']['thumbnails'] else video_info['snippet']['thumbnails']['default']['url'],
-            'duration': video_info['contentDetails']['duration'],
-            'view_count': int(video_info['statistics'].get('viewCount', 0)),
-            'like_count': int(video_info['statistics'].get('likeCount', 0)),
-            'comment_count': int(video_info['statistics'].get('commentCount', 0)),
-            'is_shorts': is_shorts(video_info)
-        }
-        
-        return video_data
+        return build_video_data(items[video_id])
         
     except googleapiclient.errors.HttpError as e:
-        print(f"HTTP Error: {e}")
+        _report_error(f"HTTP Error: {e}")
         return None
     except Exception as e:
-        print(f"Error fetching video data: {e}")
+        _report_error(f"Error fetching video data: {e}")
         return None
 
-def get_trending_shorts(max_results=20):
+@tracing.traced()
+def get_videos_data(video_ids, max_workers=4, priority=INTERACTIVE, calls=None):
+    """
+    Fetch metadata for many YouTube videos using batched videos().list calls
+    
+    IDs are split into chunks of MAX_IDS_PER_REQUEST and the chunks are
+    fetched concurrently, at most max_workers at a time.
+    
+    Args:
+        video_ids (list): YouTube video IDs
+        max_workers (int): Maximum number of chunks fetched at once
+        priority (int): quota.INTERACTIVE or quota.BACKGROUND
+        calls (list): If given, the endpoint of every API call made is
+            appended to it; videos served by the metadata store add nothing
+        
+    Returns:
+        tuple: (videos, missing) where videos is a list of video metadata
+            dicts in input order and missing maps each ID that could not be
+            fetched to the reason
+    """
+    # Drop duplicates but keep the first position of each ID
+    unique_ids = list(dict.fromkeys(video_ids))
+    chunks = [
+        unique_ids[i:i + MAX_IDS_PER_REQUEST]
+        for i in range(0, len(unique_ids), MAX_IDS_PER_REQUEST)
+    ]
+    
+    found = {}
+    missing = {}
+    # Runs on the shared pool, whose threads keep their API clients
+    fetch_chunk = tracing.in_current_context(partial(_fetch_video_chunk, priority=priority, calls=calls))
+    for chunk_found, chunk_missing in map_in_pool(fetch_chunk, chunks, max_workers):
+        found.update(chunk_found)
+        missing.update(chunk_missing)
+    
+    videos = [found[video_id] for video_id in unique_ids if video_id in found]
+    return videos, missing
+
+def _fetch_video_chunk(video_ids, priority=INTERACTIVE, calls=None):
+    """
+    Fetch one chunk of at most MAX_IDS_PER_REQUEST videos
+    
+    Args:
+        video_ids (list): YouTube video IDs
+        priority (int): quota.INTERACTIVE or quota.BACKGROUND
+        calls (list): Collects the endpoint of every API call made
+        
+    Returns:
+        tuple: (found, missing) dicts keyed by video ID
+    """
+    try:
+        items = _fetch_video_items(video_ids, priority, calls)
+    except googleapiclient.errors.HttpError as e:
+        return {}, {video_id: f"HTTP Error: {e}" for video_id in video_ids}
+    except Exception as e:
+        return {}, {video_id: f"Error fetching video data: {e}" for video_id in video_ids}
+    
+    found = {}
+    for video_info in items.values():
+        try:
+            found[video_info['id']] = build_video_data(video_info)
+        except (KeyError, ValueError) as e:
+            # Leave it to be reported as missing below
+            _report_error(f"Malformed video item {video_info.get('id')}: {e}")
+    
+    missing = {video_id: "Video not found" for video_id in video_ids if video_id not in found}
+    return found, missing
+
+def _fetch_video_items(video_ids, priority=INTERACTIVE, calls=None):
+    """
+    Fetch raw videos().list items, going through the metadata store
+    
+    Stored videos with fresh snippet and statistics are served without an
+    API call. Videos whose statistics alone are stale get a statistics-only
+    refresh. Everything else is fetched in full; a single stored video is
+    revalidated with If-None-Match so an unchanged one costs a 304.
+    
+    Args:
+        video_ids (list): At most MAX_IDS_PER_REQUEST YouTube video IDs
+        priority (int): quota.INTERACTIVE or quota.BACKGROUND
+        calls (list): If given, "videos.list" is appended to it for every
+            API call made
+        
+    Returns:
+        dict: Video resources keyed by video ID, for videos that exist
+    """
+    store = get_metadata_store()
+    records = store.get_many(video_ids) if store else {}
+    now = time.time()
+    
+    items = {}
+    stale_stats_ids = []
+    full_ids = []
+    for video_id in video_ids:
+        record = records.get(video_id)
+        if record is None or not store.is_snippet_fresh(record, now):
+            full_ids.append(video_id)
+        elif not store.is_statistics_fresh(record, now):
+            stale_stats_ids.append(video_id)
+        else:
+            items[video_id] = record.payload
+    if items:
+        tracing.record('store_hits', len(items))
+    
+    if not stale_stats_ids and not full_ids:
+        return items
+    
+    youtube = get_youtube_api()
+    
+    if stale_stats_ids:
+        stats_response = _execute("videos.list", youtube.videos().list(
+            part="statistics",
+            id=",".join(stale_stats_ids),
+            fields=STATISTICS_FIELDS
+        ), priority, calls)
+        stats_items = stats_response.get('items', [])
+        store.update_statistics_many(stats_items)
+        _record_snapshots(stats_items)
+        for stats_item in stats_items:
+            payload = dict(records[stats_item['id']].payload)
+            payload['statistics'] = stats_item.get('statistics', {})
+            items[stats_item['id']] = payload
+    
+    if full_ids:
+        request = youtube.videos().list(
+            part="snippet,statistics,contentDetails",
+            id=",".join(full_ids),
+            maxResults=MAX_IDS_PER_REQUEST,
+            fields=VIDEO_FIELDS
+        )
+        # Response ETags cover the whole ID list, so only single-video
+        # requests can be revalidated
+        revalidate = records.get(full_ids[0]) if len(full_ids) == 1 else None
+        if revalidate is not None and revalidate.etag:
+            request.headers['If-None-Match'] = revalidate.etag
+        
+        try:
+            response = _execute("videos.list", request, priority, calls)
+        except googleapiclient.errors.HttpError as e:
+            if revalidate is None or e.resp.status != 304:
+                raise
+            store.touch(revalidate.video_id)
+            items[revalidate.video_id] = revalidate.payload
+        else:
+            fetched = response.get('items', [])
+            _record_snapshots(fetched)
+            if store:
+                etags = {full_ids[0]: response.get('etag')} if len(full_ids) == 1 else None
+                store.upsert_many(fetched, etags=etags)
+            for video_info in fetched:
+                items[video_info['id']] = video_info
+    
+    return items
+
+def _execute(endpoint, request, priority=INTERACTIVE, calls=None):
+    """Run a googleapiclient request through the shared quota scheduler, noting it in calls."""
+    if tracing.is_active():
+        request.postproc = partial(_count_payload, request.postproc)
+    if calls is None:
+        return get_quota_scheduler().execute(endpoint, request.execute, priority)
+
+    def call():
+        # Runs once per admitted attempt, each of which the scheduler charged
+        calls.append(endpoint)
+        return request.execute()
+    return get_quota_scheduler().execute(endpoint, call, priority)
+
+def _count_payload(postproc, resp, content):
+    # Sees the raw response body before googleapiclient decodes it
+    tracing.record('payload_bytes', len(content))
+    return postproc(resp, content)
+
+def _record_snapshots(items):
+    """Keep a statistics observation of freshly fetched items, if enabled."""
+    snapshots = get_snapshot_store()
+    if snapshots is not None and items:
+        try:
+            # Written off the request thread, batched with other fetches
+            snapshots.append_items_later(items)
+        except Exception as e:
+            _report_error(f"Error recording snapshots: {e}")
+
+def _report_error(message):
+    print(message)
+    tracing.record_error(message)
+
+def build_video_data(video_info):
+    """
+    Convert a videos().list item into the VideoRecord used by the app
+    
+    Duration and publish time are parsed here, once, for every later layer.
+    
+    Args:
+        video_info (dict): Video resource from the YouTube API
+        
+    Returns:
+        VideoRecord: Video metadata
+    """
+    duration_seconds = parse_duration(video_info['contentDetails']['duration'], default=None)
+    return VideoRecord(
+        video_id=video_info['id'],
+        title=video_info['snippet']['title'],
+        description=video_info['snippet']['description'],
+        published_at=video_info['snippet']['publishedAt'],
+        channel_id=video_info['snippet']['channelId'],
+        channel_title=video_info['snippet']['channelTitle'],
+        tags=video_info['snippet'].get('tags', []),
+        category_id=video_info['snippet']['categoryId'],
+        thumbnail_url=video_info['snippet']['thumbnails']['high']['url'] if 'high' in video_info['snippet']['thumbnails'] else video_info['snippet']['thumbnails']['default']['url'],
+        duration=video_info['contentDetails']['duration'],
+        view_count=video_info['statistics'].get('viewCount', 0),
+        like_count=video_info['statistics'].get('likeCount', 0),
+        comment_count=video_info['statistics'].get('commentCount', 0),
+        is_shorts=is_shorts(video_info, duration_seconds),
+        duration_seconds=duration_seconds or 0
+    )
+
+def build_trending_entry(video_info):
+    """
+    Convert a videos().list item into a get_trending_shorts result
+    
+    Shared by the sync and async clients so both return the same shape.
+    
+    Args:
+        video_info (dict): Video resource from the YouTube API
+        
+    Returns:
+        dict: Trending video summary
+    """
+    return {
+        'video_id': video_info['id'],
+        'title': video_info['snippet']['title'],
+        'channel_title': video_info['snippet']['channelTitle'],
+        'published_at': video_info['snippet']['publishedAt'],
+        'view_count': int(video_info['statistics'].get('viewCount', 0)),
+        'like_count': int(video_info['statistics'].get('likeCount', 0)),
+        'comment_count': int(video_info['statistics'].get('commentCount', 0)),
+        'tags': video_info['snippet'].get('tags', []),
+        'category_id': video_info['snippet'].get('categoryId', ''),
+    }
+
+@tracing.traced()
+def get_trending_shorts(max_results=20, region_code=None, language="en", window_days=14, use_cache=True):
     """
     Fetch metadata for trending YouTube Shorts
     
+    Results are shared through trending_cache: a fresh entry is returned as
+    is, a stale one is returned while it is refreshed in the background.
+    
     Args:
         max_results (int): Maximum number of results to return
+        region_code (str): ISO 3166-1 alpha-2 region to search in, or None
+        language (str): Relevance language for the search
+        window_days (int): Only consider videos published in the last N days
+        use_cache (bool): Set to False to bypass the shared cache
         
     Returns:
         list: List of video metadata
     """
+    def load(priority=INTERACTIVE):
+        return _fetch_trending_shorts(max_results, region_code, language, window_days, priority)
+    
     try:
-        youtube = get_youtube_api()
-        
-        # Search for trending shorts
-        # Note: YouTube API doesn't have a direct "shorts" filter, so we'll use workarounds
-        search_response = youtube.search().list(
-            part="id",
-            maxResults=max_results * 2,  # Fetch more to filter down to actual shorts
-            type="video",
-            videoDuration="short",  # Short videos (<4 minutes)
-            order="viewCount",
-            publishedAfter=(datetime.now() - timedelta(days=14)).isoformat() + "Z",  # Last 2 weeks
-            relevanceLanguage="en"
-        ).execute()
-        
-        if not search_response.get('items', []):
-            return []
-            
-        # Get video IDs
-        video_ids = [item['id']['videoId'] for item in search_response['items']]
-        
-        # Get details for these videos
-        videos_response = youtube.videos().list(
-            part="snippet,statistics,contentDetails",
-            id=",".join(video_ids)
-        ).execute()
-        
-        # Filter to actual shorts
-        shorts_data = []
-        for video in videos_response.get('items', []):
-            if is_shorts(video) and len(shorts_data) < max_results:
-                shorts_data.append({
-                    'video_id': video['id'],
-                    'title': video['snippet']['title'],
-                    'channel_title': video['snippet']['channelTitle'],
-                    'published_at': video['snippet']['publishedAt'],
-                    'view_count': int(video['statistics'].get('viewCount', 0)),
-                    'like_count': int(video['statistics'].get('likeCount', 0)),
-                    'comment_count': int(video['statistics'].get('commentCount', 0)),
-                    'tags': video['snippet'].get('tags', []),
-                })
-        
-        return shorts_data
+        if not use_cache:
+            return load()
+        key = (max_results, region_code, language, window_days)
+        # Stale-entry refreshes yield quota and rate to interactive calls
+        return list(trending_cache.get(key, load, background_loader=lambda: load(BACKGROUND)))
         
     except googleapiclient.errors.HttpError as e:
-        print(f"HTTP Error when fetching trending shorts: {e}")
+        _report_error(f"HTTP Error when fetching trending shorts: {e}")
         return []
     except Exception as e:
-        print(f"Error fetching trending shorts: {e}")
+        _report_error(f"Error fetching trending shorts: {e}")
+        return []
+
+def get_trending_cache_stats():
+    """
+    Return hit, miss and refresh counters of the trending Shorts cache
+    
+    Returns:
+        dict: Cache counters
+    """
+    return trending_cache.stats()
+
+def _fetch_trending_shorts(max_results, region_code, language, window_days, priority=INTERACTIVE):
+    """
+    Fetch trending Shorts from the API, raising on errors so they are never cached
+    """
+    youtube = get_youtube_api()
+    
+    search_params = dict(
+        part="id",
+        fields=SEARCH_FIELDS,
+        maxResults=max_results * 2,  # Fetch more to filter down to actual shorts
+        type="video",
+        videoDuration="short",  # Short videos (<4 minutes)
+        order="viewCount",
+        publishedAfter=(datetime.now() - timedelta(days=window_days)).isoformat() + "Z",
+        relevanceLanguage=language
+    )
+    if region_code:
+        search_params['regionCode'] = region_code
+    
+    # Search for trending shorts
+    # Note: YouTube API doesn't have a direct "shorts" filter, so we'll use workarounds
+    search_response = _execute("search.list", youtube.search().list(**search_params), priority)
+    
+    if not search_response.get('items', []):
         return []
+        
+    # Get video IDs
+    video_ids = [item['id']['videoId'] for item in search_response['items']]
+    
+    # Get details for these videos, reusing stored metadata where fresh
+    items = _fetch_video_items(video_ids, priority)
+    
+    # Filter to actual shorts
+    shorts_data = []
+    for video in (items[video_id] for video_id in video_ids if video_id in items):
+        if is_shorts(video) and len(shorts_data) < max_results:
+            shorts_data.append(build_trending_entry(video))
+    
+    return shorts_data
+
+def crawl_trending_shorts(published_after, published_before=None, window=timedelta(days=1),
+                          max_pages_per_window=10, region_code=None, language="en",
+                          order="viewCount", quota_budget=None, seen=None, priority=BACKGROUND):
+    """
+    Crawl Shorts page by page across publish-time windows, as a generator
+    
+    The range between published_after and published_before is cut into
+    window-sized slices, newest first. Each slice is searched following
+    nextPageToken for up to max_pages_per_window pages of 50 results. New
+    video IDs from each page are fetched in one videos().list call and every
+    video that is_shorts accepts is yielded right away, so a caller that stops
+    iterating never pays for pages it did not consume.
+    
+    Args:
+        published_after (datetime): Oldest publish time to crawl; naive
+            datetimes are taken as UTC
+        published_before (datetime): Newest publish time to crawl, defaults
+            to now
+        window (timedelta): Size of each publish-time slice
+        max_pages_per_window (int): Search pages to follow per slice
+        region_code (str): ISO 3166-1 alpha-2 region to search in, or None
+        language (str): Relevance language for the search
+        order (str): search().list ordering
+        quota_budget (int): Stop before a page that could take this crawl's
+            spend over the budget; videos served by the metadata store cost
+            nothing
+        seen: Set-like object (supports `in` and add) of video IDs to skip;
+            defaults to a BloomFilter sized for one million videos
+        priority (int): quota.INTERACTIVE or quota.BACKGROUND
+        
+    Yields:
+        dict: Video metadata, in the same shape as get_video_data
+    """
+    youtube = get_youtube_api()
+    seen = BloomFilter(1000000) if seen is None else seen
+    published_after = _as_utc(published_after)
+    published_before = _as_utc(published_before) if published_before else datetime.now(timezone.utc)
+    search_cost = ENDPOINT_COSTS['search.list']
+    # A page's new IDs take at most two videos().list calls: a statistics
+    # refresh of stored videos and a full fetch of the rest
+    page_cost = search_cost + 2 * ENDPOINT_COSTS['videos.list']
+    units_spent = 0
+    
+    window_end = published_before
+    while window_end > published_after:
+        window_start = max(published_after, window_end - window)
+        page_token = None
+        
+        for _ in range(max_pages_per_window):
+            if quota_budget is not None and units_spent + page_cost > quota_budget:
+                return
+            
+            search_response = _execute("search.list", youtube.search().list(
+                part="id",
+                fields=SEARCH_FIELDS,
+                maxResults=50,
+                type="video",
+                videoDuration="short",
+                order=order,
+                publishedAfter=window_start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                publishedBefore=window_end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                relevanceLanguage=language,
+                regionCode=region_code,
+                pageToken=page_token
+            ), priority)
+            units_spent += search_cost
+            
+            new_ids = []
+            for item in search_response.get('items', []):
+                video_id = item['id']['videoId']
+                if video_id not in seen:
+                    seen.add(video_id)
+                    new_ids.append(video_id)
+            
+            if new_ids:
+                calls = []
+                items = _fetch_video_items(new_ids, priority, calls)
+                units_spent += sum(ENDPOINT_COSTS[endpoint] for endpoint in calls)
+                for video_id in new_ids:
+                    if video_id in items and is_shorts(items[video_id]):
+                        yield build_video_data(items[video_id])
+            
+            page_token = search_response.get('nextPageToken')
+            if not page_token:
+                break
+        
+        window_end = window_start
 
-def is_shorts(video_info):
+def _as_utc(moment):
+    # Naive datetimes are UTC by this module's convention
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment.astimezone(timezone.utc)
+
+def is_shorts(video_info, duration_seconds=None):
     """
     Determine if a video is a YouTube Short
     
     Args:
         video_info (dict): Video information from YouTube API
+        duration_seconds (int): Already parsed duration, if available
         
     Returns:
         bool: True if the video is a Short, False otherwise
     """
     # Check if duration is less than 60 seconds
-    duration = video_info['contentDetails']['duration']
-    duration_match = re.match(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', duration)
-    if duration_match:
-        hours = int(duration_match.group(1) or 0)
-        minutes = int(duration_match.group(2) or 0)
-        seconds = int(duration_match.group(3) or 0)
-        total_seconds = hours * 3600 + minutes * 60 + seconds
-        
-        # YouTube Shorts are typically vertical (aspect ratio > 1) and less than 60 seconds
-        if total_seconds <= 60:
-            return True
+    if duration_seconds is None:
+        duration_seconds = parse_duration(video_info['contentDetails']['duration'], default=None)
+    
+    # YouTube Shorts are typically vertical (aspect ratio > 1) and less than 60 seconds
+    if duration_seconds is not None and duration_seconds <= 60:
+        return True
     
     # Sometimes, video description or title mentions #Shorts
-    if '#shorts' in video_info['snippet'].get('description', '').lower() or '#shorts' in video_info['snippet']['title'].lower():
+    if has_shorts_marker(video_info['snippet'].get('description', '')) or has_shorts_marker(video_info['snippet']['title']):
         return True
         
     return False